@@ -1,34 +1,149 @@
+import json
 from abc import ABC
-from typing import List
+from typing import List, Optional
 
-from shapely.geometry import LineString
-from utm import latlon_to_zone_number
+import numpy as np
 
-from src.geo.geo import Node
+from src.geo.geo import Node, LatLon, Position, UTM
+from src.geometry.geometry import get_latlons, project_latlons, unproject_utm, get_cumulative_lengths
+
+
+class NodeCoordinates:
+    """
+    NodeCoordinates are the coordinates of a list of nodes as NumPy arrays. Arrays are computed on demand and cached,
+    so the list of nodes must not be changed in place.
+
+    Coordinates can also be created from UTM or lat, lon coordinates or from their JSON, see from_utm, from_latlons and
+    from_json. Nodes and missing coordinates are then only computed when they are needed.
+    """
+
+    def __init__(self, nodes: Optional[List[Node]]):
+        self.nodes: Optional[List[Node]] = nodes
+
+        self.latlons: Optional[np.ndarray] = None
+        self.utm: Optional[np.ndarray] = None
+        self.cumulative_lengths: Optional[np.ndarray] = None
+
+        # Zone of UTM coordinates without nodes
+        self.zone_latlon: Optional[LatLon] = None
+        # JSON of lat, lon coordinates that aren't decoded yet
+        self.latlons_json: Optional[str] = None
+
+    @staticmethod
+    def from_utm(utm: np.ndarray, zone_latlon: LatLon) -> "NodeCoordinates":
+        # Rows of north, east in the UTM zone of zone_latlon
+        coordinates = NodeCoordinates(None)
+        coordinates.utm = utm
+        coordinates.zone_latlon = zone_latlon
+        return coordinates
+
+    @staticmethod
+    def from_latlons(latlons: np.ndarray) -> "NodeCoordinates":
+        # Rows of lat, lon
+        coordinates = NodeCoordinates(None)
+        coordinates.latlons = latlons
+        return coordinates
+
+    @staticmethod
+    def from_json(latlons_json: str) -> "NodeCoordinates":
+        # JSON list of lat, lon lists, e.g. the nodes attribute of a segment way
+        coordinates = NodeCoordinates(None)
+        coordinates.latlons_json = latlons_json
+        return coordinates
+
+    def get_nodes(self) -> Optional[List[Node]]:
+        if self.nodes is None and (self.utm is not None or self.latlons is not None or self.latlons_json is not None):
+            self.nodes = [Node(Position(latlon=LatLon(lat=lat, lon=lon))) for lat, lon in self.get_latlons().tolist()]
+            # Nodes created from UTM coordinates keep them
+            if self.zone_latlon is not None:
+                for node, (north, east) in zip(self.nodes, self.utm.tolist()):
+                    node.position.utm = UTM(north=north, east=east)
+        return self.nodes
+
+    def is_empty(self) -> bool:
+        if self.latlons_json is not None:
+            # Without decoding, the JSON of no coordinates has only brackets
+            return self.latlons_json.strip("[] \t\r\n") == ""
+        return len(self.get_latlons()) == 0
+
+    def get_zone_latlon(self) -> LatLon:
+        # Coordinates in the UTM zone of UTM coordinates
+        if self.zone_latlon is None:
+            lat, lon = self.get_latlons()[0].tolist()
+            return LatLon(lat=lat, lon=lon)
+        return self.zone_latlon
+
+    def get_latlons(self) -> np.ndarray:
+        # Rows of lat, lon
+        if self.latlons is None:
+            if self.latlons_json is not None:
+                self.latlons = np.array(json.loads(self.latlons_json), dtype=np.float64).reshape(-1, 2)
+                self.latlons_json = None
+            elif self.nodes is None:
+                # Figures without coordinates, e.g. lanelets whose offset failed, are empty
+                self.latlons = unproject_utm(self.utm, self.zone_latlon) if self.utm is not None else \
+                    np.zeros((0, 2), dtype=np.float64)
+            else:
+                self.latlons = get_latlons(self.nodes)
+        return self.latlons
+
+    def get_utm(self) -> np.ndarray:
+        # Rows of north, east in the UTM zone of the first node, or of zone_latlon, see from_utm
+        if self.utm is None:
+            self.utm = project_latlons(self.get_latlons())
+        return self.utm
+
+    def get_cumulative_lengths(self) -> np.ndarray:
+        # Distance of every node from the first node along the nodes
+        if self.cumulative_lengths is None:
+            self.cumulative_lengths = get_cumulative_lengths(self.get_utm())
+        return self.cumulative_lengths
+
+    def get_length(self) -> float:
+        cumulative_lengths = self.get_cumulative_lengths()
+        return float(cumulative_lengths[-1]) if len(cumulative_lengths) > 0 else 0.0
 
 
 class FigureWithNodes(ABC):
     """
     FigureWithNodes represents any geospatial figure that has nodes. E.g. segment.
+
+    Coordinates of nodes and original nodes are cached as NumPy arrays, see NodeCoordinates. Caches are reset when
+    nodes or original nodes are reassigned. Figures created from UTM coordinates create their nodes on first access,
+    see set_coordinates.
     """
 
     def __init__(self, nodes: List[Node]):
         self.nodes = nodes
         self.original_nodes = nodes
 
-    def get_length(self) -> float:
-        # Convert lat, lon to UTM coordinates
-        utm_zone_number = latlon_to_zone_number(self.original_nodes[0].position.latlon.lat,
-                                                self.original_nodes[0].position.latlon.lon)
-        nodes = []
-        for node in self.original_nodes:
-            utm = node.position.get_utm_with_forced_zone(utm_zone_number)
-            nodes.append([utm.north, utm.east])
+    @property
+    def nodes(self) -> List[Node]:
+        return self.coordinates.get_nodes()
+
+    @nodes.setter
+    def nodes(self, nodes: List[Node]):
+        self.coordinates: NodeCoordinates = NodeCoordinates(nodes)
+
+    @property
+    def original_nodes(self) -> List[Node]:
+        return self.original_coordinates.get_nodes()
 
-        line = LineString(nodes)
-        return line.length
+    @original_nodes.setter
+    def original_nodes(self, nodes: List[Node]):
+        # Original nodes share the coordinates of nodes until nodes are shortened
+        self.original_coordinates: NodeCoordinates = self.coordinates if nodes is self.coordinates.nodes else \
+            NodeCoordinates(nodes)
+
+    def set_coordinates(self, coordinates: NodeCoordinates):
+        # Replace nodes and original nodes
+        self.coordinates = coordinates
+        self.original_coordinates = coordinates
+
+    def get_length(self) -> float:
+        return self.original_coordinates.get_length()
 
     def get_coordinates_list(self, reverse_lat_lon=False):
         if reverse_lat_lon:
-            return [[node.position.latlon.lon, node.position.latlon.lat] for node in self.nodes]
-        return [[node.position.latlon.lat, node.position.latlon.lon] for node in self.nodes]
+            return self.coordinates.get_latlons()[:, ::-1].tolist()
+        return self.coordinates.get_latlons().tolist()
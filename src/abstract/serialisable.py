@@ -2,6 +2,8 @@ from abc import ABC, abstractmethod
 
 
 class Serialisable(ABC):
+    __slots__ = ()
+
     @abstractmethod
     def to_json(self):
         pass
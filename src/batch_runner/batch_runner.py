@@ -5,16 +5,18 @@ from src.helpers.resources_monitor import measure_resources_usage
 
 
 def batch_run(functions_packs, measure_resources: bool = False) -> Dict:
-    # Run multiple function in batch using the multiprocessing package
+    # Run multiple function in batch using the multiprocessing package. Packs are (function, args) or
+    # (function, args, kwargs), e.g. to pass a progress_queue to optimize_ebg and optimize_x_graph
     manager = Manager()
     return_dict = manager.dict()
 
     processes = []
-    for i, (function, args) in enumerate(functions_packs):
+    for i, (function, args, *kwargs) in enumerate(functions_packs):
+        kwargs = kwargs[0] if len(kwargs) > 0 else {}
         if measure_resources:
-            process = Process(target=measure_resources_usage, args=(function, args, return_dict, i))
+            process = Process(target=measure_resources_usage, args=(function, args, return_dict, i, kwargs))
         else:
-            process = Process(target=function, args=args + (return_dict, i))
+            process = Process(target=function, args=args + (return_dict, i), kwargs=kwargs)
         process.start()
         processes.append(process)
 
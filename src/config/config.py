@@ -1,4 +1,28 @@
 OPTIMISER_INFINITY = 10 ** 6  # Penalty used in Optimizer. Should be significantly larger than other costs in the graph.
+MISSING_CONNECTION_PENALTY = 300  # Penalty for leaving a lanelet with outgoing connections through a non-connection.
+LANELET_CUTS = [(50, 12, 20), (30, 5, 5), (10, 3, 3), (5, 1, 1)]  # How much lanelets longer than a length are cut at
+# their start and end? (length, start cut, end cut) in meters
+PRECOMPUTED_MATRIX_MAX_NODES = 3000  # Larger problems are optimized with a cost callback instead of a full matrix.
+PRUNING_BLOCK_SIZE = 512  # How many cost matrix rows are computed at once for arc pruning and lower bounds?
+PRUNING_FIRST_SOLUTION_SHARE = 0.1  # Which share of the optimisation duration the first solution of pruning may take?
+PRUNING_FIRST_SOLUTION_MAX_DURATION = 5  # How long the first solution of pruning may take at most? (seconds)
+SOLUTION_CACHE_PATH = "cache/solutions"  # Where best orders are stored for warm starts.
+ROUTING_PROBLEM_CACHE_PATH = "cache/routing_problems"  # Where compiled routing problems are stored for fast reloads.
+PORTFOLIO_RESEED_INTERVAL = 10  # How often lagging portfolio workers restart from the best known route? (seconds)
+PORTFOLIO_POLL_INTERVAL = 0.1  # How often the portfolio checks its stopping conditions? (seconds)
+PARTITION_MAX_CELL_SIZE = 100  # How many segments a cell of a partitioned routing problem contains at most?
+PARTITION_WINDOW_SIZE = 20  # How many nodes on each side of a cell boundary are re-optimized?
+PARTITION_CELLS_ORDER_DURATION = 2  # How long the order of cells is optimized? (seconds)
+PARTITION_REFINEMENT_DURATION = 5  # How long cell boundaries are re-optimized in total? (seconds)
+PARTITION_MAX_OVERHEAD_SHARE = 0.5  # Which share of the optimisation duration the cells order and refinement may take?
+STOPPING_CHECK_INTERVAL = 10000  # How many solver limit checks pass between checks of stopping policies?
+LOWER_BOUND_TIGHTENING_SHARE = 0.1  # Which share of the search time may tightening the lower bound take at most?
 OSRM_ADDRESS = "http://10.211.55.3:8000"
+OSRM_TABLE_TILE_SIZE = 500  # How many sources and destinations a tile of a durations table request has at most?
+OSRM_TABLE_WORKERS = 8  # How many tiles of a durations table are requested at once?
+OSRM_TABLE_TIMEOUT = 30  # How long OSRM may compute a tile of a durations table? (seconds)
+OSRM_TABLE_RETRIES = 3  # How often a failed tile of a durations table is requested again?
+OSRM_TABLE_BACKOFF = 0.5  # How long to wait before requesting a failed tile again? Doubled on every retry (seconds)
 OPTIMIZATION_HISTORY_DELTA = 0.5  # How often log optimization results?
+MONITOR_BUFFER_SIZE = 4096  # How many improving solutions are kept in the optimization history?
 MEMORY_HISTORY_DELTA = 1  # How often log memory usage?
@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
 
 from utm import to_latlon, from_latlon, latitude_to_zone_letter, latlon_to_zone_number
 
@@ -11,6 +12,8 @@ class Coordinates(Serialisable, ABC):
     Coordinates is an abstract class for different types of coordinates.
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def check_validity(self):
         pass
@@ -21,6 +24,8 @@ class LatLon(Coordinates):
     LatLon coordinates.
     """
 
+    __slots__ = ("lat", "lon")
+
     def __init__(self, lat: float = None, lon: float = None, utm=None, zone_latlon=None):
         self.lat = None
         self.lon = None
@@ -72,6 +77,8 @@ class UTM(Coordinates):
     See: https://en.wikipedia.org/wiki/Universal_Transverse_Mercator_coordinate_system
     """
 
+    __slots__ = ("north", "east")
+
     def __init__(self, north: float = None, east: float = None, zone_latlon: LatLon = None):
         self.north = None
         self.east = None
@@ -118,11 +125,15 @@ class Position(Serialisable):
     Position has two coordinates representations:
     - lat, lon
     - UTM
+
+    UTM of a position created from lat, lon is computed on first access.
     """
 
+    __slots__ = ("latlon", "_utm")
+
     def __init__(self, latlon: LatLon = None, utm: UTM = None, zone_latlon: LatLon = None):
         self.latlon = None
-        self.utm = None
+        self._utm = None
 
         if latlon is not None and utm is not None:
             raise Exception("Please provide only type of coordinates")
@@ -132,7 +143,6 @@ class Position(Serialisable):
 
         if latlon is not None:
             self.latlon = latlon
-            self.update_utm()
         elif utm is not None and zone_latlon is not None:
             self.utm = utm
             self.update_latlon(zone_latlon=zone_latlon)
@@ -142,6 +152,16 @@ class Position(Serialisable):
     def __str__(self):
         return f"Position ({self.latlon}, {self.utm})"
 
+    @property
+    def utm(self) -> Optional[UTM]:
+        if self._utm is None and self.latlon is not None:
+            self._utm = UTM(zone_latlon=self.latlon)
+        return self._utm
+
+    @utm.setter
+    def utm(self, utm: Optional[UTM]):
+        self._utm = utm
+
     def __repr__(self):
         return self.__str__()
 
@@ -155,38 +175,44 @@ class Position(Serialisable):
     def update_utm(self):
         if self.latlon is None:
             raise Exception("LatLon is not set")
-        if self.utm is None:
-            self.utm = UTM(zone_latlon=self.latlon)
+        if self._utm is None:
+            self._utm = UTM(zone_latlon=self.latlon)
         else:
-            self.utm.update(self.latlon)
+            self._utm.update(self.latlon)
 
     def update_latlon(self, zone_latlon=None):
-        if self.utm is None:
+        if self._utm is None:
             raise Exception("UTM is not set")
         if self.latlon is None:
             if zone_latlon is None:
                 raise Exception("Please provide zone_latlon")
             self.latlon = LatLon(utm=self.utm, zone_latlon=zone_latlon)
         else:
-            self.latlon.update(self.utm)
+            self.latlon.update(self._utm)
 
     def get_utm_with_forced_zone(self, zone_number: int) -> UTM:
         east, north, *_ = from_latlon(self.latlon.lat, self.latlon.lon, force_zone_number=zone_number)
         return UTM(north=north, east=east)
 
 
+EMPTY_ATTRIBUTES: Mapping[str, str] = MappingProxyType({})
+
+
 class Node(Serialisable):
     """
     Node is a point on map. E.g. a part of a segment.
 
-    Each node has a position.
+    Each node has a position. Attributes are read-only: nodes without attributes share one empty MappingProxyType,
+    so attributes are replaced instead of being changed in place.
     """
 
+    __slots__ = ("position", "attributes")
+
     def __init__(self, position: Position, attributes: Dict = None):
         if attributes is None:
-            attributes = {}
-        self.position = position
-        self.attributes = attributes
+            attributes = EMPTY_ATTRIBUTES
+        self.position: Position = position
+        self.attributes: Mapping[str, str] = attributes
 
     def __str__(self):
         return f"Node ({self.position.latlon.lat}, {self.position.latlon.lon})"
@@ -197,7 +223,7 @@ class Node(Serialisable):
     def to_json(self) -> dict:
         return {
             "position": self.position.to_json(),
-            "attributes": self.attributes
+            "attributes": dict(self.attributes)
         }
 
     def __eq__(self, other):
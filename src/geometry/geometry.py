@@ -1,21 +1,44 @@
 from typing import List, Optional
 
-from shapely.geometry import LineString, Point
-from utm import latlon_to_zone_number
+import numpy as np
+import shapely
+from shapely.geometry import LineString
+from utm import latlon_to_zone_number, from_latlon, to_latlon, latitude_to_zone_letter
 
 from src.geo.geo import Node, Position, UTM, LatLon
 
 
-def create_linestring(nodes: List[Node]) -> LineString:
-    utm_zone_number = latlon_to_zone_number(nodes[0].position.latlon.lat, nodes[0].position.latlon.lon)
+def get_latlons(nodes: List[Node]) -> np.ndarray:
+    # Array of lat, lon rows
+    return np.array([[node.position.latlon.lat, node.position.latlon.lon] for node in nodes],
+                    dtype=np.float64).reshape(-1, 2)
+
 
-    utm_nodes = []
-    for node in nodes:
-        utm = node.position.get_utm_with_forced_zone(utm_zone_number)
-        utm_nodes.append([utm.north, utm.east])
-    line_string = LineString(utm_nodes)
+def project_latlons(latlons: np.ndarray, zone_latlon: Optional[LatLon] = None) -> np.ndarray:
+    # Array of north, east rows in the UTM zone of zone_latlon, by default of the first coordinates
+    if len(latlons) == 0:
+        return np.zeros((0, 2), dtype=np.float64)
+
+    if zone_latlon is None:
+        utm_zone_number = latlon_to_zone_number(latlons[0, 0], latlons[0, 1])
+    else:
+        utm_zone_number = latlon_to_zone_number(zone_latlon.lat, zone_latlon.lon)
+    east, north, *_ = from_latlon(latlons[:, 0], latlons[:, 1], force_zone_number=utm_zone_number)
+    return np.column_stack((north, east))
 
-    return line_string
+
+def unproject_utm(utm: np.ndarray, zone_latlon: LatLon) -> np.ndarray:
+    # Array of lat, lon rows of north, east rows in the UTM zone of zone_latlon
+    if len(utm) == 0:
+        return np.zeros((0, 2), dtype=np.float64)
+
+    lat, lon = to_latlon(utm[:, 1], utm[:, 0], latlon_to_zone_number(zone_latlon.lat, zone_latlon.lon),
+                         latitude_to_zone_letter(zone_latlon.lat))
+    return np.column_stack((lat, lon))
+
+
+def create_linestring(nodes: List[Node]) -> LineString:
+    return LineString(project_latlons(get_latlons(nodes)))
 
 
 def create_nodes(line_string: LineString, zone_latlon: LatLon) -> Optional[List[Node]]:
@@ -47,6 +70,57 @@ def offset_nodes(nodes: List[Node], distance=3, side='left', resolution=16, join
     return offsetted_nodes
 
 
+def offset_lines(lines: List[np.ndarray], distances: List[float], resolution=16) -> List[Optional[np.ndarray]]:
+    # Left side offsets of north, east rows like offset_nodes, computed at once. Offsets that aren't a single line are
+    # None like in create_nodes
+    offsets = shapely.offset_curve([LineString(line) for line in lines], distances, quad_segs=resolution,
+                                   join_style="round")
+    return [shapely.get_coordinates(offset) if offset.geom_type == "LineString" else None for offset in offsets]
+
+
+def get_cumulative_lengths(coordinates: np.ndarray) -> np.ndarray:
+    # Distance of every point from the first point along the line
+    cumulative_lengths = np.zeros(len(coordinates), dtype=np.float64)
+    if len(coordinates) > 1:
+        cumulative_lengths[1:] = np.cumsum(np.hypot(*np.diff(coordinates, axis=0).T))
+    return cumulative_lengths
+
+
+def cut_lines(lines: List[np.ndarray],
+              cumulative_lengths: List[np.ndarray],
+              starts: List[float],
+              ends: List[float]) -> List[np.ndarray]:
+    # Parts of lines between distances 0 <= start < end <= length from their starting points. Cuts are found by binary
+    # search in cumulative lengths of lines, points at cuts are interpolated for all lines at once. Distances are
+    # clamped to the lines, so that rounding errors never cut into neighbouring lines
+    sizes = np.array([len(line) for line in lines])
+    offsets = np.cumsum(np.concatenate(([0], sizes[:-1])))
+    line_lengths = np.array([lengths[-1] for lengths in cumulative_lengths])
+    starts = np.clip(np.asarray(starts, dtype=np.float64), 0.0, line_lengths)
+    ends = np.clip(np.asarray(ends, dtype=np.float64), 0.0, line_lengths)
+    # First point after the start and first point at or after the end of every part
+    after_starts = offsets + np.clip([np.searchsorted(lengths, start, side="right")
+                                      for lengths, start in zip(cumulative_lengths, starts)], 1, sizes - 1)
+    after_ends = offsets + np.clip([np.searchsorted(lengths, end, side="left")
+                                    for lengths, end in zip(cumulative_lengths, ends)], 1, sizes - 1)
+
+    coordinates = np.concatenate(lines)
+    lengths = np.concatenate(cumulative_lengths)
+
+    def interpolate(after: np.ndarray, distances: np.ndarray) -> np.ndarray:
+        ratios = (distances - lengths[after - 1]) / (lengths[after] - lengths[after - 1])
+        points = coordinates[after - 1] + ratios[:, None] * (coordinates[after] - coordinates[after - 1])
+        # Cuts at points keep them exactly
+        return np.where((lengths[after] == distances)[:, None], coordinates[after], points)
+
+    start_points = interpolate(after_starts, starts)
+    end_points = interpolate(after_ends, ends)
+
+    return [np.vstack((start_point, coordinates[after_start:after_end], end_point))
+            for start_point, end_point, after_start, after_end in zip(start_points, end_points,
+                                                                      after_starts.tolist(), after_ends.tolist())]
+
+
 def cut_line(line: LineString, distance: float):
     # Cut a line in two at a given distance from its starting point
     if distance <= 0.0:
@@ -55,25 +129,22 @@ def cut_line(line: LineString, distance: float):
     if distance >= line.length:
         return line, None
 
-    coords = list(line.coords)
-    for i, p in enumerate(coords):
-        pd = line.project(Point(p))
-        if pd == distance:
-            return LineString(coords[:i + 1]), LineString(coords[i:])
-        if pd > distance:
-            cp = line.interpolate(distance)
-            return LineString(coords[:i] + [(cp.x, cp.y)]), LineString([(cp.x, cp.y)] + coords[i:])
-
-    return None
+    coordinates = shapely.get_coordinates(line)
+    cumulative_lengths = get_cumulative_lengths(coordinates)
+    first, second = cut_lines([coordinates, coordinates], [cumulative_lengths, cumulative_lengths],
+                              [0.0, distance], [distance, cumulative_lengths[-1]])
+    return LineString(first), LineString(second)
 
 
 def shorten_line(nodes: List[Node], distance: float, cut_beginning: bool) -> List[Node]:
-    line_string = create_linestring(nodes)
+    coordinates = project_latlons(get_latlons(nodes))
+    cumulative_lengths = get_cumulative_lengths(coordinates)
 
     if cut_beginning:
-        new_line = cut_line(line_string, distance)[1]
+        start, end = distance, cumulative_lengths[-1]
     else:
-        new_line = cut_line(line_string, line_string.length - distance)[0]
+        start, end = 0.0, cumulative_lengths[-1] - distance
+    new_line = LineString(cut_lines([coordinates], [cumulative_lengths], [start], [end])[0])
     new_nodes = create_nodes(new_line, nodes[0].position.latlon)
 
     return new_nodes
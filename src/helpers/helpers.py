@@ -1,11 +1,15 @@
-from typing import List, Dict, Optional, Set, Tuple
+from typing import List, Dict, Optional, Set, Tuple, Union
 
 from ortools.constraint_solver.routing_enums_pb2 import FirstSolutionStrategy, LocalSearchMetaheuristic
 
 from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.solution_cache import SolutionCache
+from src.optimizer.stopping import StoppingPolicy
 from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.connections.topology import LaneletTopology
 from src.routing_problem.lanelet import Lanelet
 from src.routing_problem.maneuver.modifier import ManeuverModifier
+from src.routing_problem.maneuver.penalties import ManeuverPenalties
 from src.routing_problem.routing_problem import RoutingProblem
 
 
@@ -18,20 +22,6 @@ def list_difference(list1: List, list2: List) -> List:
     return result
 
 
-def format_matrix(sources: List[int], destinations: List[int], matrix: List[float]) -> Dict[str, Dict[str, int]]:
-    sources = [str(source) for source in sources]
-    destinations = [str(destination) for destination in destinations]
-    formatted_matrix = {}
-    len_sources = len(sources)
-    len_destinations = len(destinations)
-    for i in range(len_sources):
-        formatted_matrix[sources[i]] = {}
-        for j in range(len_destinations):
-            formatted_matrix[sources[i]][destinations[j]] = int(matrix[i * len_sources + j])
-
-    return formatted_matrix
-
-
 def create_straights(order: List[Lanelet], rp: RoutingProblem) -> List[float]:
     straights = []
     previous_lanelet = None
@@ -89,16 +79,31 @@ def optimize_ebg(nodes: List,
                  first_solution_strategy: FirstSolutionStrategy,
                  max_optimisation_duration: int,
                  check_topology: bool,
-                 connections: Optional[Set[Tuple[Lanelet]]],
+                 connections: Optional[Union[Set[Tuple[Lanelet]], LaneletTopology]],
                  return_dict: Dict = None,
-                 proc_number: int = None):
-    EBGOptimizer(nodes=nodes,
-                 matrix=matrix,
-                 local_search_metaheuristic=local_search_metaheuristic,
-                 first_solution_strategy=first_solution_strategy,
-                 max_optimisation_duration=max_optimisation_duration,
-                 check_topology=check_topology,
-                 connections=connections).optimize(return_dict, proc_number)
+                 proc_number: int = None,
+                 precompute_costs: bool = False,
+                 candidate_neighbours: Optional[int] = None,
+                 solution_cache: Optional[SolutionCache] = None,
+                 target_gap: Optional[float] = None,
+                 stopping_policies: Optional[List[StoppingPolicy]] = None,
+                 progress_queue=None,
+                 progress_file: Optional[str] = None):
+    # Results are stored in return_dict if given, otherwise returned. See Optimizer.optimize
+    return EBGOptimizer(nodes=nodes,
+                        matrix=matrix,
+                        local_search_metaheuristic=local_search_metaheuristic,
+                        first_solution_strategy=first_solution_strategy,
+                        max_optimisation_duration=max_optimisation_duration,
+                        check_topology=check_topology,
+                        connections=connections,
+                        precompute_costs=precompute_costs,
+                        candidate_neighbours=candidate_neighbours,
+                        solution_cache=solution_cache,
+                        target_gap=target_gap,
+                        stopping_policies=stopping_policies,
+                        progress_queue=progress_queue,
+                        progress_file=progress_file).optimize(return_dict, proc_number)
 
 
 def optimize_x_graph(nodes: List,
@@ -110,13 +115,29 @@ def optimize_x_graph(nodes: List,
                      straight_non_straight_maneuver_penalty: int,
                      non_straight_straight_maneuver_penalty: int,
                      return_dict: Dict = None,
-                     proc_number: int = None):
-    XGraphOptimizer(nodes=nodes,
-                    matrix=matrix,
-                    disjunctions=disjunctions,
-                    local_search_metaheuristic=local_search_metaheuristic,
-                    first_solution_strategy=first_solution_strategy,
-                    max_optimisation_duration=max_optimisation_duration,
-                    straight_non_straight_maneuver_penalty=straight_non_straight_maneuver_penalty,
-                    non_straight_straight_maneuver_penalty=non_straight_straight_maneuver_penalty).optimize(return_dict,
-                                                                                                            proc_number)
+                     proc_number: int = None,
+                     precompute_costs: bool = False,
+                     candidate_neighbours: Optional[int] = None,
+                     solution_cache: Optional[SolutionCache] = None,
+                     target_gap: Optional[float] = None,
+                     stopping_policies: Optional[List[StoppingPolicy]] = None,
+                     progress_queue=None,
+                     progress_file: Optional[str] = None,
+                     maneuver_penalties: Optional[ManeuverPenalties] = None):
+    # Results are stored in return_dict if given, otherwise returned. See Optimizer.optimize
+    return XGraphOptimizer(nodes=nodes,
+                           matrix=matrix,
+                           disjunctions=disjunctions,
+                           local_search_metaheuristic=local_search_metaheuristic,
+                           first_solution_strategy=first_solution_strategy,
+                           max_optimisation_duration=max_optimisation_duration,
+                           straight_non_straight_maneuver_penalty=straight_non_straight_maneuver_penalty,
+                           non_straight_straight_maneuver_penalty=non_straight_straight_maneuver_penalty,
+                           precompute_costs=precompute_costs,
+                           candidate_neighbours=candidate_neighbours,
+                           solution_cache=solution_cache,
+                           target_gap=target_gap,
+                           stopping_policies=stopping_policies,
+                           progress_queue=progress_queue,
+                           progress_file=progress_file,
+                           maneuver_penalties=maneuver_penalties).optimize(return_dict, proc_number)
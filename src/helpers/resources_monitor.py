@@ -26,7 +26,7 @@ class ResourcesMonitor:
         return memory_usage, user_mode_time, system_mode_time
 
 
-def measure_resources_usage(function, args, return_dict: Dict = None, proc_num: int = None):
+def measure_resources_usage(function, args, return_dict: Dict = None, proc_num: int = None, kwargs: Dict = None):
     # Start a thread that measures system resources
 
     with ThreadPoolExecutor() as executor:
@@ -34,7 +34,7 @@ def measure_resources_usage(function, args, return_dict: Dict = None, proc_num:
         mem_thread = executor.submit(monitor.measure_usage)
         try:
             args = args + (return_dict, proc_num)
-            fn_thread = executor.submit(function, *args)
+            fn_thread = executor.submit(function, *args, **(kwargs or {}))
             _ = fn_thread.result()
         finally:
             monitor.keep_measuring = False
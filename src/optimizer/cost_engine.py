@@ -0,0 +1,288 @@
+from abc import ABC, abstractmethod
+from typing import List, Dict, Optional, Set, Tuple, Callable, Union
+
+import numpy as np
+
+from src.config.config import OPTIMISER_INFINITY, MISSING_CONNECTION_PENALTY
+from src.osrm.duration_matrix import DurationMatrix
+from src.routing_problem.connections.complete import XGraphNode, FirstXGraphNode, LastXGraphNode, HigherOrderXGraphNode
+from src.routing_problem.connections.topology import LaneletTopology
+from src.routing_problem.lanelet import Lanelet, FirstLanelet, LastLanelet
+from src.routing_problem.maneuver.penalties import ManeuverPenalties, get_maneuver_class, NO_MANEUVER
+
+
+def create_segment_matrix(segment_ids: List[str], matrix: Dict[str, Dict[str, int]]) -> np.ndarray:
+    # Convert the string-keyed durations matrix into a dense array ordered by segment_ids
+    if isinstance(matrix, DurationMatrix):
+        return matrix.get_durations(segment_ids, segment_ids).astype(np.int64)
+    return np.array([[matrix[from_id][to_id] for to_id in segment_ids] for from_id in segment_ids], dtype=np.int64)
+
+
+class CostEngine(ABC):
+    """
+    CostEngine computes arc costs between optimizer nodes with array lookups.
+
+    Costs are identical to the ones returned by the nodes' get_cost_to methods. They can be computed for whole blocks
+    of arcs at once with NumPy, so that a full cost matrix can be registered in the solver, or one arc at a time from
+    flat lists, for problems whose cost matrix doesn't fit in memory.
+    """
+
+    def __init__(self, nodes_number: int):
+        self.nodes_number: int = nodes_number
+
+    @abstractmethod
+    def get_costs(self, from_nodes: np.ndarray) -> np.ndarray:
+        # Return a (len(from_nodes), nodes_number) block of arc costs
+        pass
+
+    @abstractmethod
+    def get_cost(self, from_node: int, to_node: int) -> int:
+        pass
+
+    def get_costs_from(self, from_node: int) -> np.ndarray:
+        return self.get_costs(np.array([from_node]))[0]
+
+    def create_matrix(self) -> np.ndarray:
+        return self.get_costs(np.arange(self.nodes_number))
+
+    def create_callback(self, manager) -> Callable[[int, int], int]:
+        # Solver indices are translated to nodes with a list lookup instead of RoutingIndexManager calls
+        index_to_node = [manager.IndexToNode(index) for index in range(manager.GetNumberOfIndices())]
+        get_cost = self.get_cost
+
+        def callback(from_index, to_index) -> int:
+            return get_cost(index_to_node[from_index], index_to_node[to_index])
+
+        return callback
+
+
+class EBGCostEngine(CostEngine):
+    """
+    EBGCostEngine computes arc costs between lanelets. See Lanelet.get_cost_to.
+    """
+
+    def __init__(self,
+                 nodes: List[Lanelet],
+                 matrix: Dict[str, Dict[str, int]],
+                 connections: Optional[Union[Set[Tuple[Lanelet]], LaneletTopology]],
+                 check_topology: bool):
+        super().__init__(len(nodes))
+        self.check_topology: bool = check_topology
+
+        # Segment index of every node, -1 for FirstLanelet and LastLanelet
+        segment_ids = list(dict.fromkeys(node.segment.id for node in nodes if not self.is_special(node)))
+        segment_index = {segment_id: i for i, segment_id in enumerate(segment_ids)}
+        self.segments: np.ndarray = np.array([-1 if self.is_special(node) else segment_index[node.segment.id]
+                                              for node in nodes], dtype=np.int64)
+        self.segment_matrix: np.ndarray = create_segment_matrix(segment_ids, matrix)
+
+        # Segment topology
+        self.next_segments: np.ndarray = np.zeros((len(segment_ids), len(segment_ids)), dtype=bool)
+        for node in nodes:
+            if self.is_special(node):
+                continue
+            for next_segment_id in node.segment.next_segment_ids:
+                if next_segment_id in segment_index:
+                    self.next_segments[segment_index[node.segment.id], segment_index[next_segment_id]] = True
+
+        # Lanelet topology as arrays of connection sources and targets
+        if isinstance(connections, LaneletTopology):
+            # Map lanelet indices of the CSR adjacency to nodes, -1 for lanelets that are not nodes
+            node_of_lanelet = np.full(len(connections.lanelets), -1, dtype=np.int64)
+            for i, node in enumerate(nodes):
+                if not self.is_special(node) and node.index is not None:
+                    node_of_lanelet[node.index] = i
+            sources = node_of_lanelet[connections.get_sources()]
+            targets = node_of_lanelet[connections.targets]
+            selected = (sources >= 0) & (targets >= 0)
+            connections = list(zip(sources[selected].tolist(), targets[selected].tolist()))
+        else:
+            node_index = {id(node): i for i, node in enumerate(nodes)}
+            connections = [(node_index[id(lanelet_from)], node_index[id(lanelet_to)])
+                           for lanelet_from, lanelet_to in (connections or [])
+                           if id(lanelet_from) in node_index and id(lanelet_to) in node_index]
+        self.connection_sources: np.ndarray = np.array([source for source, _ in connections], dtype=np.int64)
+        self.connection_targets: np.ndarray = np.array([target for _, target in connections], dtype=np.int64)
+        self.has_outgoing_connection: np.ndarray = np.array([not self.is_special(node) and
+                                                             node.has_outgoing_connection for node in nodes])
+
+        # Flat copies for single arc lookups
+        self.segments_list: List[int] = self.segments.tolist()
+        self.segment_matrix_list: List[List[int]] = self.segment_matrix.tolist()
+        self.next_segments_list: List[List[bool]] = self.next_segments.tolist()
+        self.connections_set: Set[Tuple[int, int]] = set(connections)
+        self.has_outgoing_connection_list: List[bool] = self.has_outgoing_connection.tolist()
+
+    @staticmethod
+    def is_special(node: Lanelet) -> bool:
+        return isinstance(node, (FirstLanelet, LastLanelet))
+
+    def get_costs(self, from_nodes: np.ndarray) -> np.ndarray:
+        segments_from = self.segments[from_nodes][:, None]
+        segments_to = self.segments[None, :]
+        # Arcs from FirstLanelet and to LastLanelet cost nothing
+        regular = (segments_from >= 0) & (segments_to >= 0)
+        segments_from = np.maximum(segments_from, 0)
+        segments_to = np.maximum(segments_to, 0)
+
+        costs = self.segment_matrix[segments_from, segments_to]
+
+        # For lane topology approach
+        if self.check_topology:
+            rows = np.full(self.nodes_number, -1, dtype=np.int64)
+            rows[from_nodes] = np.arange(len(from_nodes))
+            selected = rows[self.connection_sources] >= 0
+            connected = np.zeros(costs.shape, dtype=bool)
+            connected[rows[self.connection_sources[selected]], self.connection_targets[selected]] = True
+
+            # Connected segments are only passable through lanelet connections, the same segment is never passable
+            is_next = self.next_segments[segments_from, segments_to]
+            costs = np.where(is_next,
+                             np.where(connected, 0, OPTIMISER_INFINITY),
+                             np.where(segments_from == segments_to,
+                                      OPTIMISER_INFINITY,
+                                      costs + self.has_outgoing_connection[from_nodes][:, None] *
+                                      MISSING_CONNECTION_PENALTY))
+
+        return np.where(regular, costs, 0)
+
+    def get_cost(self, from_node: int, to_node: int) -> int:
+        segment_from = self.segments_list[from_node]
+        segment_to = self.segments_list[to_node]
+        if segment_from < 0 or segment_to < 0:
+            return 0
+
+        if self.check_topology:
+            if self.next_segments_list[segment_from][segment_to]:
+                return 0 if (from_node, to_node) in self.connections_set else OPTIMISER_INFINITY
+            if segment_from == segment_to:
+                return OPTIMISER_INFINITY
+            if self.has_outgoing_connection_list[from_node]:
+                return self.segment_matrix_list[segment_from][segment_to] + MISSING_CONNECTION_PENALTY
+
+        return self.segment_matrix_list[segment_from][segment_to]
+
+
+class XGraphCostEngine(CostEngine):
+    """
+    XGraphCostEngine computes arc costs between X-Graph nodes. See XGraphNode.get_cost_to.
+
+    Every node is encoded as integer columns: the segment it starts from, the segment it leads to and the class of its
+    maneuver, see get_maneuver_class. Consecutive nodes sharing a segment cost a penalty looked up in the penalty table
+    by maneuver classes, all other arcs cost the duration between the segments.
+    """
+
+    def __init__(self,
+                 nodes: List[XGraphNode],
+                 matrix: Dict[str, Dict[str, int]],
+                 penalties: ManeuverPenalties):
+        super().__init__(len(nodes))
+
+        # Segment indices of every node, -1 for FirstXGraphNode and LastXGraphNode
+        segment_ids = list(dict.fromkeys(segment_id for node in nodes if not self.is_special(node)
+                                         for segment_id in (node.lanelet_from.segment.id, node.lanelet_to.segment.id)))
+        segment_index = {segment_id: i for i, segment_id in enumerate(segment_ids)}
+        self.from_segments: np.ndarray = np.array([-1 if self.is_special(node) else
+                                                   segment_index[node.lanelet_from.segment.id]
+                                                   for node in nodes], dtype=np.int64)
+        self.to_segments: np.ndarray = np.array([-1 if self.is_special(node) else
+                                                 segment_index[node.lanelet_to.segment.id]
+                                                 for node in nodes], dtype=np.int64)
+        self.classes: np.ndarray = np.array([get_maneuver_class(node.maneuver) for node in nodes], dtype=np.int64)
+        self.segment_matrix: np.ndarray = create_segment_matrix(segment_ids, matrix)
+        self.penalties: np.ndarray = penalties.table
+
+        # Nodes leading into a contracted chain leave it with the last maneuver of the chain and pay the penalties for
+        # passing the chain on every arc, see ChainContraction
+        exit_classes = []
+        entry_penalties = []
+        for node, node_class in zip(nodes, self.classes.tolist()):
+            entry_penalty = 0
+            for maneuver in ([] if self.is_special(node) else node.lanelet_to.segment.chain_maneuvers):
+                maneuver_class = get_maneuver_class(maneuver)
+                entry_penalty += penalties.get_penalty(node_class, maneuver_class)
+                node_class = maneuver_class
+            exit_classes.append(node_class)
+            entry_penalties.append(entry_penalty)
+        self.exit_classes: np.ndarray = np.array(exit_classes, dtype=np.int64)
+        self.entry_penalties: np.ndarray = np.array(entry_penalties, dtype=np.int64)
+
+        # Higher-order nodes, see build_higher_order_x_graph. Previous maneuver class of every node, -1 for other
+        # nodes, and the row of third-order penalties of the maneuvers following it, row 0 for other nodes
+        self.previous_classes: np.ndarray = np.array([node.previous_class if isinstance(node, HigherOrderXGraphNode)
+                                                      else -1 for node in nodes], dtype=np.int64)
+        row_keys = list(dict.fromkeys((node.previous_class, get_maneuver_class(node.maneuver)) for node in nodes
+                                      if isinstance(node, HigherOrderXGraphNode)))
+        row_index = {row_key: i + 1 for i, row_key in enumerate(row_keys)}
+        self.third_order_rows: np.ndarray = np.array([np.zeros(len(self.penalties), dtype=np.int64)] +
+                                                     [penalties.get_third_order_row(*row_key)
+                                                      for row_key in row_keys], dtype=np.int64)
+        self.third_order_row_indices: np.ndarray = np.array([row_index[(node.previous_class,
+                                                                        get_maneuver_class(node.maneuver))]
+                                                             if isinstance(node, HigherOrderXGraphNode) else 0
+                                                             for node in nodes], dtype=np.int64)
+        self.prefixes: np.ndarray = penalties.get_prefixes_table()
+
+        # Flat copies for single arc lookups
+        self.from_segments_list: List[int] = self.from_segments.tolist()
+        self.to_segments_list: List[int] = self.to_segments.tolist()
+        self.classes_list: List[int] = self.classes.tolist()
+        self.exit_classes_list: List[int] = self.exit_classes.tolist()
+        self.entry_penalties_list: List[int] = self.entry_penalties.tolist()
+        self.previous_classes_list: List[int] = self.previous_classes.tolist()
+        self.third_order_rows_list: List[List[int]] = self.third_order_rows.tolist()
+        self.third_order_row_indices_list: List[int] = self.third_order_row_indices.tolist()
+        self.segment_matrix_list: List[List[int]] = self.segment_matrix.tolist()
+        self.penalties_list: List[List[int]] = self.penalties.tolist()
+        self.prefixes_list: List[List[bool]] = self.prefixes.tolist()
+
+    @staticmethod
+    def is_special(node: XGraphNode) -> bool:
+        return isinstance(node, (FirstXGraphNode, LastXGraphNode))
+
+    def get_costs(self, from_nodes: np.ndarray) -> np.ndarray:
+        segments_from = self.to_segments[from_nodes][:, None]
+        segments_to = self.from_segments[None, :]
+        # Arcs from FirstXGraphNode and to LastXGraphNode cost nothing, except for entry penalties
+        regular = (segments_from >= 0) & (segments_to >= 0)
+
+        classes_from = self.exit_classes[from_nodes][:, None]
+        classes_to = self.classes[None, :]
+        joined = (segments_from == segments_to) & (classes_from != NO_MANEUVER)
+        costs = np.where(joined,
+                         self.penalties[classes_from, classes_to] +
+                         self.third_order_rows[self.third_order_row_indices[from_nodes][:, None], classes_to],
+                         self.segment_matrix[np.maximum(segments_from, 0), np.maximum(segments_to, 0)])
+        costs = np.where(regular, costs, 0) + np.where(segments_from >= 0, self.entry_penalties[from_nodes][:, None], 0)
+
+        # Higher-order nodes only follow their previous maneuver, other nodes never follow maneuvers starting a
+        # third-order penalty
+        previous_classes = self.previous_classes[None, :]
+        forbidden = np.where(previous_classes >= 0,
+                             ~joined | (classes_from != previous_classes),
+                             regular & joined & self.prefixes[classes_from, classes_to])
+
+        return np.where(forbidden, OPTIMISER_INFINITY, costs)
+
+    def get_cost(self, from_node: int, to_node: int) -> int:
+        segment_from = self.to_segments_list[from_node]
+        segment_to = self.from_segments_list[to_node]
+        previous_class = self.previous_classes_list[to_node]
+        if segment_from < 0:
+            return OPTIMISER_INFINITY if previous_class >= 0 else 0
+        entry_penalty = self.entry_penalties_list[from_node]
+        if segment_to < 0:
+            return entry_penalty
+
+        class_from = self.exit_classes_list[from_node]
+        class_to = self.classes_list[to_node]
+        if segment_from == segment_to and class_from != NO_MANEUVER:
+            if previous_class >= 0 and previous_class != class_from or \
+                    previous_class < 0 and self.prefixes_list[class_from][class_to]:
+                return OPTIMISER_INFINITY
+            return entry_penalty + self.penalties_list[class_from][class_to] + \
+                self.third_order_rows_list[self.third_order_row_indices_list[from_node]][class_to]
+
+        if previous_class >= 0:
+            return OPTIMISER_INFINITY
+        return entry_penalty + self.segment_matrix_list[segment_from][segment_to]
@@ -0,0 +1,171 @@
+import os
+import time
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
+
+from src.batch_runner.batch_runner import batch_run
+
+
+def run_subproblem(optimizer_class,
+                   arguments: Dict,
+                   initial_route: Optional[List[int]],
+                   return_dict: Dict,
+                   proc_number: int):
+    # Nodes are returned as indices, because node objects are copied when they are sent between processes
+    optimizer = optimizer_class(**arguments)
+    if initial_route is not None:
+        optimizer.initial_route = initial_route
+    try:
+        assignment = optimizer.solve(optimizer.initial_route)
+    finally:
+        optimizer.monitor.close()
+    if assignment is None:
+        raise Exception(f"Routing failed. Routing status {optimizer.routing.status()}")
+    route = optimizer.get_route(assignment)
+
+    if optimizer.solution_cache is not None:
+        optimizer.solution_cache.put(optimizer.identity, optimizer.fingerprint,
+                                     [optimizer.nodes[node].get_key() for node in route], assignment.ObjectiveValue())
+
+    return_dict[proc_number] = {
+        "route": optimizer.get_argument_route(route),
+        "history": optimizer.monitor.optimization_history
+    }
+
+
+def shift_history(history: Dict[str, int], offset: float) -> Dict[str, int]:
+    return {str(round(float(elapsed) + offset, 1)): objective for elapsed, objective in history.items()}
+
+
+def solve_subproblems(optimizer_class,
+                      subproblems_arguments: List[Dict],
+                      duration: float,
+                      initial_routes: Optional[List[Optional[List[int]]]] = None,
+                      start_time: Optional[float] = None) -> List[Dict]:
+    # Solve subproblems in parallel processes, at most one process per CPU at a time. Waves of processes share the
+    # duration, so that all subproblems are solved within it. With start_time, a time.monotonic() reading, histories
+    # are shifted to the time from start_time
+    if initial_routes is None:
+        initial_routes = [None] * len(subproblems_arguments)
+    processes_number = os.cpu_count() or 1
+    waves_number = -(-len(subproblems_arguments) // processes_number)
+    subproblems_arguments = [dict(subproblem_arguments, max_optimisation_duration=duration / waves_number)
+                             for subproblem_arguments in subproblems_arguments]
+
+    results = []
+    for chunk_start in range(0, len(subproblems_arguments), processes_number):
+        chunk = range(chunk_start, min(chunk_start + processes_number, len(subproblems_arguments)))
+        offset = time.monotonic() - start_time if start_time is not None else 0.0
+        if len(subproblems_arguments) == 1:
+            return_dict = {}
+            run_subproblem(optimizer_class, subproblems_arguments[0], initial_routes[0], return_dict, 0)
+        else:
+            return_dict = batch_run([(run_subproblem, (optimizer_class, subproblems_arguments[i], initial_routes[i]))
+                                     for i in chunk])
+        if len(return_dict) < len(chunk):
+            raise Exception("Routing failed. Some subproblems have no solution")
+        results.extend(dict(return_dict[i], history=shift_history(return_dict[i]["history"], offset))
+                       for i in range(len(chunk)))
+
+    return results
+
+
+def solve_groups(optimizer_class,
+                 arguments: Dict,
+                 groups: List[List[int]],
+                 duration: float,
+                 start_time: float) -> Tuple[List[List[int]], List[Dict]]:
+    # Optimize every group of nodes as a separate routing problem within the duration, return routes of node indices
+    # and histories with the time from start_time
+    results = solve_subproblems(optimizer_class,
+                                [optimizer_class.create_subproblem_arguments(arguments, group) for group in groups],
+                                duration,
+                                start_time=start_time)
+
+    # Subproblem nodes are the group nodes between a new start and end
+    routes = [[group[node - 1] for node in result["route"]] for group, result in zip(groups, results)]
+    return routes, [result["history"] for result in results]
+
+
+def order_routes(routes_segments: List[Tuple[str, str]], matrix: Dict[str, Dict[str, int]]) -> List[int]:
+    # Chain routes given by their first and last segment ids with nearest neighbour tours from every route,
+    # return the cheapest chain
+    costs = np.array([[matrix[last_segment_id][first_segment_id] for first_segment_id, _ in routes_segments]
+                      for _, last_segment_id in routes_segments], dtype=np.int64)
+    np.fill_diagonal(costs, np.iinfo(np.int64).max)
+
+    best_cost, best_order = None, None
+    for start in range(len(routes_segments)):
+        candidates = np.ones(len(routes_segments), dtype=bool)
+        candidates[start] = False
+        order, cost = [start], 0
+        while candidates.any():
+            next_route = int(np.argmin(np.where(candidates, costs[order[-1]], np.iinfo(np.int64).max)))
+            cost += costs[order[-1], next_route]
+            order.append(next_route)
+            candidates[next_route] = False
+
+        if best_cost is None or cost < best_cost:
+            best_cost, best_order = cost, order
+
+    return best_order
+
+
+def calculate_route_cost(optimizer_class, arguments: Dict, route: List[int]) -> int:
+    # Cost of a route of node indices in the whole routing problem. Only the costs of the route's arcs are evaluated,
+    # so cost matrices, pruning and lower bounds are left out
+    optimizer = optimizer_class(**dict(arguments,
+                                       precompute_costs=False,
+                                       candidate_neighbours=None,
+                                       solution_cache=None,
+                                       target_gap=None,
+                                       stopping_policies=None,
+                                       progress_queue=None,
+                                       progress_file=None))
+    routing = optimizer.routing
+    indices = [routing.Start(0)] + [optimizer.manager.NodeToIndex(node)
+                                    for node in optimizer.get_model_route(route)] + [routing.End(0)]
+    return sum(optimizer.distance_callback(from_index, to_index) for from_index, to_index in zip(indices, indices[1:]))
+
+
+def merge_histories(histories: List[Dict[str, int]]) -> Dict[str, int]:
+    # Sum of the best objectives of all subproblems, starting when every subproblem has a solution. Arcs between
+    # subproblems aren't included, see complete_history
+    improvements = sorted((float(time), i, objective) for i, history in enumerate(histories)
+                          for time, objective in history.items())
+    latest_objectives: List[Optional[int]] = [None] * len(histories)
+    merged_history = {}
+    for time, i, objective in improvements:
+        latest_objectives[i] = objective
+        if all(latest_objective is not None for latest_objective in latest_objectives):
+            merged_history[str(time)] = sum(latest_objectives)
+
+    return merged_history
+
+
+def complete_history(optimizer_class,
+                     arguments: Dict,
+                     histories: List[Dict[str, int]],
+                     route: List[int],
+                     start_time: float) -> Dict[str, int]:
+    # Merged subproblem histories, which end with the cost of the whole route at the time it is finished
+    history = merge_histories(histories)
+    history[str(round(time.monotonic() - start_time, 1))] = calculate_route_cost(optimizer_class, arguments, route)
+    return history
+
+
+def run_decomposition(optimizer_class, arguments: Dict, groups: List[List[int]]) -> Tuple[List, Dict[str, int]]:
+    # Optimize every group of nodes separately and chain the routes in the cheapest nearest neighbour order
+    start_time = time.monotonic()
+    nodes = arguments["nodes"]
+    routes, histories = solve_groups(optimizer_class, arguments, groups, arguments["max_optimisation_duration"],
+                                     start_time)
+
+    routes_segments = [(optimizer_class.get_node_segments(nodes[route[0]])[0].id,
+                        optimizer_class.get_node_segments(nodes[route[-1]])[1].id) for route in routes]
+    routes_order = order_routes(routes_segments, arguments["matrix"])
+
+    route = [node for i in routes_order for node in routes[i]]
+    return [nodes[0]] + [nodes[node] for node in route] + [nodes[-1]], \
+        complete_history(optimizer_class, arguments, histories, route, start_time)
@@ -1,9 +1,14 @@
-from typing import List, Dict, Tuple, Set, Optional
+from typing import List, Dict, Tuple, Set, Optional, Union
 
 from ortools.constraint_solver import routing_enums_pb2
 
+from src.optimizer.cost_engine import EBGCostEngine
 from src.optimizer.optimizer import Optimizer
+from src.optimizer.solution_cache import SolutionCache, create_fingerprint
+from src.optimizer.stopping import StoppingPolicy
+from src.routing_problem.connections.topology import LaneletTopology
 from src.routing_problem.lanelet import Lanelet
+from src.routing_problem.segment import Segment
 
 
 class EBGOptimizer(Optimizer):
@@ -11,6 +16,9 @@ class EBGOptimizer(Optimizer):
     EBGOptimizer (Edge-Based Graph Optimizer) is used in current AtlaRoute and lane topology approaches.
 
     check_topology parameter can used to switch between approaches.
+
+    With precompute_costs the full lanelet-to-lanelet cost matrix is built once with NumPy and registered in OR-Tools,
+    so that local search never calls back into Python.
     """
 
     def __init__(self,
@@ -18,15 +26,24 @@ class EBGOptimizer(Optimizer):
                  matrix: Dict[str, Dict[str, int]],
                  local_search_metaheuristic: routing_enums_pb2.LocalSearchMetaheuristic,
                  first_solution_strategy: routing_enums_pb2.FirstSolutionStrategy,
-                 max_optimisation_duration: int,
+                 max_optimisation_duration: float,
                  check_topology: bool,
-                 connections: Optional[Set[Tuple[Lanelet]]] = None):
-        super().__init__(nodes, matrix, local_search_metaheuristic, first_solution_strategy, max_optimisation_duration)
-
+                 connections: Optional[Union[Set[Tuple[Lanelet]], LaneletTopology]] = None,
+                 precompute_costs: bool = False,
+                 candidate_neighbours: Optional[int] = None,
+                 solution_cache: Optional[SolutionCache] = None,
+                 target_gap: Optional[float] = None,
+                 stopping_policies: Optional[List[StoppingPolicy]] = None,
+                 progress_queue=None,
+                 progress_file: Optional[str] = None):
         # EBG-specific attributes
-        self.connections: Optional[Set[Tuple[Lanelet]]] = connections
+        self.connections: Optional[Union[Set[Tuple[Lanelet]], LaneletTopology]] = connections
         self.check_topology: bool = check_topology
 
+        super().__init__(nodes, matrix, local_search_metaheuristic, first_solution_strategy, max_optimisation_duration,
+                         precompute_costs, candidate_neighbours, solution_cache, target_gap,
+                         stopping_policies, progress_queue, progress_file)
+
     def distance_callback(self, from_index, to_index) -> int:
         from_element_index = self.manager.IndexToNode(from_index)
         to_element_index = self.manager.IndexToNode(to_index)
@@ -38,3 +55,35 @@ class EBGOptimizer(Optimizer):
                                          self.matrix,
                                          self.connections,
                                          self.check_topology)
+
+    def create_cost_engine(self) -> EBGCostEngine:
+        return EBGCostEngine(self.nodes, self.matrix, self.connections, self.check_topology)
+
+    def create_fingerprint(self) -> Tuple[str, str]:
+        return create_fingerprint("ebg",
+                                  [node for node in self.nodes if node.segment is not None],
+                                  self.matrix,
+                                  self.connections if self.check_topology else None)
+
+    @staticmethod
+    def get_node_segments(node: Lanelet) -> Tuple[Segment, Segment]:
+        return node.segment, node.segment
+
+    def get_topological_successors(self) -> List[List[int]]:
+        node_index = {id(node): i for i, node in enumerate(self.nodes)}
+        successors = [[] for _ in self.nodes]
+
+        # Lane topology approach only allows lanelet connections between consecutive segments
+        if self.check_topology and self.connections is not None:
+            for lanelet_from, lanelet_to in self.connections:
+                if id(lanelet_from) in node_index and id(lanelet_to) in node_index:
+                    successors[node_index[id(lanelet_from)]].append(node_index[id(lanelet_to)])
+            return successors
+
+        for i, node in enumerate(self.nodes):
+            if node.segment is None:
+                continue
+            for next_segment in node.segment.next_segments:
+                successors[i].extend(node_index[id(lanelet)] for lanelet in next_segment.lanelets
+                                     if id(lanelet) in node_index)
+        return successors
@@ -0,0 +1,145 @@
+import heapq
+from typing import List, Optional, Tuple, Set, FrozenSet
+
+import numpy as np
+from ortools.graph.python import linear_sum_assignment
+
+from src.config.config import PRUNING_BLOCK_SIZE
+from src.optimizer.cost_engine import CostEngine
+
+
+def create_packs_costs(cost_engine: CostEngine, packs: np.ndarray) -> np.ndarray:
+    # Cheapest arc between every two packs of nodes, computed in blocks of cost matrix rows
+    packs_number = int(packs.max()) + 1
+    nodes_by_pack = np.argsort(packs, kind="stable")
+    pack_starts = np.searchsorted(packs[nodes_by_pack], np.arange(packs_number))
+
+    packs_costs = np.full((packs_number, packs_number), np.iinfo(np.int64).max, dtype=np.int64)
+    for block_start in range(0, cost_engine.nodes_number, PRUNING_BLOCK_SIZE):
+        from_nodes = np.arange(block_start, min(block_start + PRUNING_BLOCK_SIZE, cost_engine.nodes_number))
+        costs = cost_engine.get_costs(from_nodes).astype(np.int64)
+        costs = np.minimum.reduceat(costs[:, nodes_by_pack], pack_starts, axis=1)
+        np.minimum.at(packs_costs, packs[from_nodes], costs)
+
+    return packs_costs
+
+
+def create_relaxation_costs(cost_engine: CostEngine,
+                            disjunctions: List[List[int]],
+                            start_node: int,
+                            end_node: int) -> Tuple[np.ndarray, int, int]:
+    # Costs of the assignment problem relaxation between packs, the end is connected back to the start. Return the
+    # costs and the packs of the start and the end
+    packs = np.arange(cost_engine.nodes_number)
+    for pack in disjunctions:
+        packs[pack] = pack[0]
+    _, packs = np.unique(packs, return_inverse=True)
+    start_pack, end_pack = int(packs[start_node]), int(packs[end_node])
+
+    packs_costs = create_packs_costs(cost_engine, packs)
+    packs_costs[end_pack, :] = np.iinfo(np.int64).max
+    packs_costs[end_pack, start_pack] = 0
+    np.fill_diagonal(packs_costs, np.iinfo(np.int64).max)
+    if len(packs_costs) > 2:
+        packs_costs[start_pack, end_pack] = np.iinfo(np.int64).max
+
+    return packs_costs, start_pack, end_pack
+
+
+def solve_assignment(costs: np.ndarray) -> Optional[Tuple[int, List[int]]]:
+    # Cheapest assignment of a successor to every pack and the successors, None if there is no assignment
+    from_packs, to_packs = np.nonzero(costs < np.iinfo(np.int64).max)
+    assignment = linear_sum_assignment.SimpleLinearSumAssignment()
+    assignment.add_arcs_with_cost(from_packs, to_packs, costs[from_packs, to_packs])
+    if assignment.solve() != assignment.OPTIMAL:
+        return None
+
+    return assignment.optimal_cost(), [assignment.right_mate(pack) for pack in range(len(costs))]
+
+
+def find_shortest_subtour(successors: List[int], end_pack: int) -> Optional[List[Tuple[int, int]]]:
+    # Arcs of the shortest cycle of an assignment apart from the cycle through the end, None if there is none
+    shortest_subtour = None
+    visited = [False] * len(successors)
+    for first_pack in range(len(successors)):
+        subtour = []
+        pack = first_pack
+        while not visited[pack]:
+            visited[pack] = True
+            subtour.append((pack, successors[pack]))
+            pack = successors[pack]
+        if len(subtour) > 0 and end_pack not in (from_pack for from_pack, _ in subtour) and \
+                (shortest_subtour is None or len(subtour) < len(shortest_subtour)):
+            shortest_subtour = subtour
+
+    return shortest_subtour
+
+
+def calculate_lower_bound(cost_engine: CostEngine,
+                          disjunctions: List[List[int]],
+                          start_node: int,
+                          end_node: int) -> int:
+    """
+    Calculate a lower bound of the route objective with the assignment problem relaxation.
+
+    Every pack of alternative nodes, or a single node outside of disjunctions, is contracted to one node with the
+    cheapest arcs of its members. Then every contracted node is assigned a successor, so that the sum of arc costs is
+    minimal. A route is an assignment as well once the end is connected back to the start, so no route is cheaper.
+    """
+    return LowerBound(cost_engine, disjunctions, start_node, end_node).value
+
+
+class LowerBound:
+    """
+    LowerBound is the assignment problem relaxation of the route objective, see calculate_lower_bound, which is
+    tightened during the search.
+
+    Assignments may contain subtours, cycles of packs apart from the cycle through the end. Every route leaves out at
+    least one arc of every subtour, so branches of an assignment that each forbid one arc of its shortest subtour
+    together contain every route. tighten replaces the cheapest branch by its branches. The bound is the objective of
+    the cheapest branch, so it never decreases. A cheapest branch without subtours is the cheapest route of packs and
+    can't be tightened anymore.
+    """
+
+    def __init__(self, cost_engine: CostEngine, disjunctions: List[List[int]], start_node: int, end_node: int):
+        self.costs, _, self.end_pack = create_relaxation_costs(cost_engine, disjunctions, start_node, end_node)
+
+        # Heap of branches as (objective, branch number, forbidden arcs, shortest subtour)
+        self.branches: List[Tuple[int, int, Tuple[Tuple[int, int], ...], Optional[List[Tuple[int, int]]]]] = []
+        self.branches_number: int = 0
+        self.explored_branches: Set[FrozenSet[Tuple[int, int]]] = set()
+        self.add_branch(())
+        if len(self.branches) == 0:
+            raise Exception("Lower bound calculation failed. Assignment problem has no solution")
+
+    @property
+    def value(self) -> int:
+        return self.branches[0][0]
+
+    def add_branch(self, forbidden_arcs: Tuple[Tuple[int, int], ...]):
+        # Branches are explored once, branches without an assignment contain no route
+        if frozenset(forbidden_arcs) in self.explored_branches:
+            return
+        self.explored_branches.add(frozenset(forbidden_arcs))
+
+        costs = self.costs
+        if len(forbidden_arcs) > 0:
+            costs = costs.copy()
+            costs[tuple(zip(*forbidden_arcs))] = np.iinfo(np.int64).max
+        solution = solve_assignment(costs)
+        if solution is not None:
+            objective, successors = solution
+            heapq.heappush(self.branches, (objective, self.branches_number, forbidden_arcs,
+                                           find_shortest_subtour(successors, self.end_pack)))
+            self.branches_number += 1
+
+    def tighten(self) -> bool:
+        # Branch the cheapest branch, return False once the bound can't be tightened anymore
+        _, _, forbidden_arcs, subtour = self.branches[0]
+        if subtour is None:
+            return False
+
+        heapq.heappop(self.branches)
+        for arc in subtour:
+            self.add_branch(forbidden_arcs + (arc,))
+        return True
@@ -1,26 +1,211 @@
-from datetime import datetime
-from typing import Dict, Optional
+import time
+from contextlib import ExitStack
+from typing import Dict, Optional, List, Tuple
 
-from src.config.config import OPTIMIZATION_HISTORY_DELTA
+import numpy as np
+
+from src.config.config import OPTIMIZATION_HISTORY_DELTA, STOPPING_CHECK_INTERVAL, MONITOR_BUFFER_SIZE, \
+    LOWER_BOUND_TIGHTENING_SHARE
+from src.optimizer.lower_bound import LowerBound
+from src.optimizer.stopping import StoppingPolicy
+
+
+def get_last_value(records: List[Tuple[float, int]], elapsed: float) -> int:
+    # Value of the last record at or before elapsed, the first value for earlier times
+    values = [value for record_elapsed, value in records if record_elapsed <= elapsed]
+    return values[-1] if len(values) > 0 else records[0][1]
 
 
 class RoutingMonitor:
-    def __init__(self, model):
+    """
+    RoutingMonitor is called by the solver on every solution.
+
+    Improving solutions are recorded as (elapsed, objective, solution_count) in a preallocated ring buffer of
+    MONITOR_BUFFER_SIZE records, the first record is always kept. Time is measured in seconds from the creation of
+    the monitor with a monotonic clock. The optimization history reads the best objective on solutions at most every
+    OPTIMIZATION_HISTORY_DELTA seconds, like before the ring buffer, and ends with the best objective at the time of
+    the last solution.
+
+    With progress_queue, e.g. multiprocessing.Manager().Queue(), or progress_file, records are also streamed while the
+    search is running, so that the progress of batch_run workers can be followed live. The progress file is opened
+    with line buffering on the first record, so that it is only open during the search, and closed by close.
+
+    With a lower bound the search stops at the target optimality gap. The lower bound is tightened by check_limit
+    while tightening takes at most LOWER_BOUND_TIGHTENING_SHARE of the time, see LowerBound.tighten.
+    """
+
+    def __init__(self, model, manager=None, progress_queue=None, progress_file: Optional[str] = None):
         self.model = model
+        self.manager = manager
         self.best_objective: float = float("inf")
-        self.start_time: datetime = datetime.now()
-        self.last_reading_time: Optional[datetime] = None
-        self.optimization_history: Dict[str, int] = {}
+        self.start_time: float = time.monotonic()
+        self.last_solution_time: float = 0.0
+        self.solution_count: int = 0
+
+        # Ring buffer of improving solutions
+        self.elapsed_buffer: np.ndarray = np.zeros(MONITOR_BUFFER_SIZE, dtype=np.float64)
+        self.objective_buffer: np.ndarray = np.zeros(MONITOR_BUFFER_SIZE, dtype=np.int64)
+        self.solution_count_buffer: np.ndarray = np.zeros(MONITOR_BUFFER_SIZE, dtype=np.int64)
+        self.records_number: int = 0
+        self.first_record: Optional[Tuple[float, int, int]] = None
+
+        # Readings of the best objective for the optimization history
+        self.readings: List[Tuple[float, int]] = []
+        self.last_reading_time: Optional[float] = None
+
+        # Live progress
+        self.progress_queue = progress_queue
+        self.progress_file: Optional[str] = progress_file
+        self.progress_stack: ExitStack = ExitStack()
+        self.progress_writer = None
+
+        # Lower bound of the objective, the search stops when the optimality gap reaches target_gap
+        self.lower_bound: Optional[LowerBound] = None
+        self.lower_bound_history: List[Tuple[float, int]] = []
+        self.tightening_duration: float = 0.0
+        self.target_gap: Optional[float] = None
+
+        # Best route shared with other processes, see portfolio.SharedIncumbent
+        self.incumbent = None
+
+        # Stopping policies and the stop event of the incumbent, checked on every solution and regularly by the
+        # solver, see check_limit
+        self.stopping_policies: List[StoppingPolicy] = []
+        self.limit_checks: int = 0
+        self.stop: bool = False
 
     def __call__(self):
+        self.solution_count += 1
+        self.last_solution_time = time.monotonic() - self.start_time
+
         # Update best result
         current_objective = self.model.CostVar().Max()
         if current_objective < self.best_objective:
             self.best_objective = current_objective
+            self.record(self.last_solution_time, current_objective)
+            if self.incumbent is not None:
+                self.incumbent.publish(current_objective, self.get_current_route())
+
+            for policy in self.stopping_policies:
+                policy.update(self.last_solution_time, current_objective)
+            if any(policy.should_stop(self.last_solution_time) for policy in self.stopping_policies):
+                self.model.solver().FinishCurrentSearch()
+
+            # Stop when the best result is close enough to the lower bound
+            if self.lower_bound is not None and \
+                    self.get_gap(current_objective, self.lower_bound.value) <= self.target_gap:
+                self.model.solver().FinishCurrentSearch()
+
+        # Stop when another process asks for it
+        if self.incumbent is not None and self.incumbent.stop_event.is_set():
+            self.model.solver().FinishCurrentSearch()
 
         # Save current best result to optimization history
         if self.last_reading_time is None or \
-                (datetime.now() - self.last_reading_time).total_seconds() > OPTIMIZATION_HISTORY_DELTA:
-            self.last_reading_time = datetime.now()
-            time_from_start = (datetime.now() - self.start_time).total_seconds()
-            self.optimization_history[str(round(time_from_start, 1))] = self.best_objective
+                self.last_solution_time - self.last_reading_time > OPTIMIZATION_HISTORY_DELTA:
+            self.last_reading_time = self.last_solution_time
+            self.readings.append((self.last_solution_time, self.best_objective))
+
+    def record(self, elapsed: float, objective: int):
+        position = self.records_number % MONITOR_BUFFER_SIZE
+        self.elapsed_buffer[position] = elapsed
+        self.objective_buffer[position] = objective
+        self.solution_count_buffer[position] = self.solution_count
+        self.records_number += 1
+        if self.first_record is None:
+            self.first_record = (elapsed, objective, self.solution_count)
+
+        if self.progress_queue is not None:
+            self.progress_queue.put((elapsed, objective, self.solution_count))
+        if self.progress_file is not None:
+            if self.progress_writer is None:
+                self.progress_writer = self.progress_stack.enter_context(open(self.progress_file, "a", buffering=1))
+            self.progress_writer.write(f"{elapsed},{objective},{self.solution_count}\n")
+
+    def close(self):
+        self.progress_stack.close()
+        self.progress_writer = None
+
+    def get_records(self) -> List[Tuple[float, int, int]]:
+        # Recorded improving solutions in chronological order
+        if self.records_number <= MONITOR_BUFFER_SIZE:
+            positions = np.arange(self.records_number)
+        else:
+            positions = np.roll(np.arange(MONITOR_BUFFER_SIZE), -(self.records_number % MONITOR_BUFFER_SIZE))
+        records = list(zip(self.elapsed_buffer[positions].tolist(),
+                           self.objective_buffer[positions].tolist(),
+                           self.solution_count_buffer[positions].tolist()))
+
+        if self.records_number > MONITOR_BUFFER_SIZE:
+            records.insert(0, self.first_record)
+        return records
+
+    @property
+    def optimization_history(self) -> Dict[str, int]:
+        # Best objective at most every OPTIMIZATION_HISTORY_DELTA seconds, from the first to the last solution
+        if len(self.readings) == 0:
+            return {}
+
+        optimization_history = {str(round(elapsed, 1)): objective for elapsed, objective in self.readings}
+        optimization_history[str(round(self.last_solution_time, 1))] = self.best_objective
+        return optimization_history
+
+    @property
+    def gap_history(self) -> Dict[str, float]:
+        # Optimality gap at the times of the optimization history and of tightened lower bounds after the first solution
+        history = [(float(elapsed), objective) for elapsed, objective in self.optimization_history.items()]
+        if self.lower_bound is None or len(history) == 0:
+            return {}
+
+        times = sorted({elapsed for elapsed, _ in history} |
+                       {elapsed for elapsed, _ in self.lower_bound_history if elapsed >= history[0][0]})
+        return {str(elapsed): self.get_gap(get_last_value(history, elapsed),
+                                           get_last_value(self.lower_bound_history, elapsed)) for elapsed in times}
+
+    def set_lower_bound(self, lower_bound: LowerBound, target_gap: float):
+        self.lower_bound = lower_bound
+        self.target_gap = target_gap
+        self.lower_bound_history.append((round(time.monotonic() - self.start_time, 1), lower_bound.value))
+
+    def tighten_lower_bound(self):
+        # Tighten the lower bound within its share of the time and stop when the best result is close enough to it
+        time_from_start = time.monotonic() - self.start_time
+        if self.tightening_duration > time_from_start * LOWER_BOUND_TIGHTENING_SHARE:
+            return
+
+        value = self.lower_bound.value
+        if self.lower_bound.tighten() and self.lower_bound.value > value:
+            self.lower_bound_history.append((round(time.monotonic() - self.start_time, 1), self.lower_bound.value))
+        self.tightening_duration += time.monotonic() - self.start_time - time_from_start
+        if self.best_objective < float("inf") and \
+                self.get_gap(self.best_objective, self.lower_bound.value) <= self.target_gap:
+            self.stop = True
+
+    def check_limit(self) -> bool:
+        # Solver limit callback. It is called very often, so policies, the stop event of the incumbent and the lower
+        # bound are only checked every STOPPING_CHECK_INTERVAL calls
+        self.limit_checks += 1
+        if not self.stop and self.limit_checks % STOPPING_CHECK_INTERVAL == 0:
+            time_from_start = time.monotonic() - self.start_time
+            self.stop = any(policy.should_stop(time_from_start) for policy in self.stopping_policies) or \
+                self.incumbent is not None and self.incumbent.stop_event.is_set()
+            if not self.stop and self.lower_bound is not None:
+                self.tighten_lower_bound()
+        return self.stop
+
+    @staticmethod
+    def get_gap(objective: float, lower_bound: int) -> float:
+        # Optimality gap of an objective relative to the objective
+        if objective <= 0:
+            return 0.0
+        return max(0.0, (objective - lower_bound) / objective)
+
+    def get_current_route(self) -> List[int]:
+        # Nodes of the current solution without the start and the end
+        route = []
+        index = self.model.NextVar(self.model.Start(0)).Value()
+        while not self.model.IsEnd(index):
+            route.append(self.manager.IndexToNode(index))
+            index = self.model.NextVar(index).Value()
+
+        return route
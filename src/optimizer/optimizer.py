@@ -1,15 +1,68 @@
+import time
 from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2, pywrapcp
 
+from src.config.config import OPTIMISER_INFINITY, PRECOMPUTED_MATRIX_MAX_NODES, PORTFOLIO_RESEED_INTERVAL, \
+    PARTITION_MAX_CELL_SIZE, PARTITION_WINDOW_SIZE, PARTITION_CELLS_ORDER_DURATION, PARTITION_REFINEMENT_DURATION
+from src.optimizer.cost_engine import CostEngine
+from src.optimizer.decomposition import run_decomposition
+from src.optimizer.lower_bound import LowerBound
 from src.optimizer.monitor import RoutingMonitor
+from src.optimizer.partitioning import run_partitioning
+from src.optimizer.portfolio import run_portfolio
+from src.optimizer.pruning import prune_arcs
+from src.optimizer.solution_cache import SolutionCache, create_cached_route
+from src.optimizer.stopping import StoppingPolicy
+from src.routing_problem.segment import Segment
 
 
 class Optimizer(ABC):
     """
     Optimizer solves Vehicle Routing Problem.
 
+    With precompute_costs arc costs are computed by a CostEngine instead of the nodes' get_cost_to methods. The full
+    cost matrix is registered in OR-Tools if the problem has at most PRECOMPUTED_MATRIX_MAX_NODES nodes, otherwise
+    the solver calls back into the cost engine's arrays.
+
+    With candidate_neighbours the arcs of the routing model are pruned. Each node keeps only its topological
+    successors and its candidate_neighbours cheapest successors and predecessors, all other arcs are removed from the
+    NextVar domains. Constructive first solution strategies rarely succeed on such a sparse graph, so the first
+    solution strategy is run on a model without pruned arcs before, see pruning.create_first_solution_route. The arcs
+    of its route are kept and the search starts from this route. Pruning trades solution quality for search speed,
+    small candidate_neighbours, e.g. 5 or 10, give worse routes within the same time.
+
+    With solution_cache the search starts from the best order found for a routing problem with the same segments in a
+    previous run. If the routing problem changed since, nodes that no longer exist are dropped from the cached order
+    and new nodes are inserted greedily.
+
+    With target_gap a lower bound of the objective is calculated before the search and tightened during the search,
+    see lower_bound.LowerBound. The optimality gap of the best result is saved to the gap history and the search stops
+    as soon as the gap is at most target_gap, e.g. 0.05 for 5%. After optimize, lower_bound is the tightest lower
+    bound and gap_history the gap history.
+
+    With stopping_policies the search stops as soon as any policy asks for it, e.g. when the objective stalls. See
+    stopping.StoppingPolicy.
+
+    With progress_queue or progress_file improving solutions are streamed while the search is running, see
+    RoutingMonitor.
+
+    optimize_portfolio runs several local search metaheuristic and first solution strategy pairs in parallel processes
+    that share the best route found so far. See portfolio.run_portfolio.
+
+    optimize_components optimizes every connected component of the road network in a separate process and chains the
+    component routes in the cheapest nearest neighbour order. See decomposition.run_decomposition.
+
+    optimize_partitioned splits the road network into geographical cells of at most max_cell_size segments, optimizes
+    the order of cells and every cell in parallel processes and finally re-optimizes windows of window_size nodes on
+    both sides of every cell boundary. See partitioning.run_partitioning.
+
+    Both decompositions keep to max_optimisation_duration: subproblems run in waves of one process per CPU, which share
+    the duration. Cells of optimize_partitioned get the duration left by cells_order_duration and refinement_duration,
+    which are scaled down to PARTITION_MAX_OVERHEAD_SHARE of short durations.
+
     See: https://developers.google.com/optimization/routing/vrp
     """
 
@@ -18,49 +71,242 @@ class Optimizer(ABC):
                  matrix: Dict[str, Dict[str, int]],
                  local_search_metaheuristic: routing_enums_pb2.LocalSearchMetaheuristic,
                  first_solution_strategy: routing_enums_pb2.FirstSolutionStrategy,
-                 max_optimisation_duration: int):
+                 max_optimisation_duration: float,
+                 precompute_costs: bool = False,
+                 candidate_neighbours: Optional[int] = None,
+                 solution_cache: Optional[SolutionCache] = None,
+                 target_gap: Optional[float] = None,
+                 stopping_policies: Optional[List[StoppingPolicy]] = None,
+                 progress_queue=None,
+                 progress_file: Optional[str] = None):
         # Shared attributes
         self.nodes: List = nodes
         self.matrix: Dict[str, Dict[str, int]] = matrix
         self.local_search_metaheuristic: routing_enums_pb2.LocalSearchMetaheuristic = local_search_metaheuristic
         self.first_solution_strategy: routing_enums_pb2.FirstSolutionStrategy = first_solution_strategy
-        self.max_optimisation_duration: int = max_optimisation_duration
+        self.max_optimisation_duration: float = max_optimisation_duration
+        self.precompute_costs: bool = precompute_costs
+        self.candidate_neighbours: Optional[int] = candidate_neighbours
+        self.solution_cache: Optional[SolutionCache] = solution_cache
+        self.target_gap: Optional[float] = target_gap
+        self.lower_bound: Optional[int] = None
+        self.gap_history: Dict[str, float] = {}
+        self.stopping_policies: List[StoppingPolicy] = stopping_policies or []
+        self.identity: Optional[str] = None
+        self.fingerprint: Optional[str] = None
+        self.cost_engine: Optional[CostEngine] = None
+        self.cost_matrix: Optional[np.ndarray] = None
+        self.removed_arcs_number: int = 0
+        self.pruning_duration: float = 0
+        self.initial_route: Optional[List[int]] = None
+        self.stopping_limit = None
 
         # Create routing model
         self.manager = pywrapcp.RoutingIndexManager(len(self.nodes), 1, [0], [len(self.nodes) - 1])
         self.routing = pywrapcp.RoutingModel(self.manager)
-        self.monitor = RoutingMonitor(self.routing)
+        self.monitor = RoutingMonitor(self.routing, self.manager, progress_queue, progress_file)
         self.routing.AddAtSolutionCallback(self.monitor)
 
-        # Register transit callback
-        transit_callback_index = self.routing.RegisterTransitCallback(self.distance_callback)
+        # Register transit evaluator
+        transit_callback_index = self.register_transit_evaluator(self.routing, self.manager)
         self.routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
+        # Exactly one node of every pack is visited
+        for pack in self.get_disjunctions():
+            self.routing.AddDisjunction([self.manager.NodeToIndex(i) for i in pack], OPTIMISER_INFINITY, 1)
+
+        # Warm start from the best order found for the same routing problem
+        if solution_cache is not None:
+            self.identity, self.fingerprint = self.create_fingerprint()
+            cached_entry = solution_cache.get(self.identity)
+            if cached_entry is not None:
+                self.initial_route = create_cached_route(self, cached_entry)
+
+        # Remove arcs between distant nodes. Pruning takes its time from the optimisation duration
+        if candidate_neighbours is not None:
+            pruning_start_time = time.monotonic()
+            self.removed_arcs_number = prune_arcs(self, candidate_neighbours)
+            self.pruning_duration = time.monotonic() - pruning_start_time
+        # The matrix is only kept for the first solution model of pruning
+        self.cost_matrix = None
+
+        # Stop at the target optimality gap
+        if target_gap is not None:
+            lower_bound = LowerBound(self.get_cost_engine(),
+                                     self.get_disjunctions(),
+                                     self.manager.IndexToNode(self.routing.Start(0)),
+                                     len(self.nodes) - 1)
+            self.lower_bound = lower_bound.value
+            self.monitor.set_lower_bound(lower_bound, target_gap)
+
         # Set routing parameters
         self.search_parameters = pywrapcp.DefaultRoutingSearchParameters()
         self.search_parameters.first_solution_strategy = first_solution_strategy
         self.search_parameters.local_search_metaheuristic = local_search_metaheuristic
-        self.search_parameters.time_limit.seconds = max_optimisation_duration
+        # Subproblems of decompositions get fractions of seconds, the search gets what pruning left of the duration
+        time_limits = [policy.get_time_limit(len(self.nodes)) for policy in self.stopping_policies]
+        time_limit = min([max_optimisation_duration] + [limit for limit in time_limits if limit is not None])
+        self.search_parameters.time_limit.FromMilliseconds(max(int((time_limit - self.pruning_duration) * 1000), 1))
+
+        # Stopping policies, the lower bound is tightened by the same solver limit
+        self.monitor.stopping_policies = self.stopping_policies
+        if len(self.stopping_policies) > 0 or target_gap is not None:
+            self.add_stopping_limit()
+
+    def add_stopping_limit(self):
+        # Solver limit that regularly checks the stopping conditions of the monitor, see RoutingMonitor.check_limit
+        if self.stopping_limit is None:
+            self.stopping_limit = self.routing.solver().CustomLimit(self.monitor.check_limit)
+            self.routing.AddSearchMonitor(self.stopping_limit)
+
+    def set_incumbent(self, incumbent):
+        # Share the best route with other processes and stop when they ask for it, see portfolio.SharedIncumbent
+        self.monitor.incumbent = incumbent
+        self.add_stopping_limit()
 
     @abstractmethod
     def distance_callback(self, from_index, to_index) -> int:
         pass
 
+    @abstractmethod
+    def create_cost_engine(self) -> CostEngine:
+        pass
+
+    @abstractmethod
+    def create_fingerprint(self) -> Tuple[str, str]:
+        # Return the identity and the fingerprint of the routing problem, see solution_cache.create_fingerprint
+        pass
+
+    def get_cost_engine(self) -> CostEngine:
+        if self.cost_engine is None:
+            self.cost_engine = self.create_cost_engine()
+        return self.cost_engine
+
+    def register_transit_evaluator(self, routing, manager) -> int:
+        if not self.precompute_costs:
+            return routing.RegisterTransitCallback(self.distance_callback)
+
+        if self.get_cost_engine().nodes_number <= PRECOMPUTED_MATRIX_MAX_NODES:
+            # The matrix is built once for the model and the first solution model of pruning
+            if self.cost_matrix is None:
+                self.cost_matrix = self.cost_engine.create_matrix()
+            return routing.RegisterTransitMatrix(self.cost_matrix.tolist())
+        return routing.RegisterTransitCallback(self.cost_engine.create_callback(manager))
+
+    @abstractmethod
+    def get_topological_successors(self) -> List[List[int]]:
+        # Return nodes that directly follow each node in the road network
+        pass
+
+    @staticmethod
+    @abstractmethod
+    def get_node_segments(node) -> Tuple[Segment, Segment]:
+        # Return the segments where a node is entered and left
+        pass
+
+    @classmethod
+    def create_subproblem_arguments(cls, arguments: Dict, nodes: List[int], start: int = 0, end: int = -1) -> Dict:
+        # Return optimizer arguments for a routing problem with the given nodes only. The route starts at the start
+        # node and ends at the end node
+        all_nodes = arguments["nodes"]
+        return dict(arguments, nodes=[all_nodes[start]] + [all_nodes[node] for node in nodes] + [all_nodes[end]])
+
+    def get_disjunctions(self) -> List[List[int]]:
+        # Return packs of alternative nodes, only one node of each pack is visited
+        return []
+
+    @classmethod
+    def optimize_portfolio(cls,
+                           strategies: List[Tuple[routing_enums_pb2.LocalSearchMetaheuristic,
+                                                  routing_enums_pb2.FirstSolutionStrategy]],
+                           target_objective: Optional[int] = None,
+                           stall_duration: Optional[float] = None,
+                           reseed_interval: float = PORTFOLIO_RESEED_INTERVAL,
+                           **arguments) -> Tuple[List, Dict[str, int]]:
+        # Optimize with every local search metaheuristic and first solution strategy pair in a separate process
+        return run_portfolio(cls, arguments, strategies, target_objective, stall_duration, reseed_interval)
+
+    @classmethod
+    def optimize_components(cls, **arguments) -> Tuple[List, Dict[str, int]]:
+        # Optimize every connected component of the road network in a separate process
+        nodes = arguments["nodes"]
+        components: Dict[str, List[int]] = {}
+        for i in range(1, len(nodes) - 1):
+            components.setdefault(cls.get_node_segments(nodes[i])[1].connected_component, []).append(i)
+
+        return run_decomposition(cls, arguments, list(components.values()))
+
+    @classmethod
+    def optimize_partitioned(cls,
+                             max_cell_size: int = PARTITION_MAX_CELL_SIZE,
+                             window_size: int = PARTITION_WINDOW_SIZE,
+                             cells_order_duration: float = PARTITION_CELLS_ORDER_DURATION,
+                             refinement_duration: float = PARTITION_REFINEMENT_DURATION,
+                             **arguments) -> Tuple[List, Dict[str, int]]:
+        # Optimize geographical cells of the road network in separate processes
+        return run_partitioning(cls, arguments, max_cell_size, window_size, cells_order_duration, refinement_duration)
+
+    def solve(self, initial_route: Optional[List[int]] = None):
+        initial_assignment = None
+        if initial_route is not None:
+            # The model is closed by the first solve, status 0 means not solved yet
+            if self.routing.status() == 0:
+                self.routing.CloseModelWithParameters(self.search_parameters)
+            initial_assignment = self.routing.ReadAssignmentFromRoutes(
+                [[self.manager.NodeToIndex(node) for node in initial_route]], True)
+
+        if initial_assignment is not None:
+            return self.routing.SolveFromAssignmentWithParameters(initial_assignment, self.search_parameters)
+        return self.routing.SolveWithParameters(self.search_parameters)
+
     def optimize(self, return_dict: Dict = None, proc_number: int = None) -> Tuple[List, Dict[str, int]]:
-        assignment = self.routing.SolveWithParameters(self.search_parameters)
-        if self.routing.status() != 1:
+        try:
+            assignment = self.solve(self.initial_route)
+        finally:
+            self.monitor.close()
+        if assignment is None:
             raise Exception(f"Routing failed. Routing status {self.routing.status()}")
         optimal_order = self.format_solution(assignment)
         optimisation_history = self.monitor.optimization_history
+        if self.monitor.lower_bound is not None:
+            self.lower_bound = self.monitor.lower_bound.value
+            self.gap_history = self.monitor.gap_history
+
+        if self.solution_cache is not None:
+            self.solution_cache.put(self.identity, self.fingerprint, [node.get_key() for node in optimal_order[1:-1]],
+                                    assignment.ObjectiveValue())
 
         if return_dict is not None:
-            return_dict[proc_number] = {
+            result = {
                 "order": optimal_order,
                 "history": optimisation_history
             }
+            # Entries of a Manager dict are copies, so they are completed before they are stored
+            if self.lower_bound is not None:
+                result["lower_bound"] = self.lower_bound
+                result["gap_history"] = self.gap_history
+            return_dict[proc_number] = result
         else:
             return optimal_order, optimisation_history
 
+    def get_route(self, assignment) -> List[int]:
+        # Nodes of a solution without the start and the end
+        route = []
+        index = assignment.Value(self.routing.NextVar(self.routing.Start(0)))
+        while not self.routing.IsEnd(index):
+            route.append(self.manager.IndexToNode(index))
+            index = assignment.Value(self.routing.NextVar(index))
+
+        return route
+
+    def get_argument_route(self, route: List[int]) -> List[int]:
+        # Route of indices of the nodes argument, see create_subproblem_arguments
+        return route
+
+    def get_model_route(self, argument_route: List[int]) -> List[int]:
+        # Route of nodes of the routing model, the inverse of get_argument_route
+        return argument_route
+
     def format_solution(self, assignment) -> List:
         index = self.routing.Start(0)
         optimal_order = []
@@ -0,0 +1,158 @@
+import time
+from typing import List, Dict, Tuple
+
+import numpy as np
+from ortools.constraint_solver import routing_enums_pb2, pywrapcp
+
+from src.config.config import PARTITION_MAX_OVERHEAD_SHARE
+from src.optimizer.decomposition import solve_groups, solve_subproblems, complete_history
+from src.routing_problem.segment import Segment
+
+
+def calculate_segment_centers(segments: List[Segment]) -> np.ndarray:
+    # Mean UTM coordinates (east, north) of segment nodes
+    return np.array([np.mean(segment.coordinates.get_utm()[:, ::-1], axis=0) for segment in segments])
+
+
+def partition_segments(segments: List[Segment], max_cell_size: int) -> List[List[Segment]]:
+    # Split segments in two halves along the longer side of their bounding box until cells are small enough
+    centers = calculate_segment_centers(segments)
+    cells = []
+    stack = [np.arange(len(segments))]
+    while len(stack) > 0:
+        cell = stack.pop()
+        if len(cell) <= max_cell_size:
+            cells.append([segments[i] for i in cell])
+            continue
+
+        cell_centers = centers[cell]
+        axis = int(np.argmax(cell_centers.max(axis=0) - cell_centers.min(axis=0)))
+        halves = np.argpartition(cell_centers[:, axis], len(cell) // 2)
+        stack.append(cell[halves[len(cell) // 2:]])
+        stack.append(cell[halves[:len(cell) // 2]])
+
+    return cells
+
+
+def create_cells_costs(cells: List[List[Segment]], matrix: Dict[str, Dict[str, int]]) -> np.ndarray:
+    # Durations between the segments closest to cell centers
+    representatives = []
+    for cell in cells:
+        centers = calculate_segment_centers(cell)
+        distances = np.linalg.norm(centers - centers.mean(axis=0), axis=1)
+        representatives.append(cell[int(np.argmin(distances))].id)
+
+    return np.array([[matrix[from_id][to_id] for to_id in representatives] for from_id in representatives],
+                    dtype=np.int64)
+
+
+def create_cells_order(costs: np.ndarray, max_optimisation_duration: float) -> List[int]:
+    # Open tour over cells, the additional node is a dummy start and end with 0-distances to all cells
+    if len(costs) == 1:
+        return [0]
+
+    matrix = np.zeros((len(costs) + 1, len(costs) + 1), dtype=np.int64)
+    matrix[:-1, :-1] = costs
+    manager = pywrapcp.RoutingIndexManager(len(matrix), 1, len(costs))
+    routing = pywrapcp.RoutingModel(manager)
+    routing.SetArcCostEvaluatorOfAllVehicles(routing.RegisterTransitMatrix(matrix.tolist()))
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+    search_parameters.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    search_parameters.time_limit.FromMilliseconds(max(int(max_optimisation_duration * 1000), 1))
+    assignment = routing.SolveWithParameters(search_parameters)
+    if assignment is None:
+        raise Exception(f"Routing failed. Routing status {routing.status()}")
+
+    order = []
+    index = assignment.Value(routing.NextVar(routing.Start(0)))
+    while not routing.IsEnd(index):
+        order.append(manager.IndexToNode(index))
+        index = assignment.Value(routing.NextVar(index))
+
+    return order
+
+
+def refine_boundaries(optimizer_class,
+                      arguments: Dict,
+                      routes: List[List[int]],
+                      window_size: int,
+                      duration: float) -> List[int]:
+    # Re-optimize windows around every boundary between consecutive routes within the duration. The route before and
+    # after a window stays fixed, so windows of every other boundary are disjoint and are optimized in parallel. Both
+    # passes get half of the duration
+    nodes_number = len(arguments["nodes"])
+    packs = {node: pack for pack in arguments.get("disjunctions", []) for node in pack}
+    window_arguments = dict(arguments, solution_cache=None)
+
+    route = [node for cell_route in routes for node in cell_route]
+    boundaries = np.cumsum([len(cell_route) for cell_route in routes])[:-1].tolist()
+    for parity in (0, 1):
+        windows: List[Tuple[int, int]] = []
+        for i in range(parity, len(boundaries), 2):
+            window_start = boundaries[i] - min(window_size, len(routes[i]) // 2)
+            window_end = boundaries[i] + min(window_size, len(routes[i + 1]) // 2)
+            if window_end - window_start > 1:
+                windows.append((window_start, window_end))
+        if len(windows) == 0:
+            continue
+
+        # Windows contain all alternatives of their nodes
+        windows_nodes = []
+        for window_start, window_end in windows:
+            window_nodes = route[window_start:window_end]
+            window_nodes += [alternative for node in window_nodes for alternative in packs.get(node, [])
+                             if alternative != node]
+            windows_nodes.append(window_nodes)
+
+        subproblems_arguments = [optimizer_class.create_subproblem_arguments(
+            window_arguments,
+            window_nodes,
+            route[window_start - 1] if window_start > 0 else 0,
+            route[window_end] if window_end < len(route) else nodes_number - 1)
+            for (window_start, window_end), window_nodes in zip(windows, windows_nodes)]
+        # Windows start from their current order, so refinement never makes the route worse
+        initial_routes = [list(range(1, window_end - window_start + 1)) for window_start, window_end in windows]
+        results = solve_subproblems(optimizer_class, subproblems_arguments, duration / 2, initial_routes)
+
+        for (window_start, window_end), window_nodes, result in zip(windows, windows_nodes, results):
+            route[window_start:window_end] = [window_nodes[node - 1] for node in result["route"]]
+
+    return route
+
+
+def run_partitioning(optimizer_class,
+                     arguments: Dict,
+                     max_cell_size: int,
+                     window_size: int,
+                     cells_order_duration: float,
+                     refinement_duration: float) -> Tuple[List, Dict[str, int]]:
+    # Optimize geographical cells of the road network separately, chain them in the optimized cells order and
+    # re-optimize cell boundaries. Cells share the duration left by the cells order and the refinement, which are
+    # scaled down for short durations
+    start_time = time.monotonic()
+    max_optimisation_duration = arguments["max_optimisation_duration"]
+    max_overhead_duration = max_optimisation_duration * PARTITION_MAX_OVERHEAD_SHARE
+    if cells_order_duration + refinement_duration > max_overhead_duration:
+        scale = max_overhead_duration / (cells_order_duration + refinement_duration)
+        cells_order_duration, refinement_duration = cells_order_duration * scale, refinement_duration * scale
+    cells_duration = max_optimisation_duration - cells_order_duration - refinement_duration
+
+    nodes = arguments["nodes"]
+    segments = list({segment.id: segment for node in nodes[1:-1]
+                     for segment in optimizer_class.get_node_segments(node)}.values())
+    cells = partition_segments(segments, max_cell_size)
+    cells_order = create_cells_order(create_cells_costs(cells, arguments["matrix"]), cells_order_duration)
+
+    segment_cells = {segment.id: i for i, cell_number in enumerate(cells_order) for segment in cells[cell_number]}
+    groups = [[] for _ in cells]
+    for i in range(1, len(nodes) - 1):
+        groups[segment_cells[optimizer_class.get_node_segments(nodes[i])[1].id]].append(i)
+    groups = [group for group in groups if len(group) > 0]
+
+    routes, histories = solve_groups(optimizer_class, arguments, groups, cells_duration, start_time)
+    route = refine_boundaries(optimizer_class, arguments, routes, window_size, refinement_duration)
+
+    return [nodes[0]] + [nodes[node] for node in route] + [nodes[-1]], \
+        complete_history(optimizer_class, arguments, histories, route, start_time)
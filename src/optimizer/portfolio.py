@@ -0,0 +1,124 @@
+import time
+from multiprocessing import Process, Manager, Lock, Value, Array, Event
+from typing import List, Dict, Tuple, Optional
+
+from ortools.constraint_solver import routing_enums_pb2
+
+from src.config.config import PORTFOLIO_POLL_INTERVAL
+from src.optimizer.pruning import is_allowed_route
+
+
+class SharedIncumbent:
+    """
+    SharedIncumbent is the best route found by the workers of a portfolio. It lives in shared memory, so that every
+    worker process can publish improving routes and read the best one.
+    """
+
+    def __init__(self, nodes_number: int):
+        self.lock = Lock()
+        self.objective = Value('q', 2 ** 63 - 1, lock=False)
+        self.route = Array('q', nodes_number, lock=False)
+        self.route_length = Value('q', 0, lock=False)
+        self.improvement_time = Value('d', time.time(), lock=False)
+        self.stop_event = Event()
+
+    def publish(self, objective: int, route: List[int]) -> bool:
+        with self.lock:
+            if objective >= self.objective.value:
+                return False
+            self.objective.value = objective
+            self.route[:len(route)] = route
+            self.route_length.value = len(route)
+            self.improvement_time.value = time.time()
+            return True
+
+    def get(self) -> Tuple[int, Optional[List[int]]]:
+        with self.lock:
+            if self.route_length.value == 0:
+                return self.objective.value, None
+            return self.objective.value, self.route[:self.route_length.value]
+
+
+def run_portfolio_worker(optimizer_class,
+                         arguments: Dict,
+                         incumbent: SharedIncumbent,
+                         deadline: float,
+                         reseed_interval: float,
+                         return_dict: Dict,
+                         worker_number: int):
+    optimizer = optimizer_class(**arguments)
+    optimizer.set_incumbent(incumbent)
+
+    # Optimize in rounds, workers that fall behind restart from the best known route
+    route = optimizer.initial_route
+    best_objective, best_route = None, None
+    try:
+        while not incumbent.stop_event.is_set():
+            remaining_duration = deadline - time.time()
+            if remaining_duration <= 0:
+                break
+            optimizer.search_parameters.time_limit.FromMilliseconds(
+                int(min(reseed_interval, remaining_duration) * 1000))
+
+            assignment = optimizer.solve(route)
+            if assignment is None:
+                break
+            route = optimizer.get_route(assignment)
+            if best_objective is None or assignment.ObjectiveValue() < best_objective:
+                best_objective, best_route = assignment.ObjectiveValue(), route
+
+            incumbent_objective, incumbent_route = incumbent.get()
+            # Workers with pruned arcs keep the arcs of their own first solution, so they can't start from every
+            # route
+            if incumbent_route is not None and incumbent_objective < assignment.ObjectiveValue() and \
+                    is_allowed_route(optimizer, incumbent_route):
+                route = incumbent_route
+    finally:
+        optimizer.monitor.close()
+
+    if best_route is not None:
+        return_dict[worker_number] = {
+            "order": [optimizer.nodes[0]] + [optimizer.nodes[node] for node in best_route] + [optimizer.nodes[-1]],
+            "history": optimizer.monitor.optimization_history,
+            "objective": best_objective
+        }
+
+
+def run_portfolio(optimizer_class,
+                  arguments: Dict,
+                  strategies: List[Tuple[routing_enums_pb2.LocalSearchMetaheuristic,
+                                         routing_enums_pb2.FirstSolutionStrategy]],
+                  target_objective: Optional[int],
+                  stall_duration: Optional[float],
+                  reseed_interval: float) -> Tuple[List, Dict[str, int]]:
+    # Start a worker per strategy, stop all of them when the target objective is reached or the search stalls
+    incumbent = SharedIncumbent(len(arguments["nodes"]))
+    manager = Manager()
+    return_dict = manager.dict()
+    deadline = time.time() + arguments["max_optimisation_duration"]
+
+    processes = []
+    for i, (local_search_metaheuristic, first_solution_strategy) in enumerate(strategies):
+        worker_arguments = dict(arguments,
+                                local_search_metaheuristic=local_search_metaheuristic,
+                                first_solution_strategy=first_solution_strategy)
+        process = Process(target=run_portfolio_worker,
+                          args=(optimizer_class, worker_arguments, incumbent, deadline, reseed_interval, return_dict, i))
+        process.start()
+        processes.append(process)
+
+    while any(process.is_alive() for process in processes):
+        time.sleep(PORTFOLIO_POLL_INTERVAL)
+        if target_objective is not None and incumbent.objective.value <= target_objective:
+            incumbent.stop_event.set()
+        if stall_duration is not None and time.time() - incumbent.improvement_time.value > stall_duration:
+            incumbent.stop_event.set()
+
+    for process in processes:
+        process.join()
+
+    if len(return_dict) == 0:
+        raise Exception("Routing failed. No portfolio worker found a solution")
+    best_result = min(return_dict.values(), key=lambda result: result["objective"])
+
+    return best_result["order"], best_result["history"]
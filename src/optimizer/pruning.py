@@ -0,0 +1,139 @@
+from typing import List, Optional, Set
+
+import numpy as np
+from ortools.constraint_solver import pywrapcp
+
+from src.config.config import OPTIMISER_INFINITY, PRUNING_BLOCK_SIZE, PRUNING_FIRST_SOLUTION_SHARE, \
+    PRUNING_FIRST_SOLUTION_MAX_DURATION
+from src.optimizer.cost_engine import CostEngine
+
+
+def create_first_solution_route(optimizer, duration: float) -> Optional[List[int]]:
+    # Route of the first solution strategy on a model without pruned arcs, None if the strategy fails within the
+    # duration. Managers built the same way have the same indices, so distance_callback works for both models
+    nodes_number = len(optimizer.nodes)
+    manager = pywrapcp.RoutingIndexManager(nodes_number, 1, [0], [nodes_number - 1])
+    routing = pywrapcp.RoutingModel(manager)
+    routing.SetArcCostEvaluatorOfAllVehicles(optimizer.register_transit_evaluator(routing, manager))
+    for pack in optimizer.get_disjunctions():
+        routing.AddDisjunction([manager.NodeToIndex(i) for i in pack], OPTIMISER_INFINITY, 1)
+
+    search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+    search_parameters.first_solution_strategy = optimizer.first_solution_strategy
+    search_parameters.solution_limit = 1
+    search_parameters.time_limit.FromMilliseconds(int(duration * 1000))
+    assignment = routing.SolveWithParameters(search_parameters)
+    if assignment is None:
+        return None
+
+    route = []
+    index = assignment.Value(routing.NextVar(routing.Start(0)))
+    while not routing.IsEnd(index):
+        route.append(manager.IndexToNode(index))
+        index = assignment.Value(routing.NextVar(index))
+
+    # A strategy stopped by the duration leaves packs of alternative nodes out
+    if len(route) < nodes_number - 2 - sum(len(pack) - 1 for pack in optimizer.get_disjunctions()):
+        return None
+    return route
+
+
+def create_nearest_neighbour_route(optimizer, cost_engine: CostEngine) -> List[int]:
+    start_node = optimizer.manager.IndexToNode(optimizer.routing.Start(0))
+    end_node = len(optimizer.nodes) - 1
+
+    packs = {node: pack for pack in optimizer.get_disjunctions() for node in pack}
+    candidates = np.ones(len(optimizer.nodes), dtype=bool)
+    candidates[[start_node, end_node]] = False
+
+    route = []
+    current_node = start_node
+    while candidates.any():
+        costs = np.where(candidates, cost_engine.get_costs_from(current_node), np.iinfo(np.int64).max)
+        current_node = int(np.argmin(costs))
+        route.append(current_node)
+        candidates[packs.get(current_node, [current_node])] = False
+
+    return route
+
+
+def create_candidate_arcs(optimizer, cost_engine: CostEngine, neighbours_number: int) -> List[Set[int]]:
+    nodes_number = len(optimizer.nodes)
+    start_node = optimizer.manager.IndexToNode(optimizer.routing.Start(0))
+    neighbours_number = min(neighbours_number, nodes_number - 1)
+    excluded_cost = np.iinfo(np.int64).max
+
+    # Keep topological successors, the cheapest successors and the cheapest predecessors of every node,
+    # so that every node stays reachable
+    allowed_nodes = [set(successors) for successors in optimizer.get_topological_successors()]
+    predecessors = np.zeros((0, nodes_number), dtype=np.int64)
+    predecessors_costs = np.zeros((0, nodes_number), dtype=np.int64)
+    for block_start in range(0, nodes_number, PRUNING_BLOCK_SIZE):
+        from_nodes = np.arange(block_start, min(block_start + PRUNING_BLOCK_SIZE, nodes_number))
+        costs = cost_engine.get_costs(from_nodes).astype(np.int64)
+        costs[np.arange(len(from_nodes)), from_nodes] = excluded_cost
+        costs[:, start_node] = excluded_cost
+
+        neighbours = np.argpartition(costs, neighbours_number - 1, axis=1)[:, :neighbours_number]
+        for from_node, node_neighbours in zip(from_nodes.tolist(), neighbours.tolist()):
+            allowed_nodes[from_node].update(node_neighbours)
+
+        candidates = np.concatenate((predecessors, np.broadcast_to(from_nodes[:, None], costs.shape)))
+        candidates_costs = np.concatenate((predecessors_costs, costs))
+        best = np.argpartition(candidates_costs, min(neighbours_number, len(candidates) - 1), axis=0)
+        best = best[:neighbours_number]
+        predecessors = np.take_along_axis(candidates, best, axis=0)
+        predecessors_costs = np.take_along_axis(candidates_costs, best, axis=0)
+
+    for to_node, from_nodes in enumerate(predecessors.T.tolist()):
+        for from_node in from_nodes:
+            allowed_nodes[from_node].add(to_node)
+
+    return allowed_nodes
+
+
+def prune_arcs(optimizer, neighbours_number: int) -> int:
+    # Remove arcs between distant nodes from the NextVar domains of the optimizer's routing model and return how
+    # many arcs were removed
+    cost_engine = optimizer.get_cost_engine()
+    allowed_nodes = create_candidate_arcs(optimizer, cost_engine, neighbours_number)
+
+    # Keep a feasible route, the route of the first solution strategy unless the search starts from a cached route
+    if optimizer.initial_route is None:
+        duration = min(optimizer.max_optimisation_duration * PRUNING_FIRST_SOLUTION_SHARE,
+                       PRUNING_FIRST_SOLUTION_MAX_DURATION)
+        optimizer.initial_route = create_first_solution_route(optimizer, duration)
+    if optimizer.initial_route is None:
+        optimizer.initial_route = create_nearest_neighbour_route(optimizer, cost_engine)
+    for from_node, to_node in zip(optimizer.initial_route, optimizer.initial_route[1:]):
+        allowed_nodes[from_node].add(to_node)
+
+    routing = optimizer.routing
+    manager = optimizer.manager
+    removed_arcs_number = 0
+    start_node = manager.IndexToNode(routing.Start(0))
+    end_index = routing.End(0)
+    for from_node, node_allowed_nodes in enumerate(allowed_nodes):
+        # The start keeps all arcs, the end has no outgoing arcs
+        from_index = manager.NodeToIndex(from_node)
+        if from_node == start_node or from_index < 0 or routing.IsEnd(from_index):
+            continue
+
+        # Keep the node itself, so that optional nodes can stay inactive, and the end of the route
+        allowed_indices = {manager.NodeToIndex(node) for node in node_allowed_nodes}
+        allowed_indices.update((from_index, end_index))
+        allowed_indices.discard(-1)
+
+        next_var = routing.NextVar(from_index)
+        domain_size = next_var.Size()
+        next_var.SetValues(sorted(allowed_indices))
+        removed_arcs_number += domain_size - next_var.Size()
+
+    return removed_arcs_number
+
+
+def is_allowed_route(optimizer, route: List[int]) -> bool:
+    # Pruned models only accept routes along kept arcs, see prune_arcs
+    routing = optimizer.routing
+    indices = [routing.Start(0)] + [optimizer.manager.NodeToIndex(node) for node in route] + [routing.End(0)]
+    return all(routing.NextVar(from_index).Contains(to_index) for from_index, to_index in zip(indices, indices[1:]))
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from typing import List, Dict, Optional, Set, Tuple
+
+from src.config.config import SOLUTION_CACHE_PATH
+from src.routing_problem.lanelet import Lanelet
+from src.routing_problem.maneuver.penalties import ManeuverPenalties
+
+
+def create_fingerprint(kind: str,
+                       lanelets: List[Lanelet],
+                       matrix: Dict[str, Dict[str, int]],
+                       connections: Optional[Set[Tuple[Lanelet]]] = None,
+                       maneuver_penalties: Optional[ManeuverPenalties] = None) -> Tuple[str, str]:
+    # Return the identity of a routing problem, a hash of its kind and segment ids, and its fingerprint, a hash of
+    # segments, lanelets, connections, maneuver penalties and the durations matrix
+    fingerprint = hashlib.sha256(kind.encode())
+
+    segments = {lanelet.segment.id: lanelet.segment for lanelet in lanelets}
+    segment_ids = sorted(segments)
+    identity = f"{kind}-{hashlib.sha256(json.dumps(segment_ids).encode()).hexdigest()}"
+    for segment_id in segment_ids:
+        segment = segments[segment_id]
+        maneuvers = sorted((from_id, to_id, maneuver.type.value, maneuver.modifier.value, maneuver.duration)
+                           for (from_id, to_id), maneuver in segment.next_maneuvers.items())
+        fingerprint.update(json.dumps([segment.id, segment.lanes, segment.previous_segment_ids,
+                                       segment.next_segment_ids, maneuvers]).encode())
+
+    fingerprint.update(json.dumps(sorted(lanelet.get_key() for lanelet in lanelets)).encode())
+
+    if connections is not None:
+        fingerprint.update(json.dumps(sorted((lanelet_from.get_key(), lanelet_to.get_key())
+                                             for lanelet_from, lanelet_to in connections)).encode())
+
+    if maneuver_penalties is not None:
+        fingerprint.update(maneuver_penalties.table.tobytes())
+        fingerprint.update(json.dumps(sorted(maneuver_penalties.third_order_penalties.items())).encode())
+
+    for from_id in segment_ids:
+        fingerprint.update(json.dumps([matrix[from_id][to_id] for to_id in segment_ids]).encode())
+
+    return identity, fingerprint.hexdigest()
+
+
+def create_cached_route(optimizer, entry: Dict) -> List[int]:
+    # Route of the optimizer's nodes in a cached entry. Orders found for the same fingerprint are used as they are,
+    # orders of a changed routing problem are repaired
+    if entry["fingerprint"] == optimizer.fingerprint:
+        node_index = {optimizer.nodes[i].get_key(): i for i in range(1, len(optimizer.nodes) - 1)}
+        return [node_index[key] for key in entry["order"]]
+    return repair_route(optimizer, entry["order"])
+
+
+def repair_route(optimizer, order: List[str]) -> List[int]:
+    # Route of the optimizer's nodes in a cached order of node keys
+    nodes = optimizer.nodes
+    node_index = {nodes[i].get_key(): i for i in range(1, len(nodes) - 1)}
+    packs = {node: pack for pack in optimizer.get_disjunctions() for node in pack}
+
+    # Drop nodes that no longer exist and alternatives of already visited nodes
+    route = []
+    visited = set()
+    for key in order:
+        node = node_index.get(key)
+        if node is not None and node not in visited:
+            route.append(node)
+            visited.update(packs.get(node, [node]))
+
+    # Insert new nodes at their cheapest positions
+    cost_engine = optimizer.get_cost_engine()
+    start_node = optimizer.manager.IndexToNode(optimizer.routing.Start(0))
+    end_node = len(nodes) - 1
+    for node in range(1, len(nodes) - 1):
+        if node in visited:
+            continue
+        insertions = []
+        for candidate in packs.get(node, [node]):
+            previous_nodes = [start_node] + route
+            next_nodes = route + [end_node]
+            insertions.extend((cost_engine.get_cost(previous_node, candidate) +
+                               cost_engine.get_cost(candidate, next_node) -
+                               cost_engine.get_cost(previous_node, next_node), position, candidate)
+                              for position, (previous_node, next_node) in enumerate(zip(previous_nodes, next_nodes)))
+        _, position, candidate = min(insertions)
+        route.insert(position, candidate)
+        visited.update(packs.get(candidate, [candidate]))
+
+    return route
+
+
+class SolutionCache:
+    """
+    SolutionCache stores the best orders found for routing problems on disk.
+
+    Orders are stored as lists of node keys, see Lanelet.get_key and XGraphNode.get_key, under the identity of the
+    routing problem they were found for, together with the fingerprint of the routing problem and the objective of the
+    order. Routing problems with the same segments share an entry, so orders of a changed routing problem are repaired
+    instead of being lost, see create_fingerprint. An entry is only replaced by a better order for the same
+    fingerprint or by an order for a new fingerprint.
+    """
+
+    def __init__(self, path: str = SOLUTION_CACHE_PATH):
+        self.path: str = path
+
+    def get_file_path(self, identity: str) -> str:
+        return os.path.join(self.path, f"{identity}.json")
+
+    def get(self, identity: str) -> Optional[Dict]:
+        # Return the entry with the fingerprint, the order and the objective
+        file_path = self.get_file_path(identity)
+        if not os.path.exists(file_path):
+            return None
+
+        with open(file_path) as f:
+            return json.load(f)
+
+    def put(self, identity: str, fingerprint: str, order: List[str], objective: int):
+        entry = self.get(identity)
+        if entry is not None and entry["fingerprint"] == fingerprint and entry["objective"] <= objective:
+            return
+        os.makedirs(self.path, exist_ok=True)
+
+        # Write to a temporary file first, so that parallel runs never read a partially written order
+        file_path = self.get_file_path(identity)
+        with open(f"{file_path}.{os.getpid()}.tmp", "w") as f:
+            json.dump({"fingerprint": fingerprint, "order": order, "objective": objective}, f)
+        os.replace(f"{file_path}.{os.getpid()}.tmp", file_path)
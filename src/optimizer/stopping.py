@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional, Deque, Tuple
+
+
+class StoppingPolicy(ABC):
+    """
+    StoppingPolicy decides when the search stops.
+
+    RoutingMonitor updates policies with every improving solution and asks them whether to stop from a solver limit,
+    so that the search stops even when no new solutions are found. Time is measured in seconds from the start of the
+    optimizer.
+    """
+
+    def get_time_limit(self, _nodes_number: int) -> Optional[float]:
+        # Return a time limit enforced by the solver itself
+        return None
+
+    def update(self, elapsed: float, objective: int):
+        pass
+
+    @abstractmethod
+    def should_stop(self, elapsed: float) -> bool:
+        pass
+
+
+class TargetObjectiveStoppingPolicy(StoppingPolicy):
+    """
+    TargetObjectiveStoppingPolicy stops the search as soon as the objective is at most target_objective.
+    """
+
+    def __init__(self, target_objective: int):
+        self.target_objective: int = target_objective
+        self.best_objective: Optional[int] = None
+
+    def update(self, elapsed: float, objective: int):
+        self.best_objective = objective
+
+    def should_stop(self, elapsed: float) -> bool:
+        return self.best_objective is not None and self.best_objective <= self.target_objective
+
+
+class StallStoppingPolicy(StoppingPolicy):
+    """
+    StallStoppingPolicy stops the search when the objective improved by less than min_improvement, e.g. 0.01 for 1%,
+    during the last duration seconds.
+    """
+
+    def __init__(self, min_improvement: float, duration: float):
+        self.min_improvement: float = min_improvement
+        self.duration: float = duration
+        self.improvements: Deque[Tuple[float, int]] = deque()
+
+    def update(self, elapsed: float, objective: int):
+        self.improvements.append((elapsed, objective))
+
+    def should_stop(self, elapsed: float) -> bool:
+        # Keep the last improvement before the observed period as a reference
+        reference_time = elapsed - self.duration
+        while len(self.improvements) > 1 and self.improvements[1][0] <= reference_time:
+            self.improvements.popleft()
+        if len(self.improvements) == 0 or self.improvements[0][0] > reference_time:
+            return False
+
+        reference_objective = self.improvements[0][1]
+        best_objective = self.improvements[-1][1]
+        if reference_objective <= 0:
+            return True
+        return (reference_objective - best_objective) / reference_objective < self.min_improvement
+
+
+class NodesTimeStoppingPolicy(StoppingPolicy):
+    """
+    NodesTimeStoppingPolicy limits the search to seconds_per_node for every node of the routing problem, but at least
+    to min_duration seconds.
+    """
+
+    def __init__(self, seconds_per_node: float, min_duration: float = 0):
+        self.seconds_per_node: float = seconds_per_node
+        self.min_duration: float = min_duration
+        self.time_limit: Optional[float] = None
+
+    def get_time_limit(self, nodes_number: int) -> Optional[float]:
+        self.time_limit = max(self.min_duration, self.seconds_per_node * nodes_number)
+        return self.time_limit
+
+    def should_stop(self, elapsed: float) -> bool:
+        return self.time_limit is not None and elapsed >= self.time_limit
@@ -1,10 +1,16 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 from ortools.constraint_solver import routing_enums_pb2
 
-from src.config.config import OPTIMISER_INFINITY
+from src.optimizer.cost_engine import XGraphCostEngine
 from src.optimizer.optimizer import Optimizer
-from src.routing_problem.connections.complete import XGraphNode
+from src.optimizer.solution_cache import SolutionCache, create_fingerprint
+from src.optimizer.stopping import StoppingPolicy
+from src.routing_problem.connections.complete import XGraphNode, FirstXGraphNode, LastXGraphNode, \
+    HigherOrderXGraphNode
+from src.routing_problem.maneuver.penalties import ManeuverPenalties, get_maneuver_class
+from src.routing_problem.segment import Segment
+from src.routing_problem.x_graph import build_higher_order_x_graph
 
 
 class XGraphOptimizer(Optimizer):
@@ -14,21 +20,40 @@ class XGraphOptimizer(Optimizer):
                  matrix: Dict[str, Dict[str, int]],
                  local_search_metaheuristic: routing_enums_pb2.LocalSearchMetaheuristic,
                  first_solution_strategy: routing_enums_pb2.FirstSolutionStrategy,
-                 max_optimisation_duration: int,
+                 max_optimisation_duration: float,
                  straight_non_straight_maneuver_penalty: int,
-                 non_straight_straight_maneuver_penalty: int):
-        super().__init__(nodes, matrix, local_search_metaheuristic, first_solution_strategy, max_optimisation_duration)
-
+                 non_straight_straight_maneuver_penalty: int,
+                 precompute_costs: bool = False,
+                 candidate_neighbours: Optional[int] = None,
+                 solution_cache: Optional[SolutionCache] = None,
+                 target_gap: Optional[float] = None,
+                 stopping_policies: Optional[List[StoppingPolicy]] = None,
+                 progress_queue=None,
+                 progress_file: Optional[str] = None,
+                 maneuver_penalties: Optional[ManeuverPenalties] = None):
         # X-Graph specific attributes
         self.disjunctions: List[List[int]] = disjunctions
         self.straight_non_straight_maneuver_penalty: int = straight_non_straight_maneuver_penalty
         self.non_straight_straight_maneuver_penalty: int = non_straight_straight_maneuver_penalty
 
-        # Register disjunctions
-        for pack in self.disjunctions:
-            self.routing.AddDisjunction([self.manager.NodeToIndex(i) for i in pack],
-                                        OPTIMISER_INFINITY,
-                                        1)
+        # Penalty table replaces the straight and non-straight penalties
+        if maneuver_penalties is None:
+            maneuver_penalties = ManeuverPenalties.from_straight_penalties(straight_non_straight_maneuver_penalty,
+                                                                           non_straight_straight_maneuver_penalty)
+        self.maneuver_penalties: ManeuverPenalties = maneuver_penalties
+
+        # Third-order penalties need the higher-order X-Graph, its nodes are mapped back to the given nodes in routes
+        self.node_origins: List[int] = list(range(len(nodes)))
+        if maneuver_penalties.has_third_order_penalties():
+            higher_order_nodes, self.disjunctions = build_higher_order_x_graph(nodes, disjunctions, maneuver_penalties)
+            node_index = {id(node): i for i, node in enumerate(nodes)}
+            self.node_origins = [node_index[id(node.original_node if isinstance(node, HigherOrderXGraphNode) else node)]
+                                 for node in higher_order_nodes]
+            nodes = higher_order_nodes
+
+        super().__init__(nodes, matrix, local_search_metaheuristic, first_solution_strategy, max_optimisation_duration,
+                         precompute_costs, candidate_neighbours, solution_cache, target_gap,
+                         stopping_policies, progress_queue, progress_file)
 
     def distance_callback(self, from_index, to_index) -> int:
         from_element_index = self.manager.IndexToNode(from_index)
@@ -36,7 +61,59 @@ class XGraphOptimizer(Optimizer):
 
         from_node = self.nodes[from_element_index]
         to_node = self.nodes[to_element_index]
-        return from_node.get_cost_to(to_node,
-                                     self.matrix,
-                                     self.straight_non_straight_maneuver_penalty,
-                                     self.non_straight_straight_maneuver_penalty)
+        return from_node.get_cost_to(to_node, self.matrix, self.maneuver_penalties)
+
+    def create_cost_engine(self) -> XGraphCostEngine:
+        return XGraphCostEngine(self.nodes, self.matrix, self.maneuver_penalties)
+
+    def create_fingerprint(self) -> Tuple[str, str]:
+        lanelets = {}
+        for node in self.nodes:
+            if not isinstance(node, (FirstXGraphNode, LastXGraphNode)):
+                lanelets[id(node.lanelet_from)] = node.lanelet_from
+                lanelets[id(node.lanelet_to)] = node.lanelet_to
+        return create_fingerprint("x_graph", list(lanelets.values()), self.matrix,
+                                  maneuver_penalties=self.maneuver_penalties)
+
+    def get_argument_route(self, route: List[int]) -> List[int]:
+        return [self.node_origins[node] for node in route]
+
+    def get_model_route(self, argument_route: List[int]) -> List[int]:
+        # Nodes directly following a maneuver are replaced by their higher-order copy for the class of the maneuver
+        higher_order_nodes = {(self.node_origins[i], node.previous_class): i for i, node in enumerate(self.nodes)
+                              if isinstance(node, HigherOrderXGraphNode)}
+        route = []
+        for node in argument_route:
+            if len(route) > 0 and len(higher_order_nodes) > 0:
+                previous_node = self.nodes[route[-1]]
+                if previous_node.lanelet_to.segment.id == self.nodes[node].lanelet_from.segment.id:
+                    node = higher_order_nodes.get((node, get_maneuver_class(previous_node.maneuver)), node)
+            route.append(node)
+
+        return route
+
+    @staticmethod
+    def get_node_segments(node: XGraphNode) -> Tuple[Segment, Segment]:
+        return node.lanelet_from.segment, node.lanelet_to.segment
+
+    @classmethod
+    def create_subproblem_arguments(cls, arguments: Dict, nodes: List[int], start: int = 0, end: int = -1) -> Dict:
+        # Disjunctions must be kept whole or dropped
+        subproblem_arguments = super().create_subproblem_arguments(arguments, nodes, start, end)
+        subproblem_nodes = {node: i + 1 for i, node in enumerate(nodes)}
+        subproblem_arguments["disjunctions"] = [[subproblem_nodes[node] for node in pack]
+                                                for pack in arguments["disjunctions"] if pack[0] in subproblem_nodes]
+        return subproblem_arguments
+
+    def get_disjunctions(self) -> List[List[int]]:
+        return self.disjunctions
+
+    def get_topological_successors(self) -> List[List[int]]:
+        # Maneuvers starting on the segment where a maneuver ends
+        maneuvers_from_segment: Dict[str, List[int]] = {}
+        for i, node in enumerate(self.nodes):
+            if not isinstance(node, (FirstXGraphNode, LastXGraphNode)):
+                maneuvers_from_segment.setdefault(node.lanelet_from.segment.id, []).append(i)
+
+        return [[] if isinstance(node, (FirstXGraphNode, LastXGraphNode)) else
+                maneuvers_from_segment.get(node.lanelet_to.segment.id, []) for node in self.nodes]
@@ -0,0 +1,60 @@
+import json
+import os
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Arrays are aligned in files, so that they can be memory mapped
+ARRAYS_ALIGNMENT = 64
+
+
+def align(size: int) -> int:
+    return -(-size // ARRAYS_ALIGNMENT) * ARRAYS_ALIGNMENT
+
+
+def write_arrays(path: str, arrays: Dict[str, np.ndarray], metadata: Dict, magic: bytes, version: int):
+    # Magic bytes identifying the kind of file, a JSON header with the layout of arrays, then aligned arrays
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += align(array.nbytes)
+    header = json.dumps({"version": version, "metadata": metadata, "arrays": layout}).encode()
+    data_start = align(len(magic) + 8 + len(header))
+
+    # Write to a temporary file first, so that parallel runs never read a partially written file
+    with open(f"{path}.{os.getpid()}.tmp", "wb") as f:
+        f.write(magic + struct.pack("<Q", len(header)) + header)
+        f.write(b"\0" * (data_start - f.tell()))
+        for name, array in arrays.items():
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.write(b"\0" * (data_start + layout[name]["offset"] + align(array.nbytes) - f.tell()))
+    os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+
+def read_arrays(path: str, magic: bytes, version: int) -> Optional[Tuple[Dict[str, np.ndarray], Dict]]:
+    # Arrays are memory mapped, None for other kinds of files, files of other versions and truncated or corrupt files
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(magic)) != magic:
+                return None
+            header_length, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+        if header["version"] != version:
+            return None
+
+        data_start = align(len(magic) + 8 + header_length)
+        arrays = {}
+        for name, layout in header["arrays"].items():
+            dtype = np.dtype(layout["dtype"])
+            shape = tuple(layout["shape"])
+            if int(np.prod(shape)) * dtype.itemsize == 0:
+                arrays[name] = np.zeros(shape, dtype=dtype)
+            else:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=data_start + layout["offset"],
+                                         shape=shape)
+    except (struct.error, ValueError, KeyError, TypeError):
+        return None
+
+    return arrays, header["metadata"]
@@ -1,11 +1,11 @@
 import xml.etree.ElementTree as xml
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Iterator
 
 from src.geo.geo import Node, LatLon, Position
 
 
-def find_osm_nodes_and_ways(source: str) -> Tuple[Dict[int, Node], Dict[int, Dict]]:
-    # Parse xml file, find OSM nodes and ways
+def find_osm_nodes_and_ways(source: str, parse_nodes: bool = True) -> Tuple[Dict[int, Node], Dict[int, Dict]]:
+    # Parse xml file, find OSM nodes and ways. Without parse_nodes, OSM nodes are skipped and no nodes are returned
 
     tree = xml.fromstring(source)
 
@@ -14,11 +14,12 @@ def find_osm_nodes_and_ways(source: str) -> Tuple[Dict[int, Node], Dict[int, Dic
     for element in tree:
         # Nodes
         if element.tag == "node":
+            if not parse_nodes:
+                continue
+            attributes = {child.attrib['k']: child.attrib['v'] for child in element if child.tag == "tag"}
             nodes[int(element.attrib["id"])] = Node(Position(latlon=LatLon(lat=float(element.attrib["lat"]),
-                                                                           lon=float(element.attrib["lon"]))))
-            for child in element:
-                if child.tag == "tag":
-                    nodes[int(element.attrib["id"])].attributes[child.attrib['k']] = child.attrib['v']
+                                                                           lon=float(element.attrib["lon"]))),
+                                                    attributes if len(attributes) > 0 else None)
 
         # Ways
         elif element.tag == "way":
@@ -32,3 +33,33 @@ def find_osm_nodes_and_ways(source: str) -> Tuple[Dict[int, Node], Dict[int, Dic
                     ways[element_id]['attributes'][child.attrib["k"]] = child.attrib["v"]
 
     return nodes, ways
+
+
+def iterate_osm_ways(path: str) -> Iterator[Dict]:
+    # Stream ways of an xml file one at a time. Parsed elements are cleared and OSM nodes are skipped, so memory doesn't
+    # grow with the size of the file
+    elements = xml.iterparse(path, events=("start", "end"))
+    try:
+        first_element = next(elements, None)
+        if first_element is None:
+            raise Exception(f"No OSM data in file: {path}")
+        _, root = first_element
+
+        for event, element in elements:
+            if event != "end" or element.tag not in ("node", "way", "relation"):
+                continue
+
+            if element.tag == "way":
+                way = {'id': int(element.attrib["id"]), 'nodes': [], 'attributes': {}}
+                for child in element:
+                    if child.tag == "nd":
+                        way['nodes'].append(int(child.attrib["ref"]))
+                    if child.tag == "tag":
+                        way['attributes'][child.attrib["k"]] = child.attrib["v"]
+                yield way
+
+            # Top level elements are done
+            root.clear()
+    except xml.ParseError as e:
+        # Empty and truncated files
+        raise Exception(f"Invalid OSM file {path}: {e}") from e
@@ -0,0 +1,149 @@
+import json
+import os
+from collections.abc import Mapping
+from typing import List, Dict, Optional, Iterator
+
+import numpy as np
+
+from src.abstract.serialisable import Serialisable
+from src.config.config import OPTIMISER_INFINITY
+from src.osmio.arrays import write_arrays, read_arrays
+
+DURATION_MATRIX_MAGIC = b"DURATION"
+DURATION_MATRIX_VERSION = 1
+
+
+class DurationMatrixRow(Mapping):
+    """
+    DurationMatrixRow is a row of a DurationMatrix, durations are read by segment ids of columns.
+    """
+
+    def __init__(self, durations: List[int], column_index: Dict[str, int]):
+        self.durations: List[int] = durations
+        self.column_index: Dict[str, int] = column_index
+
+    def __getitem__(self, to_id: str) -> int:
+        return self.durations[self.column_index[to_id]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.column_index)
+
+    def __len__(self) -> int:
+        return len(self.column_index)
+
+
+class DurationMatrix(Mapping, Serialisable):
+    """
+    DurationMatrix is a dense int32 durations matrix between segments with an index of segment ids of rows and columns.
+
+    It can be used in place of the string-keyed dict-of-dict durations matrix, matrix[from_id][to_id]. Rows are
+    converted to lists on first access. Matrices loaded from files stay memory mapped, so processes sharing a matrix
+    share its memory. They are sent to other processes by their path.
+    """
+
+    def __init__(self, row_ids: List[str], column_ids: List[str], durations: np.ndarray, path: Optional[str] = None):
+        self.row_ids: List[str] = row_ids
+        self.column_ids: List[str] = column_ids
+        self.durations: np.ndarray = durations
+        self.path: Optional[str] = path
+
+        self.row_index: Dict[str, int] = {segment_id: i for i, segment_id in enumerate(row_ids)}
+        self.column_index: Dict[str, int] = self.row_index if column_ids == row_ids else \
+            {segment_id: i for i, segment_id in enumerate(column_ids)}
+        self.rows: Dict[str, DurationMatrixRow] = {}
+
+    def __getitem__(self, from_id: str) -> DurationMatrixRow:
+        row = self.rows.get(from_id)
+        if row is None:
+            row = DurationMatrixRow(self.durations[self.row_index[from_id]].tolist(), self.column_index)
+            self.rows[from_id] = row
+        return row
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.row_ids)
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def __reduce__(self):
+        if self.path is not None:
+            return load_duration_matrix, (self.path,)
+        return DurationMatrix, (self.row_ids, self.column_ids, np.asarray(self.durations))
+
+    def to_json(self) -> Dict[str, Dict[str, int]]:
+        # The string-keyed dict-of-dict durations matrix
+        return {from_id: dict(zip(self.column_ids, row)) for from_id, row in zip(self.row_ids, self.durations.tolist())}
+
+    def get_durations(self, from_ids: List[str], to_ids: List[str]) -> np.ndarray:
+        # Dense durations between segments
+        rows = np.array([self.row_index[from_id] for from_id in from_ids], dtype=np.int64)
+        columns = np.array([self.column_index[to_id] for to_id in to_ids], dtype=np.int64)
+        return self.durations[np.ix_(rows, columns)]
+
+    def save(self, path: str):
+        write_arrays(path,
+                     {
+                         "row_ids": np.array(self.row_ids, dtype=str),
+                         "column_ids": np.array(self.column_ids, dtype=str),
+                         "durations": np.asarray(self.durations, dtype=np.int32)
+                     },
+                     {},
+                     DURATION_MATRIX_MAGIC,
+                     DURATION_MATRIX_VERSION)
+
+
+def create_duration_matrix(matrix: Dict[str, Dict[str, int]]) -> DurationMatrix:
+    # Columns are in the order of the first row
+    row_ids = list(matrix)
+    column_ids = list(matrix[row_ids[0]]) if len(row_ids) > 0 else []
+    durations = np.array([[matrix[from_id][to_id] for to_id in column_ids] for from_id in row_ids],
+                         dtype=np.int32).reshape(len(row_ids), len(column_ids))
+    return DurationMatrix(row_ids, column_ids if column_ids != row_ids else row_ids, durations)
+
+
+def create_table_matrix(sources: List[int],
+                        destinations: List[int],
+                        durations: List[Optional[float]]) -> DurationMatrix:
+    # Durations matrix of an OSRM table response or of request_table_tiles, durations are flat or nested in rows of
+    # sources. Unreachable pairs are null or nan and get OPTIMISER_INFINITY
+    table = np.array(durations, dtype=np.float64).reshape(len(sources), len(destinations))
+    table = np.where(np.isnan(table), OPTIMISER_INFINITY, np.trunc(table)).astype(np.int32)
+
+    row_ids = [str(source) for source in sources]
+    column_ids = [str(destination) for destination in destinations]
+    return DurationMatrix(row_ids, row_ids if column_ids == row_ids else column_ids, table)
+
+
+def read_duration_matrix(path: str) -> Optional[DurationMatrix]:
+    # None for other files and matrices of other versions
+    loaded = read_arrays(path, DURATION_MATRIX_MAGIC, DURATION_MATRIX_VERSION)
+    if loaded is None:
+        return None
+    arrays, _ = loaded
+
+    row_ids = arrays["row_ids"].tolist()
+    column_ids = arrays["column_ids"].tolist()
+    return DurationMatrix(row_ids, row_ids if column_ids == row_ids else column_ids, arrays["durations"], path)
+
+
+def load_duration_matrix(path: str) -> DurationMatrix:
+    matrix = read_duration_matrix(path)
+    if matrix is None:
+        raise Exception(f"Not a durations matrix of version {DURATION_MATRIX_VERSION}: {path}")
+    return matrix
+
+
+def open_duration_matrix(json_path: str) -> DurationMatrix:
+    """
+    Load the durations matrix of a *_matrix.json file. The JSON file is converted to a binary file next to it once,
+    later the binary file is loaded. It's converted again when the JSON file changes.
+    """
+    path = f"{os.path.splitext(json_path)[0]}.bin"
+    if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(json_path):
+        matrix = read_duration_matrix(path)
+        if matrix is not None:
+            return matrix
+
+    with open(json_path) as f:
+        create_duration_matrix(json.load(f)).save(path)
+    return load_duration_matrix(path)
@@ -1,8 +1,13 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Dict
 
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
 
-from src.config.config import OSRM_ADDRESS
+from src.config.config import OSRM_ADDRESS, OSRM_TABLE_TILE_SIZE, OSRM_TABLE_WORKERS, OSRM_TABLE_TIMEOUT, \
+    OSRM_TABLE_RETRIES, OSRM_TABLE_BACKOFF
 from src.routing_problem.segment import Segment
 
 
@@ -28,6 +33,57 @@ class OSRMInterface:
             "osrm_file_path": osrm_file_path
         }, timeout=3).json()
 
+    @staticmethod
+    def request_table_tiles(sources: List[int],
+                            destinations: List[int],
+                            osrm_file_path: str,
+                            tile_size: int = OSRM_TABLE_TILE_SIZE,
+                            workers: int = OSRM_TABLE_WORKERS,
+                            address: str = OSRM_ADDRESS) -> np.ndarray:
+        """
+        Request the durations table of large problems in tiles of at most tile_size sources and destinations.
+
+        Tiles are requested concurrently over one pooled session, failed tiles are requested again with exponential
+        backoff, see OSRM_TABLE_RETRIES. Returns the sources x destinations durations, unreachable pairs are nan. The
+        result can be passed to create_table_matrix.
+        """
+        durations = np.full((len(sources), len(destinations)), np.nan, dtype=np.float64)
+        tiles = [(row, column) for row in range(0, len(sources), tile_size)
+                 for column in range(0, len(destinations), tile_size)]
+
+        with requests.Session() as session:
+            session.mount(address, HTTPAdapter(pool_connections=workers, pool_maxsize=workers))
+
+            def request_tile(tile: Tuple[int, int]):
+                row, column = tile
+                tile_sources = sources[row:row + tile_size]
+                tile_destinations = destinations[column:column + tile_size]
+                for retry in range(OSRM_TABLE_RETRIES + 1):
+                    try:
+                        response = session.get(f"{address}/table", json={
+                            "origins": tile_sources,
+                            "destinations": tile_destinations,
+                            "osrm_file_path": osrm_file_path
+                        }, timeout=OSRM_TABLE_TIMEOUT)
+                        response.raise_for_status()
+                        # Durations are flat or nested in rows of sources, null for unreachable pairs
+                        tile_durations = np.array(response.json()[1], dtype=np.float64)
+                        durations[row:row + len(tile_sources), column:column + len(tile_destinations)] = \
+                            tile_durations.reshape(len(tile_sources), len(tile_destinations))
+                        return
+                    except (requests.RequestException, ValueError) as e:
+                        # Rejected requests would be rejected again
+                        rejected = isinstance(e, requests.HTTPError) and e.response.status_code < 500
+                        if retry == OSRM_TABLE_RETRIES or rejected:
+                            raise Exception(f"Couldn't get the durations table tile at {tile}: {e}") from e
+                        time.sleep(OSRM_TABLE_BACKOFF * 2 ** retry)
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Tiles write to separate blocks of durations, list raises the first failure
+                list(executor.map(request_tile, tiles))
+
+        return durations
+
     @staticmethod
     def request_route(routing_segments: List[Segment], osrm_file_path: str) -> Dict:
         segments = [(int(float(segment.id)), 1 if segment.is_forward else 0) for segment in routing_segments[:-1]]
@@ -0,0 +1,74 @@
+import json
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+from src.osrm.duration_matrix import DurationMatrix, open_duration_matrix
+
+
+class TableRequestHandler(BaseHTTPRequestHandler):
+    """
+    TableRequestHandler answers /table requests of OSRMInterface from the durations matrix of its TableServer.
+    """
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/table":
+            self.send_error(404, "Only /table is served")
+            return
+
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError as e:
+            self.send_error(400, f"Invalid JSON body: {e}")
+            return
+
+        try:
+            durations = self.server.matrix.get_durations([str(source) for source in body["origins"]],
+                                                         [str(destination) for destination in body["destinations"]])
+        except KeyError as e:
+            self.send_error(400, f"Unknown segment or missing field: {e}")
+            return
+
+        # Like the OSRM fork, durations are the second element. Distances aren't known, so the first is null
+        response = json.dumps([None, durations.tolist()]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response)))
+        self.end_headers()
+        self.wfile.write(response)
+
+    def log_message(self, log_format, *args):
+        # Tiles of large tables are many requests
+        pass
+
+
+class TableServer(ThreadingHTTPServer):
+    """
+    TableServer is a local stand-in for the OSRM fork that serves durations tables from an existing *_matrix.json file,
+    e.g. for testing OSRMInterface.request_table_tiles without OSRM. Unreachable pairs have OPTIMISER_INFINITY.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, matrix: DurationMatrix, host: str = "127.0.0.1", port: int = 0):
+        super().__init__((host, port), TableRequestHandler)
+        self.matrix: DurationMatrix = matrix
+
+    def get_address(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_table_server(json_path: str, host: str = "127.0.0.1", port: int = 0) -> TableServer:
+    # Serve in a background thread, port 0 picks a free port. Stop with shutdown
+    server = TableServer(open_duration_matrix(json_path), host, port)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    # python -m src.osrm.server data/urban_matrix.json 8000
+    table_server = TableServer(open_duration_matrix(sys.argv[1]), port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
+    print(f"Serving durations tables of {sys.argv[1]} at {table_server.get_address()}")
+    table_server.serve_forever()
@@ -1,8 +1,9 @@
 from typing import Optional, Dict
 
+from src.config.config import OPTIMISER_INFINITY
 from src.routing_problem.lanelet import Lanelet
 from src.routing_problem.maneuver.maneuver import Maneuver
-from src.routing_problem.maneuver.modifier import ManeuverModifier
+from src.routing_problem.maneuver.penalties import ManeuverPenalties, get_maneuver_class, NO_MANEUVER
 
 
 class XGraphNode:
@@ -12,23 +13,57 @@ class XGraphNode:
 
         self.maneuver: Optional[Maneuver] = maneuver
 
+    def get_key(self) -> str:
+        # Identifier that stays the same when the X-Graph is created again
+        return f"{self.lanelet_from.get_key()}>{self.lanelet_to.get_key()}"
+
     def get_cost_to(self,
                     connection,
                     matrix: Dict[str, Dict[str, int]],
-                    straight_non_straight_maneuver_penalty: int,
-                    non_straight_straight_maneuver_penalty: int):
+                    penalties: ManeuverPenalties):
+        class_from = get_maneuver_class(self.maneuver)
+        cost = 0
+        # Maneuvers inside a contracted chain, the penalties for passing the chain are paid on every arc
+        for maneuver in self.lanelet_to.segment.chain_maneuvers:
+            class_to = get_maneuver_class(maneuver)
+            cost += penalties.get_penalty(class_from, class_to)
+            class_from = class_to
+
         if isinstance(connection, LastXGraphNode):
-            return 0
+            return cost
+
+        previous_class = connection.previous_class if isinstance(connection, HigherOrderXGraphNode) else None
+        if self.lanelet_to.segment.id == connection.lanelet_from.segment.id and class_from != NO_MANEUVER:
+            class_to = get_maneuver_class(connection.maneuver)
+            # Higher-order nodes only follow their previous maneuver, other nodes never follow maneuvers starting a
+            # third-order penalty
+            if previous_class is not None and previous_class != class_from or \
+                    previous_class is None and (class_from, class_to) in penalties.third_order_prefixes:
+                return OPTIMISER_INFINITY
+
+            cost += penalties.get_penalty(class_from, class_to)
+            if isinstance(self, HigherOrderXGraphNode):
+                cost += penalties.get_third_order_penalty(self.previous_class, class_from, class_to)
+            return cost
+
+        # Higher-order nodes can't be reached without their previous maneuver
+        if previous_class is not None:
+            return OPTIMISER_INFINITY
+        return cost + matrix[self.lanelet_to.segment.id][connection.lanelet_from.segment.id]
+
+
+class HigherOrderXGraphNode(XGraphNode):
+    """
+    HigherOrderXGraphNode is a maneuver that follows a maneuver of previous_class, see build_higher_order_x_graph.
+    """
+
+    def __init__(self, node: XGraphNode, previous_class: int):
+        super().__init__(node.lanelet_from, node.lanelet_to, node.maneuver)
+        self.original_node: XGraphNode = node
+        self.previous_class: int = previous_class
 
-        if self.lanelet_to.segment.id == connection.lanelet_from.segment.id and self.maneuver is not None:
-            if self.maneuver.modifier == ManeuverModifier.Straight:
-                if connection.maneuver.modifier == ManeuverModifier.Straight:
-                    return 0
-                return straight_non_straight_maneuver_penalty
-            if connection.maneuver.modifier == ManeuverModifier.Straight:
-                return non_straight_straight_maneuver_penalty
-            return 0
-        return matrix[self.lanelet_to.segment.id][connection.lanelet_from.segment.id]
+    def get_key(self) -> str:
+        return f"{super().get_key()}<{self.previous_class}"
 
 
 class SelfXGraphNode(XGraphNode):
@@ -43,8 +78,10 @@ class LastXGraphNode(XGraphNode):
     def get_cost_to(self,
                     connection,
                     matrix: Dict[str, Dict[str, int]],
-                    straight_non_straight_maneuver_penalty: int,
-                    non_straight_straight_maneuver_penalty: int):
+                    penalties: ManeuverPenalties):
+        # Higher-order nodes can't be reached without their previous maneuver
+        if isinstance(connection, HigherOrderXGraphNode):
+            return OPTIMISER_INFINITY
         return 0
 
 
@@ -55,6 +92,8 @@ class FirstXGraphNode(XGraphNode):
     def get_cost_to(self,
                     connection,
                     matrix: Dict[str, Dict[str, int]],
-                    straight_non_straight_maneuver_penalty: int,
-                    non_straight_straight_maneuver_penalty: int):
+                    penalties: ManeuverPenalties):
+        # Higher-order nodes can't be reached without their previous maneuver
+        if isinstance(connection, HigherOrderXGraphNode):
+            return OPTIMISER_INFINITY
         return 0
@@ -0,0 +1,158 @@
+from typing import List, Set, Tuple, Dict
+
+import numpy as np
+
+from src.routing_problem.connections.lanelet import LaneletConnection
+from src.routing_problem.lanelet import Lanelet
+from src.routing_problem.maneuver.maneuver import Maneuver
+from src.routing_problem.maneuver.maneuver_type import ManeuverType
+from src.routing_problem.maneuver.modifier import ManeuverModifier
+from src.routing_problem.routing_problem import RoutingProblem
+from src.routing_problem.segment import Segment
+
+LEFT_MODIFIERS = (ManeuverModifier.Left, ManeuverModifier.SlightLeft, ManeuverModifier.SharpLeft,
+                  ManeuverModifier.UTurn)
+RIGHT_MODIFIERS = (ManeuverModifier.Right, ManeuverModifier.SlightRight, ManeuverModifier.SharpRight)
+
+
+class LaneletTopology:
+    """
+    LaneletTopology is the lane-level topology of a routing problem.
+
+    Connections are stored as a CSR adjacency of lanelet indices, see Lanelet.index: lanelets connected to the
+    lanelet i are targets[offsets[i]:offsets[i + 1]], sorted. Connection objects are only created on demand, see
+    get_connections and get_lanelet_pairs. Like a set of lanelet pairs, LaneletTopology supports `in` and iteration.
+    """
+
+    def __init__(self, lanelets: List[Lanelet], offsets: np.ndarray, targets: np.ndarray, maneuvers: List[Maneuver]):
+        self.lanelets: List[Lanelet] = lanelets
+        self.offsets: np.ndarray = offsets
+        self.targets: np.ndarray = targets
+        self.maneuvers: List[Maneuver] = maneuvers
+
+        # Flat copies for single connection lookups
+        self.offsets_list: List[int] = offsets.tolist()
+        self.targets_list: List[int] = targets.tolist()
+
+    def __contains__(self, lanelets: Tuple[Lanelet, Lanelet]) -> bool:
+        # Lanelet pair lookup, see Lanelet.get_cost_to
+        return self.is_connected(lanelets[0].index, lanelets[1].index)
+
+    def __iter__(self):
+        return iter(self.get_lanelet_pairs())
+
+    def get_sources(self) -> np.ndarray:
+        # Source lanelet index of every connection
+        return np.repeat(np.arange(len(self.lanelets)), np.diff(self.offsets))
+
+    def get_successors(self, lanelet_index: int) -> np.ndarray:
+        return self.targets[self.offsets[lanelet_index]:self.offsets[lanelet_index + 1]]
+
+    def is_connected(self, from_index: int, to_index: int) -> bool:
+        # Lanelets have a few connections at most, so successors are scanned
+        for i in range(self.offsets_list[from_index], self.offsets_list[from_index + 1]):
+            if self.targets_list[i] == to_index:
+                return True
+        return False
+
+    def are_connected(self, from_indices: np.ndarray, to_indices: np.ndarray) -> np.ndarray:
+        # Connection keys are sorted, because sources and targets of every source are sorted
+        keys = self.get_sources() * len(self.lanelets) + self.targets
+        pair_keys = np.asarray(from_indices) * len(self.lanelets) + np.asarray(to_indices)
+        positions = np.minimum(np.searchsorted(keys, pair_keys), max(len(keys) - 1, 0))
+        return (len(keys) > 0) & (keys[positions] == pair_keys)
+
+    def get_connections(self) -> List[LaneletConnection]:
+        return [LaneletConnection(self.lanelets[source], self.lanelets[target], maneuver)
+                for source, target, maneuver in zip(self.get_sources().tolist(), self.targets_list, self.maneuvers)]
+
+    def get_lanelet_pairs(self) -> Set[Tuple[Lanelet, Lanelet]]:
+        return {(self.lanelets[source], self.lanelets[target])
+                for source, target in zip(self.get_sources().tolist(), self.targets_list)}
+
+
+def get_turn_pairs(previous_segment: Segment, segment: Segment, maneuver: Maneuver) -> List[Tuple[Lanelet, Lanelet]]:
+    # Lanelets of a turn connected from the inner side: left turns and right merges from the left, right turns and left
+    # merges from the right. Straight maneuvers have no turn pairs
+    left = maneuver.modifier in LEFT_MODIFIERS
+    right = maneuver.modifier in RIGHT_MODIFIERS
+    merge = maneuver.type == ManeuverType.Merge
+    lanes = min(len(segment.lanelets), len(previous_segment.lanelets))
+
+    if left and not merge or right and merge:
+        return [(previous_segment.lanelets[i], segment.lanelets[i]) for i in range(lanes)]
+    if right and not merge or left and merge:
+        return [(previous_segment.lanelets[-(i + 1)], segment.lanelets[-(i + 1)]) for i in range(lanes)]
+    return []
+
+
+def get_straight_pairs(previous_segment: Segment,
+                       segment: Segment,
+                       has_incoming_connection: np.ndarray,
+                       has_outgoing_connection: np.ndarray) -> List[Tuple[Lanelet, Lanelet]]:
+    # Lanelets of a straight maneuver, preferring lanelets without connections of turns
+    lanelets_to = segment.lanelets
+    lanelets_from = previous_segment.lanelets
+    free_lanelets_to = [lanelet for lanelet in lanelets_to if not has_incoming_connection[lanelet.index]]
+    free_lanelets_from = [lanelet for lanelet in lanelets_from if not has_outgoing_connection[lanelet.index]]
+
+    if len(lanelets_to) == len(lanelets_from):
+        return list(zip(lanelets_from, lanelets_to))
+    if len(free_lanelets_to) == len(lanelets_from):
+        return list(zip(lanelets_from, free_lanelets_to))
+    if len(lanelets_to) == len(free_lanelets_from):
+        return list(zip(free_lanelets_from, lanelets_to))
+    # All lanelets of the previous segment already have connections, so they are connected by their lanes
+    if len(free_lanelets_from) == 0:
+        return [(lanelets_from[min(i, len(lanelets_from) - 1)], lanelet_to) for i, lanelet_to in enumerate(lanelets_to)]
+    if len(lanelets_to) > len(free_lanelets_from):
+        return [(free_lanelets_from[min(i, len(free_lanelets_from) - 1)], lanelet_to)
+                for i, lanelet_to in enumerate(lanelets_to)]
+    return [(lanelet_from, lanelets_to[min(i, len(lanelets_to) - 1)])
+            for i, lanelet_from in enumerate(free_lanelets_from)]
+
+
+def create_lanelet_topology(rp: RoutingProblem) -> LaneletTopology:
+    """
+    Connect lanelets of consecutive segments.
+
+    The first pass connects lanelets of turns from the inner side, see get_turn_pairs. The second pass connects
+    lanelets of straight maneuvers, preferring lanelets without connections, see get_straight_pairs.
+    """
+    has_incoming_connection = np.zeros(len(rp.lanelets), dtype=bool)
+    has_outgoing_connection = np.zeros(len(rp.lanelets), dtype=bool)
+    unique_connections: Dict[Tuple[int, int], Maneuver] = {}
+
+    # The first pass connects turns, the second pass straight maneuvers
+    for straight in (False, True):
+        for segment in rp.segments:
+            for previous_segment in segment.previous_segments:
+                maneuver = rp.maneuvers[(previous_segment.id, segment.id)]
+                if not straight:
+                    pairs = get_turn_pairs(previous_segment, segment, maneuver)
+                elif maneuver.modifier == ManeuverModifier.Straight:
+                    pairs = get_straight_pairs(previous_segment, segment, has_incoming_connection,
+                                               has_outgoing_connection)
+                else:
+                    continue
+
+                # Duplicates keep the maneuver of their first connection
+                for lanelet_from, lanelet_to in pairs:
+                    unique_connections.setdefault((lanelet_from.index, lanelet_to.index), maneuver)
+                    has_outgoing_connection[lanelet_from.index] = True
+                    has_incoming_connection[lanelet_to.index] = True
+
+    for lanelet in rp.lanelets:
+        lanelet.has_incoming_connection = bool(has_incoming_connection[lanelet.index])
+        lanelet.has_outgoing_connection = bool(has_outgoing_connection[lanelet.index])
+
+    # Sort connections by their source and target
+    keys = sorted(unique_connections)
+    sources = np.array([source for source, _ in keys], dtype=np.int64)
+    offsets = np.zeros(len(rp.lanelets) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(np.bincount(sources, minlength=len(rp.lanelets)))
+
+    return LaneletTopology(rp.lanelets,
+                           offsets,
+                           np.array([target for _, target in keys], dtype=np.int64),
+                           [unique_connections[key] for key in keys])
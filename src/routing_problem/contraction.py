@@ -0,0 +1,195 @@
+from typing import List, Dict
+
+from src.routing_problem.connections.complete import XGraphNode, SelfXGraphNode, FirstXGraphNode, LastXGraphNode
+from src.routing_problem.lanelet import Lanelet
+from src.routing_problem.maneuver.modifier import ManeuverModifier
+from src.routing_problem.routing_problem import RoutingProblem
+from src.routing_problem.segment import Segment
+
+
+class ChainContraction:
+    """
+    ChainContraction is a routing problem with chains of segments contracted to single segments.
+
+    A chain is a sequence of segments connected by straight maneuvers, in which every segment but the last has only one
+    next segment, every segment but the first has only one previous segment and all segments have the same number of
+    lanes. The order of lanelets inside a chain is forced, so every lane of a chain becomes one super-lanelet and the
+    straight maneuvers inside the chain disappear from the X-Graph.
+
+    Contracted segments have the id of the first segment of their chain. Solved orders of the contracted problem are
+    expanded back to lanelets of the original problem with expand_order and expand_x_graph_order.
+    """
+
+    def __init__(self,
+                 original: RoutingProblem,
+                 routing_problem: RoutingProblem,
+                 segment_chains: Dict[str, List[Segment]],
+                 lanelet_chains: List[List[Lanelet]]):
+        self.original: RoutingProblem = original
+        self.routing_problem: RoutingProblem = routing_problem
+
+        # Original segments of every contracted segment id
+        self.segment_chains: Dict[str, List[Segment]] = segment_chains
+        # Original lanelets of every contracted lanelet, in the order of routing_problem.lanelets
+        self.lanelet_chains: List[List[Lanelet]] = lanelet_chains
+
+    def contract_matrix(self, matrix: Dict[str, Dict[str, int]], x_graph: bool = False) -> Dict[str, Dict[str, int]]:
+        # Durations from the last segment of a chain to the first segment of another chain. X-Graph nodes start at the
+        # end of their lanelet_from, so for X-Graph durations lead to the last segment of a chain. Like in the original
+        # matrix, the duration of a chain to itself is the duration of a segment to itself
+        contracted_matrix = {}
+        for from_id, chain_from in self.segment_chains.items():
+            contracted_matrix[from_id] = {}
+            for to_id, chain_to in self.segment_chains.items():
+                target_id = chain_to[-1].id if x_graph else to_id
+                source_id = target_id if to_id == from_id else chain_from[-1].id
+                contracted_matrix[from_id][to_id] = matrix[source_id][target_id]
+
+        return contracted_matrix
+
+    def expand_order(self, order: List[Lanelet]) -> List[Lanelet]:
+        # Lanelets order of the original problem, FirstLanelet and LastLanelet are kept
+        expanded_order = []
+        for lanelet in order:
+            if lanelet.segment is None:
+                expanded_order.append(lanelet)
+            else:
+                expanded_order.extend(self.lanelet_chains[lanelet.index])
+
+        return expanded_order
+
+    def expand_x_graph_order(self, order: List[XGraphNode]) -> List[XGraphNode]:
+        # X-Graph order of the original problem with straight maneuvers inside chains, see format_x_graph_order
+        expanded_order = []
+        for node in order:
+            if isinstance(node, (FirstXGraphNode, LastXGraphNode)):
+                expanded_order.append(node)
+                continue
+
+            chain_to = self.lanelet_chains[node.lanelet_to.index]
+            if isinstance(node, SelfXGraphNode):
+                expanded_order.append(SelfXGraphNode(chain_to[0]))
+            else:
+                lanelet_from = self.lanelet_chains[node.lanelet_from.index][-1]
+                expanded_order.append(XGraphNode(lanelet_from=lanelet_from,
+                                                 lanelet_to=chain_to[0],
+                                                 maneuver=node.maneuver))
+
+            for lanelet_from, lanelet_to in zip(chain_to[:-1], chain_to[1:]):
+                expanded_order.append(XGraphNode(lanelet_from=lanelet_from,
+                                                 lanelet_to=lanelet_to,
+                                                 maneuver=self.original.maneuvers[(lanelet_from.segment.id,
+                                                                                   lanelet_to.segment.id)]))
+
+        return expanded_order
+
+
+def is_continuation(rp: RoutingProblem, previous_segment: Segment, segment: Segment) -> bool:
+    # Whether segment continues previous_segment straight with the same lanes and nothing else continues it
+    if previous_segment is segment or len(set(previous_segment.next_segments)) != 1 or \
+            previous_segment.lanes != segment.lanes:
+        return False
+
+    maneuver = rp.maneuvers.get((previous_segment.id, segment.id))
+    return maneuver is not None and maneuver.modifier == ManeuverModifier.Straight
+
+
+def find_chains(rp: RoutingProblem) -> List[List[Segment]]:
+    # Segments continuing their only previous segment, which has no other next segment. Segments without incoming
+    # maneuvers are SelfXGraphNode passlets in the X-Graph, which start at the beginning of their segment, so they
+    # aren't continued
+    continuations = set()
+    for segment in rp.segments:
+        previous_segments = list(dict.fromkeys(segment.previous_segments))
+        if len(previous_segments) != 1:
+            continue
+        previous_segment = previous_segments[0]
+        has_incoming_maneuvers = any((segment_from.id, previous_segment.id) in rp.maneuvers
+                                     for segment_from in previous_segment.previous_segments)
+        if has_incoming_maneuvers and is_continuation(rp, previous_segment, segment):
+            continuations.add(segment.id)
+
+    chains = []
+    visited = set()
+    # Chains start at segments that don't continue another segment. Segments left after that form cycles, which are
+    # broken at their first segment
+    starts = [segment for segment in rp.segments if segment.id not in continuations] + rp.segments
+    for segment in starts:
+        if segment.id in visited:
+            continue
+
+        chain = [segment]
+        visited.add(segment.id)
+        while len(chain[-1].next_segments) > 0 and chain[-1].next_segments[0].id in continuations and \
+                chain[-1].next_segments[0].id not in visited:
+            chain.append(chain[-1].next_segments[0])
+            visited.add(chain[-1].id)
+        chains.append(chain)
+
+    return chains
+
+
+def create_chain_segment(rp: RoutingProblem, chain: List[Segment], chain_ids: Dict[str, str]) -> Segment:
+    # Contracted segment of a chain without references to other contracted segments and without lanelets
+    first, last = chain[0], chain[-1]
+    nodes = list(first.nodes)
+    for chain_segment in chain[1:]:
+        # Consecutive segments share the junction node
+        same_position = chain_segment.nodes[0].position.latlon.lat == nodes[-1].position.latlon.lat and \
+                        chain_segment.nodes[0].position.latlon.lon == nodes[-1].position.latlon.lon
+        nodes.extend(chain_segment.nodes[1:] if same_position else chain_segment.nodes)
+
+    segment = Segment(segment_id=first.id,
+                      nodes=nodes,
+                      lanes=first.lanes,
+                      previous_segments_ids=[chain_ids.get(segment_id, segment_id)
+                                             for segment_id in first.previous_segment_ids],
+                      next_segment_ids=list(last.next_segment_ids),
+                      parts=sum(chain_segment.parts for chain_segment in chain),
+                      is_forward=first.is_forward,
+                      connected_component=first.connected_component,
+                      next_maneuvers={(first.id, to_id): maneuver
+                                      for (_, to_id), maneuver in last.next_maneuvers.items()})
+    segment.original_nodes = [node for chain_segment in chain for node in chain_segment.original_nodes]
+    segment.chain_maneuvers = [rp.maneuvers[(segment_from.id, segment_to.id)]
+                               for segment_from, segment_to in zip(chain[:-1], chain[1:])]
+    return segment
+
+
+def create_chain_lanelets(segment: Segment, chain: List[Segment]) -> List[List[Lanelet]]:
+    # Original lanelets of every lane of a chain, the contracted lanelets are added to the contracted segment
+    lanelet_chains = []
+    for lane in range(segment.lanes):
+        lanelet_chain = [chain_segment.lanelets[lane] for chain_segment in chain]
+        lanelet = Lanelet(nodes=[node for chain_lanelet in lanelet_chain for node in chain_lanelet.nodes],
+                          lane=lane,
+                          segment=segment)
+        lanelet.original_nodes = [node for chain_lanelet in lanelet_chain for node in chain_lanelet.original_nodes]
+        segment.lanelets.append(lanelet)
+        lanelet_chains.append(lanelet_chain)
+
+    return lanelet_chains
+
+
+def contract_chains(rp: RoutingProblem) -> ChainContraction:
+    """
+    Contract chains of segments and their lanelets, see ChainContraction.
+    """
+    chains = find_chains(rp)
+    chain_ids = {segment.id: chain[0].id for chain in chains for segment in chain}
+    segments = [create_chain_segment(rp, chain, chain_ids) for chain in chains]
+
+    # References between contracted segments
+    segments_dict = {segment.id: segment for segment in segments}
+    for segment, chain in zip(segments, chains):
+        segment.next_segments = [segments_dict[next_segment.id] for next_segment in chain[-1].next_segments]
+        segment.previous_segments = [segments_dict[chain_ids[previous_segment.id]]
+                                     for previous_segment in chain[0].previous_segments]
+
+    lanelet_chains: List[List[Lanelet]] = []
+    for segment, chain in zip(segments, chains):
+        lanelet_chains.extend(create_chain_lanelets(segment, chain))
+
+    lanelets = [lanelet for segment in segments for lanelet in segment.lanelets]
+    segment_chains = {segment.id: chain for segment, chain in zip(segments, chains)}
+    return ChainContraction(rp, RoutingProblem(lanelets, segments), segment_chains, lanelet_chains)
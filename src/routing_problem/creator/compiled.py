@@ -0,0 +1,171 @@
+import hashlib
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.abstract.figure_with_nodes import NodeCoordinates
+from src.osmio.arrays import write_arrays, read_arrays
+from src.routing_problem.creator.parser import RoutingProblemParser
+from src.routing_problem.lanelet import Lanelet
+from src.routing_problem.maneuver.maneuver import Maneuver
+from src.routing_problem.maneuver.maneuver_type import ManeuverType
+from src.routing_problem.maneuver.modifier import ManeuverModifier
+from src.routing_problem.routing_problem import RoutingProblem
+from src.routing_problem.segment import Segment
+
+# The version changes whenever the layout or the meaning of arrays changes, files of other versions are compiled again
+COMPILED_MAGIC = b"RPCACHE\0"
+COMPILED_VERSION = 1
+# The derivation version changes whenever parsing or lanelet creation derive other routing problems from the same source
+# file, it is part of the source hash, so that routing problems of other derivation versions are compiled again
+DERIVATION_VERSION = 1
+
+MANEUVER_TYPES = list(ManeuverType)
+MANEUVER_MODIFIERS = list(ManeuverModifier)
+
+
+def hash_source(path: str) -> str:
+    source_hash = hashlib.sha256(f"{DERIVATION_VERSION}\0".encode())
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            source_hash.update(chunk)
+    return source_hash.hexdigest()
+
+
+def get_offsets(lengths: List[int]) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(lengths)
+    return offsets
+
+
+def flatten(lists: List[List], dtype) -> Tuple[np.ndarray, np.ndarray]:
+    # CSR offsets and values of lists
+    values = [value for values in lists for value in values]
+    return get_offsets([len(values) for values in lists]), \
+        np.array(values, dtype=dtype) if len(values) > 0 else np.zeros(0, dtype=dtype)
+
+
+def compile_routing_problem(rp: RoutingProblem, path: str, source_hash: str):
+    """
+    Write a routing problem created by create_routing_problem to a compiled file.
+
+    Segments, lanelets and maneuvers are stored as NumPy arrays: segment attributes, CSR offsets and values of segment
+    nodes, segment references and maneuvers, and lanelet attributes with CSR offsets and values of UTM coordinates of
+    lanelets. The hash of the source file is stored, so that outdated files are recognized.
+    """
+    maneuvers = [maneuver for segment in rp.segments for maneuver in segment.next_maneuvers.values()]
+    node_offsets, latlons = flatten([segment.coordinates.get_latlons().tolist() for segment in rp.segments],
+                                    np.float64)
+    previous_offsets, previous_ids = flatten([segment.previous_segment_ids for segment in rp.segments], str)
+    next_offsets, next_ids = flatten([segment.next_segment_ids for segment in rp.segments], str)
+    maneuver_offsets = get_offsets([len(segment.next_maneuvers) for segment in rp.segments])
+    # Lanelets without coordinates are kept empty, see create_lanelets
+    lanelet_offsets, lanelet_utm = flatten([[] if lanelet.coordinates.utm is None else
+                                            lanelet.coordinates.get_utm().tolist() for lanelet in rp.lanelets],
+                                           np.float64)
+    segment_index = {segment.id: i for i, segment in enumerate(rp.segments)}
+
+    arrays = {
+        "segment_ids": np.array([segment.id for segment in rp.segments], dtype=str),
+        "segment_lanes": np.array([segment.lanes for segment in rp.segments], dtype=np.int64),
+        "segment_parts": np.array([segment.parts for segment in rp.segments], dtype=np.int64),
+        "segment_is_forward": np.array([segment.is_forward for segment in rp.segments], dtype=bool),
+        "segment_components": np.array([segment.connected_component for segment in rp.segments], dtype=str),
+        "segment_node_offsets": node_offsets,
+        "segment_latlons": latlons.reshape(-1, 2),
+        "previous_segment_offsets": previous_offsets,
+        "previous_segment_ids": previous_ids,
+        "next_segment_offsets": next_offsets,
+        "next_segment_ids": next_ids,
+        "maneuver_offsets": maneuver_offsets,
+        "maneuver_from_ids": np.array([maneuver.from_id for maneuver in maneuvers], dtype=str),
+        "maneuver_to_ids": np.array([maneuver.to_id for maneuver in maneuvers], dtype=str),
+        "maneuver_in_angles": np.array([maneuver.in_angle for maneuver in maneuvers]),
+        "maneuver_turn_angles": np.array([maneuver.turn_angle for maneuver in maneuvers]),
+        "maneuver_durations": np.array([maneuver.duration for maneuver in maneuvers]),
+        "maneuver_weights": np.array([maneuver.weight for maneuver in maneuvers]),
+        "maneuver_types": np.array([MANEUVER_TYPES.index(maneuver.type) for maneuver in maneuvers], dtype=np.int64),
+        "maneuver_modifiers": np.array([MANEUVER_MODIFIERS.index(maneuver.modifier) for maneuver in maneuvers],
+                                       dtype=np.int64),
+        "lanelet_segments": np.array([segment_index[lanelet.segment.id] for lanelet in rp.lanelets], dtype=np.int64),
+        "lanelet_lanes": np.array([lanelet.lane for lanelet in rp.lanelets], dtype=np.int64),
+        "lanelet_has_coordinates": np.array([lanelet.coordinates.utm is not None for lanelet in rp.lanelets],
+                                            dtype=bool),
+        "lanelet_node_offsets": lanelet_offsets,
+        "lanelet_utm": lanelet_utm.reshape(-1, 2),
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    write_arrays(path, arrays, {"source_hash": source_hash}, COMPILED_MAGIC, COMPILED_VERSION)
+
+
+def load_routing_problem(path: str, source_hash: Optional[str] = None) -> Optional[RoutingProblem]:
+    """
+    Load a compiled routing problem, see compile_routing_problem. Coordinates stay memory mapped and nodes are created
+    on first access.
+
+    Returns None for files of other versions or other source files.
+    """
+    compiled = read_arrays(path, COMPILED_MAGIC, COMPILED_VERSION)
+    if compiled is None:
+        return None
+    arrays, metadata = compiled
+    if source_hash is not None and metadata["source_hash"] != source_hash:
+        return None
+
+    def split(name: str, offsets: np.ndarray) -> List:
+        values = arrays[name].tolist()
+        return [values[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    node_offsets = arrays["segment_node_offsets"].tolist()
+    maneuver_offsets = arrays["maneuver_offsets"].tolist()
+    previous_ids = split("previous_segment_ids", arrays["previous_segment_offsets"].tolist())
+    next_ids = split("next_segment_ids", arrays["next_segment_offsets"].tolist())
+    maneuvers = [Maneuver(from_id=from_id,
+                          to_id=to_id,
+                          in_angle=in_angle,
+                          turn_angle=turn_angle,
+                          duration=duration,
+                          weight=weight,
+                          maneuver_type=MANEUVER_TYPES[maneuver_type],
+                          modifier=MANEUVER_MODIFIERS[modifier])
+                 for from_id, to_id, in_angle, turn_angle, duration, weight, maneuver_type, modifier in
+                 zip(arrays["maneuver_from_ids"].tolist(), arrays["maneuver_to_ids"].tolist(),
+                     arrays["maneuver_in_angles"].tolist(), arrays["maneuver_turn_angles"].tolist(),
+                     arrays["maneuver_durations"].tolist(), arrays["maneuver_weights"].tolist(),
+                     arrays["maneuver_types"].tolist(), arrays["maneuver_modifiers"].tolist())]
+
+    segments = []
+    for i, (segment_id, lanes, parts, is_forward, connected_component) in enumerate(zip(
+            arrays["segment_ids"].tolist(), arrays["segment_lanes"].tolist(), arrays["segment_parts"].tolist(),
+            arrays["segment_is_forward"].tolist(), arrays["segment_components"].tolist())):
+        segment = Segment(segment_id=segment_id,
+                          nodes=[],
+                          lanes=lanes,
+                          previous_segments_ids=previous_ids[i],
+                          next_segment_ids=next_ids[i],
+                          parts=parts,
+                          is_forward=is_forward,
+                          connected_component=connected_component,
+                          next_maneuvers={(maneuver.from_id, maneuver.to_id): maneuver for maneuver in
+                                          maneuvers[maneuver_offsets[i]:maneuver_offsets[i + 1]]})
+        segment.set_coordinates(NodeCoordinates.from_latlons(
+            arrays["segment_latlons"][node_offsets[i]:node_offsets[i + 1]]))
+        segments.append(segment)
+    RoutingProblemParser.add_references(segments)
+
+    lanelets = []
+    lanelet_offsets = arrays["lanelet_node_offsets"].tolist()
+    for i, (segment, lane, has_coordinates) in enumerate(zip(arrays["lanelet_segments"].tolist(),
+                                                             arrays["lanelet_lanes"].tolist(),
+                                                             arrays["lanelet_has_coordinates"].tolist())):
+        lanelet = Lanelet(nodes=None, lane=lane, segment=segments[segment])
+        if has_coordinates:
+            lanelet.set_coordinates(NodeCoordinates.from_utm(
+                arrays["lanelet_utm"][lanelet_offsets[i]:lanelet_offsets[i + 1]],
+                segments[segment].coordinates.get_zone_latlon()))
+        lanelets.append(lanelet)
+        segments[segment].lanelets.append(lanelet)
+
+    return RoutingProblem(lanelets, segments)
@@ -1,13 +1,26 @@
+import os
 from typing import List
 
-from src.geometry.geometry import offset_nodes
+from src.abstract.figure_with_nodes import NodeCoordinates
+from src.config.config import ROUTING_PROBLEM_CACHE_PATH
+from src.geometry.geometry import offset_lines
+from src.routing_problem.creator.compiled import hash_source, load_routing_problem, compile_routing_problem
 from src.routing_problem.creator.parser import RoutingProblemParser
 from src.routing_problem.lanelet import Lanelet
 from src.routing_problem.routing_problem import RoutingProblem
 from src.routing_problem.segment import Segment
 
 
-def create_routing_problem(path: str) -> RoutingProblem:
+def create_routing_problem(path: str, use_cache: bool = True) -> RoutingProblem:
+    # Compiled routing problems are reused until the source file changes, see compile_routing_problem
+    if use_cache:
+        source_hash = hash_source(path)
+        compiled_path = os.path.join(ROUTING_PROBLEM_CACHE_PATH, f"{source_hash}.rp")
+        if os.path.exists(compiled_path):
+            rp = load_routing_problem(compiled_path, source_hash)
+            if rp is not None:
+                return rp
+
     # Parse routing problem
     parser = RoutingProblemParser(path)
     segments = parser.parse()
@@ -15,20 +28,26 @@ def create_routing_problem(path: str) -> RoutingProblem:
     # Create lanelets by expanding segments
     lanelets = create_lanelets(segments)
 
-    return RoutingProblem(lanelets, segments)
+    rp = RoutingProblem(lanelets, segments)
+    if use_cache:
+        compile_routing_problem(rp, compiled_path, source_hash)
+
+    return rp
 
 
 def create_lanelets(rp_segments: List[Segment]) -> List[Lanelet]:
     lanelets = []
 
-    # Expand RP segments into lanelets
-    for segment in rp_segments:
-        for i in range(segment.lanes):
-            lanelet = Lanelet(nodes=offset_nodes(nodes=segment.nodes,
-                                                 distance=1.5 * (i + 1)),
-                              lane=i,
-                              segment=segment)
-            lanelets.append(lanelet)
-            segment.lanelets.append(lanelet)
+    # Expand RP segments into lanelets. Lanes of all segments are offset at once in UTM coordinates of segments,
+    # lanelet nodes are only created when they are needed
+    lanes = [(segment, i) for segment in rp_segments for i in range(segment.lanes)]
+    offsets = offset_lines([segment.coordinates.get_utm() for segment, _ in lanes],
+                           [1.5 * (i + 1) for _, i in lanes])
+    for (segment, i), offset in zip(lanes, offsets):
+        lanelet = Lanelet(nodes=None, lane=i, segment=segment)
+        if offset is not None:
+            lanelet.set_coordinates(NodeCoordinates.from_utm(offset, segment.coordinates.get_zone_latlon()))
+        lanelets.append(lanelet)
+        segment.lanelets.append(lanelet)
 
     return lanelets
@@ -1,28 +1,24 @@
-import json
-from typing import Dict, List, Tuple
-
-from src.geo.geo import Node, Position, LatLon
-from src.osmio.parser import find_osm_nodes_and_ways
-from src.routing_problem.maneuver.maneuver import Maneuver
-from src.routing_problem.maneuver.maneuver_type import ManeuverType
-from src.routing_problem.maneuver.modifier import ManeuverModifier
+from typing import Dict, List, Iterable
+
+from src.abstract.figure_with_nodes import NodeCoordinates
+from src.osmio.parser import iterate_osm_ways
 from src.routing_problem.segment import Segment
 
 
 class RoutingProblemParser:
     """
     RoutingProblemParser parses routing problems from .osm files.
+
+    Nodes and next maneuvers of segments are kept as raw JSON and decoded on first access, so topology-only workflows
+    don't decode them. See decode_maneuver_table for decoding maneuvers of many segments at once.
     """
 
     def __init__(self, path: str):
         self.path: str = path
 
     def parse(self) -> List[Segment]:
-        with open(self.path) as f:
-            source = f.read()
-
-        _, ways = find_osm_nodes_and_ways(source)
-        segments = self.create_segments(ways)
+        # Segment nodes are way attributes, OSM nodes aren't needed
+        segments = self.create_segments(iterate_osm_ways(self.path))
         self.check_geometry(segments)
         self.add_references(segments)
 
@@ -34,7 +30,7 @@ class RoutingProblemParser:
 
         for geometry in geometries:
             # Remove empty geometries
-            if len(geometry.nodes) == 0:
+            if geometry.coordinates.is_empty():
                 to_remove.append(geometry)
 
         for geometry in to_remove:
@@ -53,22 +49,21 @@ class RoutingProblemParser:
                 if previous_segment_id in segments_dict:
                     segment.previous_segments.append(segments_dict[previous_segment_id])
 
-    def create_segments(self, ways: Dict) -> List[Segment]:
+    def create_segments(self, ways: Iterable[Dict]) -> List[Segment]:
         segments = []
-        for way in ways.values():
+        for way in ways:
             if "type" in way['attributes']:
                 if way['attributes']['type'] == "segment":
-                    if 'nodes' in way['attributes']:
-                        nodes = [Node(Position(LatLon(lat=node[0], lon=node[1]))) for node in
-                                 json.loads(way['attributes']['nodes'])]
-                    else:
+                    if 'nodes' not in way['attributes']:
                         raise Exception(f"No nodes attribute for way: {way}")
 
-                    segment_id, lanes, previous_segments, next_segments, parts, is_forward, connected_component, \
-                    next_maneuvers = self.create_segment_attributes(way['attributes'])
+                    segment_id, lanes, previous_segments, next_segments, parts, is_forward, connected_component = \
+                        self.create_segment_attributes(way['attributes'])
 
-                    segment = Segment(segment_id, nodes, lanes, previous_segments, next_segments, parts,
-                                      is_forward, connected_component, next_maneuvers)
+                    segment = Segment(segment_id, None, lanes, previous_segments, next_segments, parts,
+                                      is_forward, connected_component, None)
+                    segment.set_coordinates(NodeCoordinates.from_json(way['attributes']['nodes']))
+                    segment.set_next_maneuvers_json(way['attributes']['next_maneuvers'])
                     segments.append(segment)
             else:
                 raise Exception(f"No type specified for way: {way}")
@@ -86,26 +81,5 @@ class RoutingProblemParser:
         parts = int(attributes['parts'])
         is_forward = attributes['is_forward'] == "true"
         connected_component = attributes['component_id']
-        next_maneuvers = json.loads(attributes['next_maneuvers'])
-        next_maneuvers = self.parse_next_maneuvers(next_maneuvers)
 
-        return segment_id, lanes, previous_segments, next_segments, parts, is_forward, connected_component, \
-               next_maneuvers
-
-    @staticmethod
-    def parse_next_maneuvers(next_maneuvers: Dict) -> Dict[Tuple[str, str], Maneuver]:
-        parsed_maneuvers = {}
-        for maneuver in next_maneuvers:
-            maneuver_type = ManeuverType(maneuver['type'])
-            modifier = ManeuverModifier(maneuver['modifier'])
-
-            parsed_maneuvers[(maneuver['from']), (maneuver['to'])] = Maneuver(from_id=maneuver['from'],
-                                                                              to_id=maneuver['to'],
-                                                                              in_angle=maneuver['in_angle'],
-                                                                              turn_angle=maneuver['turn_angle'],
-                                                                              duration=maneuver['duration'],
-                                                                              weight=maneuver['weight'],
-                                                                              maneuver_type=maneuver_type,
-                                                                              modifier=modifier)
-
-        return parsed_maneuvers
+        return segment_id, lanes, previous_segments, next_segments, parts, is_forward, connected_component
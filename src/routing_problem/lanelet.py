@@ -4,7 +4,7 @@ from geojson import LineString, Feature
 
 from src.abstract.figure_with_nodes import FigureWithNodes
 from src.abstract.serialisable import Serialisable
-from src.config.config import OPTIMISER_INFINITY
+from src.config.config import OPTIMISER_INFINITY, MISSING_CONNECTION_PENALTY
 from src.geo.geo import Node
 from src.routing_problem.segment import Segment
 
@@ -27,12 +27,19 @@ class Lanelet(FigureWithNodes, Serialisable):
         self.has_incoming_connection: bool = False
         self.has_outgoing_connection: bool = False
 
+        # Position in RoutingProblem.lanelets
+        self.index: Optional[int] = None
+
     def __str__(self):
         return f"Lanelet {self.segment.id} {self.lane}/{self.segment.lanes}"
 
     def __repr__(self):
         return self.__str__()
 
+    def get_key(self) -> str:
+        # Identifier that stays the same when the routing problem is created again
+        return f"{self.segment.id}/{self.lane}"
+
     def to_json(self):
         return Feature(geometry=LineString(coordinates=self.get_coordinates_list(reverse_lat_lon=True)),
                        properties={
@@ -56,7 +63,7 @@ class Lanelet(FigureWithNodes, Serialisable):
 
         # For lane topology approach
         if check_topology:
-            # If pair is connected, check lanelet connections
+            # If pair is connected, check lanelet connections, a set of lanelet pairs or a LaneletTopology
             if lanelet.segment.id in self.segment.next_segment_ids:
                 if (self, lanelet) in lanelet_connections:
                     return 0
@@ -68,7 +75,7 @@ class Lanelet(FigureWithNodes, Serialisable):
 
             # Penalize for not choosing an existing connection
             if self.has_outgoing_connection:
-                return matrix[self.segment.id][lanelet.segment.id] + 300
+                return matrix[self.segment.id][lanelet.segment.id] + MISSING_CONNECTION_PENALTY
 
         return matrix[self.segment.id][lanelet.segment.id]
 
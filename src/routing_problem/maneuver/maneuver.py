@@ -1,3 +1,6 @@
+import json
+from typing import Dict, Tuple, List
+
 from src.routing_problem.maneuver.maneuver_type import ManeuverType
 from src.routing_problem.maneuver.modifier import ManeuverModifier
 
@@ -28,3 +31,24 @@ class Maneuver:
         self.weight: int = weight
         self.type: ManeuverType = maneuver_type
         self.modifier: ManeuverModifier = modifier
+
+
+def create_maneuvers(maneuvers: List[Dict]) -> Dict[Tuple[str, str], "Maneuver"]:
+    # Maneuvers of the next_maneuvers attribute of a segment way
+    created_maneuvers = {}
+    for maneuver in maneuvers:
+        created_maneuvers[(maneuver['from'], maneuver['to'])] = Maneuver(
+            from_id=maneuver['from'],
+            to_id=maneuver['to'],
+            in_angle=maneuver['in_angle'],
+            turn_angle=maneuver['turn_angle'],
+            duration=maneuver['duration'],
+            weight=maneuver['weight'],
+            maneuver_type=ManeuverType(maneuver['type']),
+            modifier=ManeuverModifier(maneuver['modifier']))
+
+    return created_maneuvers
+
+
+def decode_maneuvers(maneuvers_json: str) -> Dict[Tuple[str, str], "Maneuver"]:
+    return create_maneuvers(json.loads(maneuvers_json))
@@ -0,0 +1,102 @@
+from itertools import product
+from typing import Optional, Tuple, Dict, Set, List
+
+import numpy as np
+
+from src.routing_problem.maneuver.maneuver import Maneuver
+from src.routing_problem.maneuver.maneuver_type import ManeuverType
+from src.routing_problem.maneuver.modifier import ManeuverModifier
+
+# Maneuver class 0 is for passlets without a maneuver, see SelfXGraphNode
+NO_MANEUVER = 0
+MANEUVER_CLASSES: Dict[Tuple[ManeuverType, ManeuverModifier], int] = {
+    maneuver: i + 1 for i, maneuver in enumerate(product(ManeuverType, ManeuverModifier))}
+MANEUVER_CLASSES_NUMBER = len(MANEUVER_CLASSES) + 1
+
+# (ManeuverType, ManeuverModifier) pattern of maneuvers, None matches every type or modifier
+ManeuverPattern = Tuple[Optional[ManeuverType], Optional[ManeuverModifier]]
+
+
+def get_maneuver_class(maneuver: Optional[Maneuver]) -> int:
+    if maneuver is None:
+        return NO_MANEUVER
+    return MANEUVER_CLASSES[(maneuver.type, maneuver.modifier)]
+
+
+def get_pattern_classes(pattern: ManeuverPattern) -> List[int]:
+    maneuver_type, modifier = pattern
+    return [maneuver_class for (class_type, class_modifier), maneuver_class in MANEUVER_CLASSES.items()
+            if maneuver_type in (None, class_type) and modifier in (None, class_modifier)]
+
+
+class ManeuverPenalties:
+    """
+    ManeuverPenalties are penalties of consecutive maneuvers in the X-Graph.
+
+    Maneuvers are classified by their (ManeuverType, ManeuverModifier) pairs, see get_maneuver_class. Second-order
+    penalties of maneuver pairs are a dense table indexed by maneuver classes. Third-order penalties of maneuver
+    triples, e.g. leaving a highway and entering it again, are sparse. They are only paid in the higher-order X-Graph,
+    see build_higher_order_x_graph.
+    """
+
+    def __init__(self):
+        self.table: np.ndarray = np.zeros((MANEUVER_CLASSES_NUMBER, MANEUVER_CLASSES_NUMBER), dtype=np.int64)
+        self.third_order_penalties: Dict[Tuple[int, int, int], int] = {}
+
+        # Pairs of maneuver classes starting a third-order penalty
+        self.third_order_prefixes: Set[Tuple[int, int]] = set()
+
+        # Flat copy for single penalty lookups
+        self.table_list: List[List[int]] = self.table.tolist()
+
+    @classmethod
+    def from_straight_penalties(cls,
+                                straight_non_straight_maneuver_penalty: int,
+                                non_straight_straight_maneuver_penalty: int) -> "ManeuverPenalties":
+        # Penalties for changing between straight and non-straight maneuvers of any type
+        penalties = cls()
+        for modifier in ManeuverModifier:
+            if modifier != ManeuverModifier.Straight:
+                penalties.set_penalty((None, ManeuverModifier.Straight), (None, modifier),
+                                      straight_non_straight_maneuver_penalty)
+                penalties.set_penalty((None, modifier), (None, ManeuverModifier.Straight),
+                                      non_straight_straight_maneuver_penalty)
+
+        return penalties
+
+    def set_penalty(self, maneuver_from: ManeuverPattern, maneuver_to: ManeuverPattern, penalty: int):
+        self.table[np.ix_(get_pattern_classes(maneuver_from), get_pattern_classes(maneuver_to))] = penalty
+        self.table_list = self.table.tolist()
+
+    def set_third_order_penalty(self,
+                                first: ManeuverPattern,
+                                second: ManeuverPattern,
+                                third: ManeuverPattern,
+                                penalty: int):
+        for classes in product(get_pattern_classes(first), get_pattern_classes(second), get_pattern_classes(third)):
+            self.third_order_penalties[classes] = penalty
+            self.third_order_prefixes.add(classes[:2])
+
+    def has_third_order_penalties(self) -> bool:
+        return len(self.third_order_penalties) > 0
+
+    def get_penalty(self, class_from: int, class_to: int) -> int:
+        return self.table_list[class_from][class_to]
+
+    def get_third_order_penalty(self, first_class: int, second_class: int, third_class: int) -> int:
+        return self.third_order_penalties.get((first_class, second_class, third_class), 0)
+
+    def get_third_order_row(self, first_class: int, second_class: int) -> np.ndarray:
+        # Third-order penalties of all maneuver classes following two maneuvers
+        row = np.zeros(MANEUVER_CLASSES_NUMBER, dtype=np.int64)
+        for (first, second, third), penalty in self.third_order_penalties.items():
+            if first == first_class and second == second_class:
+                row[third] = penalty
+        return row
+
+    def get_prefixes_table(self) -> np.ndarray:
+        # Whether a pair of maneuver classes starts a third-order penalty
+        prefixes_table = np.zeros((MANEUVER_CLASSES_NUMBER, MANEUVER_CLASSES_NUMBER), dtype=bool)
+        for first, second in self.third_order_prefixes:
+            prefixes_table[first, second] = True
+        return prefixes_table
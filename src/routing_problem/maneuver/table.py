@@ -0,0 +1,61 @@
+import json
+from typing import List
+
+import numpy as np
+
+from src.routing_problem.segment import Segment
+
+
+class ManeuverTable:
+    """
+    ManeuverTable holds the next maneuvers of a list of segments as NumPy columns, one row per maneuver.
+
+    Segments are referenced by their index in the list of segments, maneuvers to segments outside of the list, e.g. of
+    a partial map, have to_indices of -1. Types and modifiers are the OSRM codes of ManeuverType and ManeuverModifier.
+    """
+
+    def __init__(self,
+                 from_indices: np.ndarray,
+                 to_indices: np.ndarray,
+                 types: np.ndarray,
+                 modifiers: np.ndarray,
+                 durations: np.ndarray,
+                 weights: np.ndarray):
+        self.from_indices: np.ndarray = from_indices
+        self.to_indices: np.ndarray = to_indices
+        self.types: np.ndarray = types
+        self.modifiers: np.ndarray = modifiers
+        self.durations: np.ndarray = durations
+        self.weights: np.ndarray = weights
+
+    def __len__(self) -> int:
+        return len(self.from_indices)
+
+
+def decode_maneuver_table(segments: List[Segment]) -> ManeuverTable:
+    """
+    Decode next maneuvers of segments to a ManeuverTable without creating Maneuver objects.
+
+    The raw JSON of all parsed segments is decoded in one pass and stays raw on the segments. Segments whose maneuvers
+    are already decoded are read from their maneuvers. Rows are in the order of segments.
+    """
+    segment_index = {segment.id: i for i, segment in enumerate(segments)}
+    raw_maneuvers = [segment.next_maneuvers_json for segment in segments if segment.next_maneuvers_json is not None]
+    decoded_maneuvers = iter(json.loads(f"[{','.join(raw_maneuvers)}]"))
+
+    rows = []
+    for segment in segments:
+        if segment.next_maneuvers_json is not None:
+            rows.extend((maneuver['from'], maneuver['to'], maneuver['type'], maneuver['modifier'],
+                         maneuver['duration'], maneuver['weight']) for maneuver in next(decoded_maneuvers))
+        else:
+            rows.extend((maneuver.from_id, maneuver.to_id, maneuver.type.value, maneuver.modifier.value,
+                         maneuver.duration, maneuver.weight) for maneuver in segment.next_maneuvers.values())
+
+    from_ids, to_ids, types, modifiers, durations, weights = zip(*rows) if len(rows) > 0 else ([],) * 6
+    return ManeuverTable(np.array([segment_index.get(from_id, -1) for from_id in from_ids], dtype=np.int64),
+                         np.array([segment_index.get(to_id, -1) for to_id in to_ids], dtype=np.int64),
+                         np.array(types, dtype=np.int64),
+                         np.array(modifiers, dtype=np.int64),
+                         np.array(durations, dtype=np.int64),
+                         np.array(weights, dtype=np.int64))
@@ -1,14 +1,20 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+
+import numpy as np
 
 from geojson import FeatureCollection
 from mapboxgl import LinestringViz
 
+from src.abstract.figure_with_nodes import NodeCoordinates
 from src.abstract.serialisable import Serialisable
+from src.config.config import LANELET_CUTS
 from src.config.map import satellite_style
-from src.geometry.geometry import shorten_line
+from src.geo.geo import LatLon
+from src.geometry.geometry import cut_lines
 from src.routing_problem.lanelet import Lanelet
 from src.routing_problem.maneuver.maneuver import Maneuver
 from src.routing_problem.segment import Segment
+from src.routing_problem.spatial_index import SpatialIndex
 
 
 class RoutingProblem(Serialisable):
@@ -21,41 +27,72 @@ class RoutingProblem(Serialisable):
     def __init__(self, lanelets: List[Lanelet], segments: List[Segment]):
         self.lanelets: List[Lanelet] = lanelets
         self.segments: List[Segment] = segments
+        for i, lanelet in enumerate(lanelets):
+            lanelet.index = i
 
         # Generated attributes
         self.center: List[float] = self.calculate_center_coordinates(segments)
-        self.maneuvers: Dict[Tuple[str, str], Maneuver] = self.create_maneuvers()
         self.average_branching_factor: float = self.calculate_average_branching_factor()
         self.nbg_nodes_number: int = self.calculate_nbg_nodes_number()
 
+        # Maneuvers of all segments, decoded on first use
+        self.maneuvers_dict: Optional[Dict[Tuple[str, str], Maneuver]] = None
+
+        # Spatial indices, built on first use
+        self.segments_index: Optional[SpatialIndex[Segment]] = None
+        self.lanelets_index: Optional[SpatialIndex[Lanelet]] = None
+
     def to_json(self):
         return [lanelet.to_json() for lanelet in self.lanelets]
 
     @staticmethod
     def calculate_center_coordinates(segments: List[Segment]) -> List[float]:
-        nodes = [node for segment in segments for node in segment.nodes]
-        east = max(nodes, key=lambda node: node.position.latlon.lon)
-        west = min(nodes, key=lambda node: node.position.latlon.lon)
-        north = max(nodes, key=lambda node: node.position.latlon.lat)
-        south = min(nodes, key=lambda node: node.position.latlon.lat)
+        latlons = np.concatenate([segment.coordinates.get_latlons() for segment in segments])
+        south, west = latlons.min(axis=0)
+        north, east = latlons.max(axis=0)
+
+        return [float(east + west) / 2, float(north + south) / 2]
+
+    @property
+    def maneuvers(self) -> Dict[Tuple[str, str], Maneuver]:
+        if self.maneuvers_dict is None:
+            self.maneuvers_dict = self.create_maneuvers()
+        return self.maneuvers_dict
+
+    def get_segments_index(self) -> SpatialIndex[Segment]:
+        if self.segments_index is None:
+            self.segments_index = SpatialIndex(self.segments, LatLon(lat=self.center[1], lon=self.center[0]))
+        return self.segments_index
 
-        return [(east.position.latlon.lon + west.position.latlon.lon) / 2,
-                (north.position.latlon.lat + south.position.latlon.lat) / 2]
+    def get_lanelets_index(self) -> SpatialIndex[Lanelet]:
+        # Index of current lanelet nodes, it's built again after lanelets are shortened
+        if self.lanelets_index is None:
+            self.lanelets_index = SpatialIndex(self.lanelets, LatLon(lat=self.center[1], lon=self.center[0]))
+        return self.lanelets_index
 
     def shorten_lanelets(self):
+        # Cut both ends of lanelets depending on their length, all lanelets at once
+        lanelets, starts, ends = [], [], []
         for lanelet in self.lanelets:
-            if lanelet.get_length() > 50:
-                lanelet.nodes = shorten_line(lanelet.nodes, 12, cut_beginning=True)
-                lanelet.nodes = shorten_line(lanelet.nodes, 20, cut_beginning=False)
-            elif lanelet.get_length() > 30:
-                lanelet.nodes = shorten_line(lanelet.nodes, 5, cut_beginning=True)
-                lanelet.nodes = shorten_line(lanelet.nodes, 5, cut_beginning=False)
-            elif lanelet.get_length() > 10:
-                lanelet.nodes = shorten_line(lanelet.nodes, 3, cut_beginning=True)
-                lanelet.nodes = shorten_line(lanelet.nodes, 3, cut_beginning=False)
-            elif lanelet.get_length() > 5:
-                lanelet.nodes = shorten_line(lanelet.nodes, 1, cut_beginning=True)
-                lanelet.nodes = shorten_line(lanelet.nodes, 1, cut_beginning=False)
+            length = lanelet.get_length()
+            for min_length, start_cut, end_cut in LANELET_CUTS:
+                if length > min_length:
+                    lanelets.append(lanelet)
+                    starts.append(start_cut)
+                    ends.append(lanelet.coordinates.get_length() - end_cut)
+                    break
+
+        if len(lanelets) == 0:
+            return
+
+        lines = cut_lines([lanelet.coordinates.get_utm() for lanelet in lanelets],
+                          [lanelet.coordinates.get_cumulative_lengths() for lanelet in lanelets],
+                          starts,
+                          ends)
+        for lanelet, line in zip(lanelets, lines):
+            # Original nodes keep their coordinates
+            lanelet.coordinates = NodeCoordinates.from_utm(line, lanelet.coordinates.get_zone_latlon())
+        self.lanelets_index = None
 
     def create_maneuvers(self) -> Dict[Tuple[str, str], Maneuver]:
         maneuvers = {}
@@ -87,7 +124,6 @@ class RoutingProblem(Serialisable):
     def calculate_nbg_nodes_number(self) -> int:
         nodes_count = 0
         for lanelet in self.lanelets:
-            for _ in lanelet.segment.nodes:
-                nodes_count += 1
+            nodes_count += len(lanelet.segment.coordinates.get_latlons())
 
         return nodes_count
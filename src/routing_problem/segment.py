@@ -1,8 +1,8 @@
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 
 from src.abstract.figure_with_nodes import FigureWithNodes
 from src.geo.geo import Node
-from src.routing_problem.maneuver.maneuver import Maneuver
+from src.routing_problem.maneuver.maneuver import Maneuver, decode_maneuvers
 
 
 class Segment(FigureWithNodes):
@@ -13,6 +13,9 @@ class Segment(FigureWithNodes):
     Segments are an internal data structure of OSRM and are created with the help of Atlatec's proprietary OSRM fork.
 
     See: https://github.com/Project-OSRM/osrm-backend/wiki/Graph-representation
+
+    Parsed segments keep the raw JSON of their nodes and next maneuvers, which are decoded on first access, see
+    set_next_maneuvers_json and NodeCoordinates.from_json.
     """
 
     def __init__(self,
@@ -33,13 +36,33 @@ class Segment(FigureWithNodes):
         self.parts: int = parts
         self.is_forward: bool = is_forward
         self.connected_component: str = connected_component
-        self.next_maneuvers: Dict[Tuple[str, str], Maneuver] = next_maneuvers
+        self.next_maneuvers = next_maneuvers
 
         self.next_segments: List[Segment] = []
         self.previous_segments: List[Segment] = []
 
         self.lanelets: List = []
 
+        # Maneuvers inside a contracted chain of segments, see ChainContraction
+        self.chain_maneuvers: List[Maneuver] = []
+
+    @property
+    def next_maneuvers(self) -> Dict[Tuple[str, str], Maneuver]:
+        if self.next_maneuvers_dict is None:
+            self.next_maneuvers_dict = decode_maneuvers(self.next_maneuvers_json)
+            self.next_maneuvers_json = None
+        return self.next_maneuvers_dict
+
+    @next_maneuvers.setter
+    def next_maneuvers(self, next_maneuvers: Dict[Tuple[str, str], Maneuver]):
+        self.next_maneuvers_dict: Optional[Dict[Tuple[str, str], Maneuver]] = next_maneuvers
+        self.next_maneuvers_json: Optional[str] = None
+
+    def set_next_maneuvers_json(self, next_maneuvers_json: str):
+        # Replace next maneuvers by the next_maneuvers attribute of a segment way
+        self.next_maneuvers_dict = None
+        self.next_maneuvers_json = next_maneuvers_json
+
     def __str__(self):
         return f"Segment {self.id}"
 
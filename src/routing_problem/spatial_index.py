@@ -0,0 +1,59 @@
+from typing import List, Generic, TypeVar, Optional
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+from src.abstract.figure_with_nodes import FigureWithNodes
+from src.geo.geo import LatLon
+from src.geometry.geometry import project_latlons
+
+Figure = TypeVar("Figure", bound=FigureWithNodes)
+
+
+class SpatialIndex(Generic[Figure]):
+    """
+    SpatialIndex is an STRtree over geometries of figures, e.g. segments or lanelets of a routing problem.
+
+    Geometries are projected to the UTM zone of zone_latlon, so that distances are in meters. Queries take lat, lon
+    coordinates and return figures.
+    """
+
+    def __init__(self, figures: List[Figure], zone_latlon: LatLon):
+        self.figures: List[Figure] = figures
+        self.zone_latlon: LatLon = zone_latlon
+
+        geometries = []
+        for figure in figures:
+            coordinates = self.project(figure.coordinates.get_latlons())
+            geometries.append(shapely.linestrings(coordinates) if len(coordinates) > 1 else
+                              shapely.points(coordinates[0]) if len(coordinates) == 1 else shapely.Point())
+        self.tree: STRtree = STRtree(geometries)
+
+    def project(self, latlons: np.ndarray) -> np.ndarray:
+        return project_latlons(np.asarray(latlons, dtype=np.float64).reshape(-1, 2), self.zone_latlon)
+
+    def query_bbox(self, south: float, west: float, north: float, east: float) -> List[Figure]:
+        # Figures intersecting a lat, lon bounding box
+        corners = self.project([[south, west], [south, east], [north, east], [north, west]])
+        indices = self.tree.query(shapely.polygons(corners), predicate="intersects")
+        return [self.figures[i] for i in np.sort(indices).tolist()]
+
+    def query_radius(self, lat: float, lon: float, radius: float) -> List[Figure]:
+        # Figures within a radius in meters from a point, nearest first
+        point = shapely.points(self.project([lat, lon])[0])
+        indices = self.tree.query(point, predicate="dwithin", distance=radius)
+        distances = shapely.distance(self.tree.geometries[indices], point)
+        return [self.figures[i] for i in indices[np.argsort(distances, kind="stable")].tolist()]
+
+    def nearest(self, lat: float, lon: float) -> Optional[Figure]:
+        # Nearest figure of a point, None if the index is empty
+        index = self.tree.nearest(shapely.points(self.project([lat, lon])[0]))
+        return None if index is None else self.figures[int(index)]
+
+    def nearest_many(self, latlons: np.ndarray) -> List[Optional[Figure]]:
+        # Nearest figure of every point, e.g. of a GPS trace, None for every point if the index is empty
+        indices = self.tree.nearest(shapely.points(self.project(latlons)))
+        if indices is None:
+            return [None] * len(self.project(latlons))
+        return [self.figures[i] for i in indices.tolist()]
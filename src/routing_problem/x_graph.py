@@ -0,0 +1,126 @@
+from typing import List, Tuple, Dict, Set
+
+import numpy as np
+
+from src.routing_problem.connections.complete import XGraphNode, FirstXGraphNode, SelfXGraphNode, LastXGraphNode, \
+    HigherOrderXGraphNode
+from src.routing_problem.maneuver.penalties import ManeuverPenalties, get_maneuver_class
+from src.routing_problem.routing_problem import RoutingProblem
+
+
+class XGraph:
+    """
+    XGraph is the higher-order graph representation of a routing problem, its nodes are maneuvers between lanelets.
+
+    Besides node objects, the X-Graph has integer columns for every node: indices of lanelet_from and lanelet_to in
+    RoutingProblem.lanelets and the index of the node's disjunction, -1 for FirstXGraphNode, LastXGraphNode and nodes
+    outside of disjunctions.
+    """
+
+    def __init__(self,
+                 nodes: List[XGraphNode],
+                 disjunctions: List[List[int]],
+                 lanelets_from: np.ndarray,
+                 lanelets_to: np.ndarray,
+                 packs: np.ndarray):
+        self.nodes: List[XGraphNode] = nodes
+        self.disjunctions: List[List[int]] = disjunctions
+
+        self.lanelets_from: np.ndarray = lanelets_from
+        self.lanelets_to: np.ndarray = lanelets_to
+        self.packs: np.ndarray = packs
+
+
+def build_x_graph(rp: RoutingProblem) -> XGraph:
+    """
+    Build the X-Graph of a routing problem.
+
+    Every lanelet is a passlet, the maneuvers to it from all lanelets of its previous segments form a disjunction.
+    Passlets without incoming maneuvers are represented by a SelfXGraphNode. Nodes and disjunctions are in the order
+    of RoutingProblem.lanelets, first by lanelet_to and then by lanelet_from.
+    """
+    lanelet_index = {id(lanelet): i for i, lanelet in enumerate(rp.lanelets)}
+
+    nodes: List[XGraphNode] = [FirstXGraphNode()]
+    disjunctions: List[List[int]] = []
+    lanelets_from = [-1]
+    lanelets_to = [-1]
+    packs = [-1]
+
+    for lanelet_to in rp.lanelets:
+        segment_to = lanelet_to.segment
+
+        # Lanelets of previous segments with a maneuver to the passlet
+        previous_lanelets = []
+        for segment_from in dict.fromkeys(segment_to.previous_segments):
+            if (segment_from.id, segment_to.id) in rp.maneuvers:
+                previous_lanelets.extend(lanelet_index[id(lanelet)] for lanelet in segment_from.lanelets
+                                         if id(lanelet) in lanelet_index)
+        previous_lanelets.sort()
+
+        if len(previous_lanelets) == 0:
+            nodes.append(SelfXGraphNode(lanelet_to))
+            lanelets_from.append(lanelet_index[id(lanelet_to)])
+            lanelets_to.append(lanelet_index[id(lanelet_to)])
+            packs.append(-1)
+            continue
+
+        disjunctions.append([])
+        for i in previous_lanelets:
+            lanelet_from = rp.lanelets[i]
+            nodes.append(XGraphNode(lanelet_from=lanelet_from,
+                                    lanelet_to=lanelet_to,
+                                    maneuver=rp.maneuvers[(lanelet_from.segment.id, segment_to.id)]))
+            disjunctions[-1].append(len(nodes) - 1)
+            lanelets_from.append(i)
+            lanelets_to.append(lanelet_index[id(lanelet_to)])
+            packs.append(len(disjunctions) - 1)
+
+    nodes.append(LastXGraphNode())
+    lanelets_from.append(-1)
+    lanelets_to.append(-1)
+    packs.append(-1)
+
+    return XGraph(nodes,
+                  disjunctions,
+                  np.array(lanelets_from, dtype=np.int64),
+                  np.array(lanelets_to, dtype=np.int64),
+                  np.array(packs, dtype=np.int64))
+
+
+def build_higher_order_x_graph(nodes: List[XGraphNode],
+                               disjunctions: List[List[int]],
+                               penalties: ManeuverPenalties) -> Tuple[List[XGraphNode], List[List[int]]]:
+    """
+    Build the higher-order X-Graph of an X-Graph for third-order penalties.
+
+    Nodes remember only their own maneuver, so a node whose maneuver is the second maneuver of a third-order penalty
+    gets a HigherOrderXGraphNode copy for every class of maneuvers leading to it that starts such a penalty. Copies join
+    the disjunction of their node and are added before the LastXGraphNode, indices of the original nodes stay the same.
+    The original node stays for other previous maneuvers and for routes reaching it from elsewhere.
+    """
+    if any(len(node.lanelet_to.segment.chain_maneuvers) > 0 for node in nodes[1:-1]):
+        raise Exception("Third-order penalties are not supported for contracted chains of segments")
+
+    # Classes of maneuvers leading to every segment
+    previous_classes: Dict[str, Set[int]] = {}
+    for node in nodes[1:-1]:
+        if node.maneuver is not None:
+            previous_classes.setdefault(node.lanelet_to.segment.id, set()).add(get_maneuver_class(node.maneuver))
+
+    higher_order_nodes = []
+    higher_order_disjunctions = [list(pack) for pack in disjunctions]
+    packs = {node: pack for pack in higher_order_disjunctions for node in pack}
+    for i, node in enumerate(nodes[1:-1], start=1):
+        node_class = get_maneuver_class(node.maneuver)
+        for previous_class in sorted(previous_classes.get(node.lanelet_from.segment.id, [])):
+            if (previous_class, node_class) not in penalties.third_order_prefixes:
+                continue
+
+            if i not in packs:
+                packs[i] = [i]
+                higher_order_disjunctions.append(packs[i])
+            packs[i].append(len(nodes) - 1 + len(higher_order_nodes))
+            higher_order_nodes.append(HigherOrderXGraphNode(node, previous_class))
+
+    return nodes[:-1] + higher_order_nodes + nodes[-1:], higher_order_disjunctions
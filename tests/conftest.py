@@ -0,0 +1,31 @@
+import json
+from typing import Dict
+
+import pytest
+
+from src.routing_problem.creator.creator import create_routing_problem
+from src.routing_problem.lanelet import FirstLanelet, LastLanelet
+from src.routing_problem.routing_problem import RoutingProblem
+from tests.helpers import get_data_path
+
+
+@pytest.fixture(params=["urban", "mixed"])
+def name(request) -> str:
+    return request.param
+
+
+@pytest.fixture
+def rp(name: str) -> RoutingProblem:
+    # Routing problems are parsed again for every test, tests may change them
+    return create_routing_problem(get_data_path(f"{name}.osm"), use_cache=False)
+
+
+@pytest.fixture
+def matrix(name: str) -> Dict[str, Dict[str, int]]:
+    with open(get_data_path(f"{name}_matrix.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def ebg_nodes(rp: RoutingProblem):
+    return [FirstLanelet()] + rp.lanelets + [LastLanelet()]
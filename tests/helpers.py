@@ -0,0 +1,57 @@
+import os
+from typing import List, Dict
+
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.cost_engine import CostEngine, XGraphCostEngine
+from src.routing_problem.maneuver.penalties import ManeuverPenalties
+from src.routing_problem.x_graph import XGraph
+
+STRAIGHT_NON_STRAIGHT_PENALTY = 120
+NON_STRAIGHT_STRAIGHT_PENALTY = 0
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+
+def get_data_path(file_name: str) -> str:
+    return os.path.join(DATA_PATH, file_name)
+
+
+def get_route(nodes: List, order: List) -> List[int]:
+    # Node indices of an order from the start to the end. Orders of worker processes are copies of the nodes, so nodes
+    # are matched by their keys
+    node_index = {node.get_key(): i for i, node in enumerate(nodes[1:-1], 1)}
+    return [0] + [node_index[node.get_key()] for node in order[1:-1]] + [len(nodes) - 1]
+
+
+def get_route_cost(cost_engine: CostEngine, route: List[int]) -> int:
+    return sum(cost_engine.get_cost(from_node, to_node) for from_node, to_node in zip(route, route[1:]))
+
+
+def assert_visits_every_node(nodes: List, route: List[int]):
+    assert sorted(route) == list(range(len(nodes)))
+
+
+def assert_visits_every_passlet(x_graph: XGraph, route: List[int]):
+    # Once, through one node of its disjunction or its SelfXGraphNode
+    passlets = x_graph.lanelets_to[route[1:-1]]
+    packs = x_graph.packs[route[1:-1]]
+    assert sorted(passlets.tolist()) == list(range(passlets.max() + 1))
+    assert sorted(packs[packs >= 0].tolist()) == list(range(len(x_graph.disjunctions)))
+
+
+def create_x_graph_arguments(x_graph: XGraph, matrix: Dict[str, Dict[str, int]], duration: float) -> Dict:
+    # Arguments of XGraphOptimizer and of its class methods, e.g. optimize_components
+    return dict(nodes=x_graph.nodes, disjunctions=x_graph.disjunctions, matrix=matrix,
+                local_search_metaheuristic=LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                first_solution_strategy=FirstSolutionStrategy.PATH_CHEAPEST_ARC, max_optimisation_duration=duration,
+                straight_non_straight_maneuver_penalty=STRAIGHT_NON_STRAIGHT_PENALTY,
+                non_straight_straight_maneuver_penalty=NON_STRAIGHT_STRAIGHT_PENALTY, precompute_costs=True)
+
+
+def assert_x_graph_result(x_graph: XGraph, matrix: Dict[str, Dict[str, int]], order: List, history: Dict[str, int]):
+    # The order visits every passlet and the history ends with the true cost of the order
+    route = get_route(x_graph.nodes, order)
+    assert_visits_every_passlet(x_graph, route)
+    penalties = ManeuverPenalties.from_straight_penalties(STRAIGHT_NON_STRAIGHT_PENALTY, NON_STRAIGHT_STRAIGHT_PENALTY)
+    assert list(history.values())[-1] == get_route_cost(XGraphCostEngine(x_graph.nodes, matrix, penalties), route)
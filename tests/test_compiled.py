@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from src.routing_problem.creator import creator, compiled
+from src.routing_problem.creator.compiled import compile_routing_problem, load_routing_problem, hash_source
+from src.routing_problem.creator.creator import create_routing_problem
+from src.routing_problem.routing_problem import RoutingProblem
+from tests.helpers import get_data_path
+
+
+def assert_same_routing_problem(loaded: RoutingProblem, rp: RoutingProblem):
+    assert [segment.id for segment in loaded.segments] == [segment.id for segment in rp.segments]
+    for loaded_segment, segment in zip(loaded.segments, rp.segments):
+        assert (loaded_segment.lanes, loaded_segment.parts, loaded_segment.is_forward,
+                loaded_segment.connected_component) == \
+               (segment.lanes, segment.parts, segment.is_forward, segment.connected_component)
+        assert loaded_segment.previous_segment_ids == segment.previous_segment_ids
+        assert loaded_segment.next_segment_ids == segment.next_segment_ids
+        np.testing.assert_array_equal(loaded_segment.coordinates.get_latlons(), segment.coordinates.get_latlons())
+        assert {key: vars(maneuver) for key, maneuver in loaded_segment.next_maneuvers.items()} == \
+               {key: vars(maneuver) for key, maneuver in segment.next_maneuvers.items()}
+
+    assert [lanelet.get_key() for lanelet in loaded.lanelets] == [lanelet.get_key() for lanelet in rp.lanelets]
+    for loaded_lanelet, lanelet in zip(loaded.lanelets, rp.lanelets):
+        assert loaded_lanelet.segment is loaded.segments[rp.segments.index(lanelet.segment)]
+        np.testing.assert_array_equal(loaded_lanelet.coordinates.get_utm(), lanelet.coordinates.get_utm())
+
+    assert loaded.center == rp.center
+    assert loaded.nbg_nodes_number == rp.nbg_nodes_number
+    assert loaded.average_branching_factor == rp.average_branching_factor
+
+
+def test_compiled_routing_problem_round_trip(tmp_path, name, rp):
+    path = str(tmp_path / f"{name}.rp")
+    source_hash = hash_source(get_data_path(f"{name}.osm"))
+    compile_routing_problem(rp, path, source_hash)
+
+    assert_same_routing_problem(load_routing_problem(path, source_hash), rp)
+
+
+def test_compiled_routing_problem_of_other_source(tmp_path, rp):
+    path = str(tmp_path / "urban.rp")
+    compile_routing_problem(rp, path, "source-hash")
+    assert load_routing_problem(path, "other-source-hash") is None
+
+    # Other kinds of files
+    (tmp_path / "matrix.bin").write_bytes(b"DURATION" + bytes(64))
+    assert load_routing_problem(str(tmp_path / "matrix.bin")) is None
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_create_routing_problem_reuses_compiled_file(tmp_path, monkeypatch, rp):
+    monkeypatch.setattr(creator, "ROUTING_PROBLEM_CACHE_PATH", str(tmp_path))
+    compiled_rp = create_routing_problem(get_data_path("urban.osm"))
+    compiled_paths = list(tmp_path.iterdir())
+    assert [path.name for path in compiled_paths] == [f"{hash_source(get_data_path('urban.osm'))}.rp"]
+
+    mtime = compiled_paths[0].stat().st_mtime_ns
+    loaded_rp = create_routing_problem(get_data_path("urban.osm"))
+    assert compiled_paths[0].stat().st_mtime_ns == mtime
+    assert_same_routing_problem(compiled_rp, rp)
+    assert_same_routing_problem(loaded_rp, rp)
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_create_routing_problem_compiles_corrupt_file_again(tmp_path, monkeypatch, rp):
+    monkeypatch.setattr(creator, "ROUTING_PROBLEM_CACHE_PATH", str(tmp_path))
+    create_routing_problem(get_data_path("urban.osm"))
+    compiled_path = next(tmp_path.iterdir())
+
+    # Truncated headers and truncated arrays
+    for size in (12, compiled_path.stat().st_size // 2):
+        compiled_path.write_bytes(compiled_path.read_bytes()[:size])
+        assert load_routing_problem(str(compiled_path)) is None
+        assert_same_routing_problem(create_routing_problem(get_data_path("urban.osm")), rp)
+        assert load_routing_problem(str(compiled_path)) is not None
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_create_routing_problem_of_other_derivation_version(tmp_path, monkeypatch, rp):
+    monkeypatch.setattr(creator, "ROUTING_PROBLEM_CACHE_PATH", str(tmp_path))
+    create_routing_problem(get_data_path("urban.osm"))
+
+    monkeypatch.setattr(compiled, "DERIVATION_VERSION", compiled.DERIVATION_VERSION + 1)
+    assert_same_routing_problem(create_routing_problem(get_data_path("urban.osm")), rp)
+    assert len(list(tmp_path.iterdir())) == 2
@@ -0,0 +1,62 @@
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.contraction import contract_chains
+from src.routing_problem.lanelet import FirstLanelet, LastLanelet
+from src.routing_problem.maneuver.modifier import ManeuverModifier
+from src.routing_problem.maneuver.penalties import ManeuverPenalties
+from src.routing_problem.x_graph import build_x_graph
+
+
+def test_chains_cover_routing_problem(rp):
+    contraction = contract_chains(rp)
+    assert len(contraction.routing_problem.segments) < len(rp.segments)
+    assert sorted(id(lanelet) for chain in contraction.lanelet_chains for lanelet in chain) == \
+           sorted(map(id, rp.lanelets))
+
+    for chain in contraction.segment_chains.values():
+        for segment_from, segment_to in zip(chain, chain[1:]):
+            # Next segments outside of the map aren't loaded
+            assert set(segment_from.next_segments) == {segment_to}
+            assert segment_from.lanes == segment_to.lanes
+            assert rp.maneuvers[(segment_from.id, segment_to.id)].modifier == ManeuverModifier.Straight
+
+
+def test_contract_matrix_leads_between_chain_ends(rp, matrix):
+    contraction = contract_chains(rp)
+    contracted_matrix = contraction.contract_matrix(matrix)
+    x_graph_matrix = contraction.contract_matrix(matrix, x_graph=True)
+    chains = contraction.segment_chains
+    for from_id in list(chains)[::10]:
+        for to_id in list(chains)[::10]:
+            if from_id != to_id:
+                assert contracted_matrix[from_id][to_id] == matrix[chains[from_id][-1].id][to_id]
+                assert x_graph_matrix[from_id][to_id] == matrix[chains[from_id][-1].id][chains[to_id][-1].id]
+
+
+def test_contracted_order_expands_to_same_lanelets(rp, matrix):
+    contraction = contract_chains(rp)
+    nodes = [FirstLanelet()] + contraction.routing_problem.lanelets + [LastLanelet()]
+    order, _ = EBGOptimizer(nodes, contraction.contract_matrix(matrix), LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                            FirstSolutionStrategy.PATH_CHEAPEST_ARC, 1, False, precompute_costs=True).optimize()
+
+    expanded_order = contraction.expand_order(order)
+    assert isinstance(expanded_order[0], FirstLanelet) and isinstance(expanded_order[-1], LastLanelet)
+    assert sorted(map(id, expanded_order[1:-1])) == sorted(map(id, rp.lanelets))
+
+
+def test_contracted_x_graph_order_expands_with_same_cost(rp, matrix):
+    contraction = contract_chains(rp)
+    x_graph = build_x_graph(contraction.routing_problem)
+    penalties = ManeuverPenalties.from_straight_penalties(120, 30)
+    order, history = XGraphOptimizer(x_graph.nodes, x_graph.disjunctions, contraction.contract_matrix(matrix, True),
+                                     LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                                     FirstSolutionStrategy.PATH_CHEAPEST_ARC, 1, 120, 30,
+                                     precompute_costs=True).optimize()
+
+    # Every passlet of the original X-Graph is visited once, and penalties inside chains are already paid
+    expanded_order = contraction.expand_x_graph_order(order)
+    assert sorted(id(node.lanelet_to) for node in expanded_order[1:-1]) == sorted(map(id, rp.lanelets))
+    assert sum(node_from.get_cost_to(node_to, matrix, penalties)
+               for node_from, node_to in zip(expanded_order, expanded_order[1:])) == list(history.values())[-1]
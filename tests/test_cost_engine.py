@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from src.optimizer.cost_engine import EBGCostEngine, XGraphCostEngine
+from src.routing_problem.connections.topology import create_lanelet_topology
+from src.routing_problem.maneuver.penalties import ManeuverPenalties
+from src.routing_problem.x_graph import build_x_graph
+
+
+def get_reference_costs(nodes, get_cost_to) -> np.ndarray:
+    # Arcs to the start and from the end aren't part of routes
+    return np.array([[get_cost_to(node_from, node_to) for node_to in nodes[1:]] for node_from in nodes[:-1]])
+
+
+def assert_engine_costs(cost_engine, reference_costs: np.ndarray):
+    nodes_number = cost_engine.nodes_number
+    np.testing.assert_array_equal(cost_engine.get_costs(np.arange(nodes_number - 1))[:, 1:], reference_costs)
+    np.testing.assert_array_equal(cost_engine.create_matrix()[:-1, 1:], reference_costs)
+
+    # Single arcs, e.g. of the transit callback
+    for from_node in range(0, nodes_number - 1, 7):
+        assert [cost_engine.get_cost(from_node, to_node) for to_node in range(1, nodes_number)] == \
+               reference_costs[from_node].tolist()
+
+
+@pytest.mark.parametrize("check_topology", [False, True])
+def test_ebg_engine_matches_get_cost_to(rp, matrix, ebg_nodes, check_topology):
+    connections = create_lanelet_topology(rp) if check_topology else None
+    reference_costs = get_reference_costs(
+        ebg_nodes, lambda node_from, node_to: node_from.get_cost_to(node_to, matrix, connections, check_topology))
+
+    assert_engine_costs(EBGCostEngine(ebg_nodes, matrix, connections, check_topology), reference_costs)
+
+
+def test_x_graph_engine_matches_get_cost_to(rp, matrix):
+    x_graph = build_x_graph(rp)
+    penalties = ManeuverPenalties.from_straight_penalties(120, 30)
+    reference_costs = get_reference_costs(
+        x_graph.nodes, lambda node_from, node_to: node_from.get_cost_to(node_to, matrix, penalties))
+
+    assert_engine_costs(XGraphCostEngine(x_graph.nodes, matrix, penalties), reference_costs)
@@ -0,0 +1,68 @@
+import time
+
+import pytest
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.cost_engine import EBGCostEngine
+from src.optimizer.decomposition import merge_histories, order_routes, shift_history
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.x_graph import build_x_graph
+from tests.helpers import get_route, get_route_cost, assert_visits_every_node, create_x_graph_arguments, \
+    assert_x_graph_result
+
+COMPONENTS_NUMBER = 3
+
+
+@pytest.fixture
+def split_rp(rp):
+    # The bundled road networks are connected, so segments are assigned to artificial components
+    for i, segment in enumerate(rp.segments):
+        segment.connected_component = str(i * COMPONENTS_NUMBER // len(rp.segments))
+    return rp
+
+
+def test_shift_history():
+    assert shift_history({"0.2": 30, "1.5": 20}, 2.04) == {"2.2": 30, "3.5": 20}
+
+
+def test_merge_histories_starts_when_every_subproblem_is_solved():
+    assert merge_histories([{"0.1": 10, "0.5": 8}, {"0.3": 20, "0.7": 15}]) == {"0.3": 30, "0.5": 28, "0.7": 23}
+
+
+def test_order_routes_chains_cheapest_routes():
+    matrix = {"a": {"a": 0, "b": 1, "c": 9}, "b": {"a": 9, "b": 0, "c": 1}, "c": {"a": 1, "b": 9, "c": 0}}
+    # Chains a b c, b c a and c a b cost the same, the first one found is kept
+    assert order_routes([("b", "b"), ("c", "c"), ("a", "a")], matrix) == [0, 1, 2]
+    # Routes ending on c can only be followed cheaply by routes starting on a
+    assert order_routes([("b", "c"), ("a", "a")], matrix) == [0, 1]
+
+
+@pytest.mark.usefixtures("split_rp")
+def test_components_are_stitched_with_true_cost(matrix, ebg_nodes):
+    start_time = time.monotonic()
+    order, history = EBGOptimizer.optimize_components(
+        nodes=ebg_nodes, matrix=matrix, local_search_metaheuristic=LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+        first_solution_strategy=FirstSolutionStrategy.PATH_CHEAPEST_ARC, max_optimisation_duration=3,
+        check_topology=False, precompute_costs=True)
+    elapsed = time.monotonic() - start_time
+    assert elapsed < 3 + 3
+
+    route = get_route(ebg_nodes, order)
+    assert_visits_every_node(ebg_nodes, route)
+    # Nodes of every component are consecutive
+    components = [ebg_nodes[node].segment.connected_component for node in route[1:-1]]
+    assert sum(1 for component, next_component in zip(components, components[1:]) if component != next_component) \
+           == COMPONENTS_NUMBER - 1
+
+    # The history ends with the cost of the whole route, including arcs between components, at the elapsed time
+    last_time, last_objective = list(history.items())[-1]
+    assert last_objective == get_route_cost(EBGCostEngine(ebg_nodes, matrix, None, False), route)
+    assert float(last_time) <= elapsed + 0.1
+    assert [float(time) for time in history] == sorted(float(time) for time in history)
+
+
+def test_x_graph_components_keep_disjunctions_whole(split_rp, matrix):
+    x_graph = build_x_graph(split_rp)
+    order, history = XGraphOptimizer.optimize_components(**create_x_graph_arguments(x_graph, matrix, 3))
+    assert_x_graph_result(x_graph, matrix, order, history)
@@ -0,0 +1,117 @@
+import os
+import pickle
+import shutil
+
+import numpy as np
+
+from src.config.config import OPTIMISER_INFINITY
+from src.osmio.arrays import write_arrays, read_arrays, ARRAYS_ALIGNMENT
+from src.osrm.duration_matrix import DurationMatrix, create_duration_matrix, load_duration_matrix, \
+    open_duration_matrix, create_table_matrix
+from tests.helpers import get_data_path
+
+
+def test_arrays_round_trip(tmp_path):
+    path = str(tmp_path / "arrays.bin")
+    arrays = {
+        "ids": np.array(["1", "22", "333"], dtype=str),
+        "values": np.arange(12, dtype=np.int32).reshape(3, 4),
+        "flags": np.array([True, False, True]),
+        "empty": np.zeros((0, 2), dtype=np.float64)
+    }
+    write_arrays(path, arrays, {"source": "test"}, b"ARRAYS", 3)
+
+    loaded_arrays, metadata = read_arrays(path, b"ARRAYS", 3)
+    assert metadata == {"source": "test"}
+    assert list(loaded_arrays) == list(arrays)
+    for name, array in arrays.items():
+        assert loaded_arrays[name].dtype == array.dtype
+        np.testing.assert_array_equal(loaded_arrays[name], array)
+        if isinstance(loaded_arrays[name], np.memmap):
+            assert loaded_arrays[name].offset % ARRAYS_ALIGNMENT == 0
+
+    # Other kinds of files and other versions
+    assert read_arrays(path, b"OTHERS", 3) is None
+    assert read_arrays(path, b"ARRAYS", 4) is None
+    assert os.listdir(tmp_path) == ["arrays.bin"]
+
+
+def test_read_arrays_of_corrupt_file(tmp_path):
+    path = tmp_path / "arrays.bin"
+    write_arrays(str(path), {"values": np.arange(1000, dtype=np.int64)}, {}, b"ARRAYS", 1)
+    content = path.read_bytes()
+
+    # Truncated header length, truncated header, corrupt header and truncated arrays
+    for corrupt_content in (content[:10], content[:20], content[:14] + b"}" + content[15:], content[:-100]):
+        path.write_bytes(corrupt_content)
+        assert read_arrays(str(path), b"ARRAYS", 1) is None
+
+
+def test_duration_matrix_round_trip(tmp_path, matrix):
+    duration_matrix = create_duration_matrix(matrix)
+    path = str(tmp_path / "matrix.bin")
+    duration_matrix.save(path)
+
+    loaded_matrix = load_duration_matrix(path)
+    assert loaded_matrix.path == path
+    assert loaded_matrix.to_json() == matrix
+    segment_ids = list(matrix)
+    assert loaded_matrix[segment_ids[3]][segment_ids[5]] == matrix[segment_ids[3]][segment_ids[5]]
+
+    # Loaded matrices are sent to other processes by their path, others by their arrays
+    assert len(pickle.dumps(loaded_matrix)) < 1000
+    assert pickle.loads(pickle.dumps(loaded_matrix)).to_json() == matrix
+    assert pickle.loads(pickle.dumps(duration_matrix)).to_json() == matrix
+
+
+def test_open_duration_matrix_converts_json_once(tmp_path, name, matrix):
+    json_path = str(tmp_path / f"{name}_matrix.json")
+    shutil.copy(get_data_path(f"{name}_matrix.json"), json_path)
+
+    duration_matrix = open_duration_matrix(json_path)
+    binary_path = str(tmp_path / f"{name}_matrix.bin")
+    assert duration_matrix.path == binary_path
+    assert duration_matrix.to_json() == matrix
+
+    mtime = os.stat(binary_path).st_mtime_ns
+    assert open_duration_matrix(json_path).to_json() == matrix
+    assert os.stat(binary_path).st_mtime_ns == mtime
+
+
+def test_duration_matrix_is_a_mapping(matrix):
+    duration_matrix = create_duration_matrix(matrix)
+    assert isinstance(duration_matrix, DurationMatrix)
+    assert list(duration_matrix) == list(matrix) and len(duration_matrix) == len(matrix)
+    segment_ids = list(matrix)[:4]
+    assert dict(duration_matrix[segment_ids[0]]) == matrix[segment_ids[0]]
+    np.testing.assert_array_equal(duration_matrix.get_durations(segment_ids, segment_ids[::-1]),
+                                  [[matrix[from_id][to_id] for to_id in segment_ids[::-1]] for from_id in segment_ids])
+
+
+def test_table_matrix_of_unreachable_pairs():
+    # Flat and nested tables, null durations are unreachable pairs
+    for durations in ([12.9, None, 3.0, 0.0, 7.5, None], [[12.9, None, 3.0], [0.0, 7.5, None]]):
+        table_matrix = create_table_matrix([1, 2], [3, 4, 5], durations)
+        assert table_matrix.durations.dtype == np.int32
+        assert table_matrix.to_json() == {
+            "1": {"3": 12, "4": OPTIMISER_INFINITY, "5": 3},
+            "2": {"3": 0, "4": 7, "5": OPTIMISER_INFINITY}
+        }
+
+
+def test_table_matrix_of_non_square_table(matrix):
+    sources = [int(segment_id) for segment_id in list(matrix)[:5]]
+    destinations = [int(segment_id) for segment_id in list(matrix)[3:11]]
+    durations = [matrix[str(source)][str(destination)] for source in sources for destination in destinations]
+
+    table_matrix = create_table_matrix(sources, destinations, durations)
+    assert table_matrix.to_json() == {str(source): {str(destination): matrix[str(source)][str(destination)]
+                                                    for destination in destinations} for source in sources}
+    assert table_matrix[str(sources[4])][str(destinations[7])] == matrix[str(sources[4])][str(destinations[7])]
+
+
+def test_table_matrix_of_whole_table(matrix):
+    segment_ids = [int(segment_id) for segment_id in matrix]
+    table_matrix = create_table_matrix(segment_ids, segment_ids, [list(row.values()) for row in matrix.values()])
+    assert table_matrix.row_ids is table_matrix.column_ids
+    assert table_matrix.to_json() == matrix
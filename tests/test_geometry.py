@@ -0,0 +1,100 @@
+import copy
+
+import numpy as np
+import pytest
+from shapely.geometry import LineString, Point
+
+from src.config.config import LANELET_CUTS
+from src.geometry.geometry import cut_lines
+
+
+def cut_line_by_projection(line: LineString, distance: float):
+    # Cut a line in two at a given distance from its starting point by projecting its points, the former cut_line
+    if distance <= 0.0:
+        return None, line
+
+    if distance >= line.length:
+        return line, None
+
+    coords = list(line.coords)
+    for i, p in enumerate(coords):
+        pd = line.project(Point(p))
+        if pd == distance:
+            return LineString(coords[:i + 1]), LineString(coords[i:])
+        if pd > distance:
+            cp = line.interpolate(distance)
+            return LineString(coords[:i] + [(cp.x, cp.y)]), LineString([(cp.x, cp.y)] + coords[i:])
+
+    return None
+
+
+def cut_by_projection(coordinates: np.ndarray, start: float, end_cut: float) -> np.ndarray:
+    # Cut the beginning and then the end of a line like the former shorten_lanelets
+    line = cut_line_by_projection(LineString(coordinates), start)[1]
+    line = cut_line_by_projection(line, line.length - end_cut)[0]
+    return np.array(line.coords)
+
+
+def get_lanelet_cuts(rp):
+    cuts = []
+    for lanelet in rp.lanelets:
+        length = lanelet.get_length()
+        for min_length, start_cut, end_cut in LANELET_CUTS:
+            if length > min_length:
+                cuts.append((lanelet, start_cut, end_cut))
+                break
+    return cuts
+
+
+def test_cut_lines_of_lanelets(rp):
+    cuts = get_lanelet_cuts(rp)
+    lines = [lanelet.coordinates.get_utm() for lanelet, _, _ in cuts]
+    cumulative_lengths = [lanelet.coordinates.get_cumulative_lengths() for lanelet, _, _ in cuts]
+
+    parts = cut_lines(lines, cumulative_lengths, [start_cut for _, start_cut, _ in cuts],
+                      [lengths[-1] - end_cut for lengths, (_, _, end_cut) in zip(cumulative_lengths, cuts)])
+    for part, line, (_, start_cut, end_cut) in zip(parts, lines, cuts):
+        np.testing.assert_allclose(part, cut_by_projection(line, start_cut, end_cut), atol=1e-6)
+
+
+def test_shorten_lanelets(rp):
+    shortened_rp = copy.deepcopy(rp)
+    shortened_rp.shorten_lanelets()
+
+    cuts = {lanelet.get_key(): (start_cut, end_cut) for lanelet, start_cut, end_cut in get_lanelet_cuts(rp)}
+    for lanelet, shortened_lanelet in zip(rp.lanelets, shortened_rp.lanelets):
+        if lanelet.get_key() in cuts:
+            np.testing.assert_allclose(shortened_lanelet.coordinates.get_utm(),
+                                       cut_by_projection(lanelet.coordinates.get_utm(), *cuts[lanelet.get_key()]),
+                                       atol=1e-6)
+        else:
+            np.testing.assert_array_equal(shortened_lanelet.coordinates.get_utm(), lanelet.coordinates.get_utm())
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_cut_lines_at_vertices_and_within_segments(rp):
+    lanelet = max(rp.lanelets, key=lambda lanelet: len(lanelet.coordinates.get_utm()))
+    line = lanelet.coordinates.get_utm()
+    lengths = lanelet.coordinates.get_cumulative_lengths()
+    assert len(line) > 4
+
+    # Cuts exactly at vertices keep the vertices
+    part, = cut_lines([line], [lengths], [lengths[1]], [lengths[-2]])
+    np.testing.assert_array_equal(part, line[1:-1])
+    np.testing.assert_allclose(part, cut_by_projection(line, lengths[1], lengths[-1] - lengths[-2]), atol=1e-6)
+
+    # Both cuts inside of one segment
+    start, end = lengths[1] + (lengths[2] - lengths[1]) / 4, lengths[1] + (lengths[2] - lengths[1]) / 2
+    part, = cut_lines([line], [lengths], [start], [end])
+    np.testing.assert_allclose(part, [line[1] + (line[2] - line[1]) / 4, line[1] + (line[2] - line[1]) / 2])
+    np.testing.assert_allclose(part, cut_by_projection(line, start, lengths[-1] - end), atol=1e-6)
+
+
+def test_cut_lines_clamps_distances_to_lines():
+    lines = [np.array([[0.0, 0.0], [0.0, 1.0], [0.0, 3.0]]), np.array([[5.0, 5.0], [6.0, 5.0]])]
+    lengths = [np.array([0.0, 1.0, 3.0]), np.array([0.0, 1.0])]
+
+    # Ends slightly above the length of the last line and the line before it stay on their lines
+    first, last = cut_lines(lines, lengths, [-1e-9, 0.5], [3.0 + 1e-9, 1.0 + 1e-9])
+    np.testing.assert_array_equal(first, lines[0])
+    np.testing.assert_array_equal(last, [[5.5, 5.0], [6.0, 5.0]])
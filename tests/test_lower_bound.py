@@ -0,0 +1,68 @@
+import itertools
+import time
+
+import pytest
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.cost_engine import EBGCostEngine
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.lower_bound import LowerBound, calculate_lower_bound
+from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.lanelet import FirstLanelet, LastLanelet
+from src.routing_problem.x_graph import build_x_graph
+
+
+def create_ebg_optimizer(nodes, matrix, duration, target_gap) -> EBGOptimizer:
+    return EBGOptimizer(nodes, matrix, LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                        FirstSolutionStrategy.PATH_CHEAPEST_ARC, duration, False, precompute_costs=True,
+                        target_gap=target_gap)
+
+
+@pytest.mark.parametrize("name", ["urban"])
+@pytest.mark.parametrize("first_lanelet", [0, 7, 14, 21])
+def test_tightened_lower_bound_reaches_optimum(rp, matrix, first_lanelet):
+    nodes = [FirstLanelet()] + rp.lanelets[first_lanelet:first_lanelet + 7] + [LastLanelet()]
+    cost_engine = EBGCostEngine(nodes, matrix, None, False)
+    optimum = min(sum(cost_engine.get_cost(from_node, to_node)
+                      for from_node, to_node in zip((0,) + route, route + (len(nodes) - 1,)))
+                  for route in itertools.permutations(range(1, len(nodes) - 1)))
+
+    # The bound never decreases and never exceeds the optimum, the cheapest branch without subtours is the optimum
+    lower_bound = LowerBound(cost_engine, [], 0, len(nodes) - 1)
+    values = [lower_bound.value]
+    while lower_bound.tighten():
+        values.append(lower_bound.value)
+    assert values[0] == calculate_lower_bound(cost_engine, [], 0, len(nodes) - 1)
+    assert values == sorted(values)
+    assert values[-1] == optimum
+
+
+def test_target_gap_result_of_tuple_path(matrix, ebg_nodes):
+    optimizer = create_ebg_optimizer(ebg_nodes, matrix, 3, 0)
+    initial_lower_bound = optimizer.lower_bound
+    _, history = optimizer.optimize()
+
+    assert initial_lower_bound <= optimizer.lower_bound <= list(history.values())[-1]
+    assert set(history) <= set(optimizer.gap_history)
+    last_objective = list(history.values())[-1]
+    assert list(optimizer.gap_history.values())[-1] == (last_objective - optimizer.lower_bound) / last_objective
+
+
+def test_target_gap_stops_search(matrix, ebg_nodes):
+    start_time = time.monotonic()
+    optimizer = create_ebg_optimizer(ebg_nodes, matrix, 60, 1)
+    optimizer.optimize()
+    assert time.monotonic() - start_time < 30
+    assert all(gap <= 1 for gap in optimizer.gap_history.values())
+
+
+def test_lower_bound_of_x_graph_disjunctions(rp, matrix):
+    x_graph = build_x_graph(rp)
+    optimizer = XGraphOptimizer(x_graph.nodes, x_graph.disjunctions, matrix,
+                                LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH, FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+                                2, 120, 0, precompute_costs=True, target_gap=0)
+    return_dict = {}
+    optimizer.optimize(return_dict, 0)
+
+    assert 0 < return_dict[0]["lower_bound"] <= list(return_dict[0]["history"].values())[-1]
+    assert return_dict[0]["gap_history"] == optimizer.gap_history
@@ -0,0 +1,45 @@
+import copy
+
+import pytest
+
+from src.routing_problem.maneuver.table import decode_maneuver_table
+
+
+def get_table_rows(table):
+    return list(zip(table.from_indices.tolist(), table.to_indices.tolist(), table.types.tolist(),
+                    table.modifiers.tolist(), table.durations.tolist(), table.weights.tolist()))
+
+
+def get_maneuver_rows(segments):
+    # Rows of the maneuvers of Segment.next_maneuvers, maneuvers to segments outside of the list have index -1
+    segment_index = {segment.id: i for i, segment in enumerate(segments)}
+    return [(segment_index.get(maneuver.from_id, -1), segment_index.get(maneuver.to_id, -1), maneuver.type.value,
+             maneuver.modifier.value, maneuver.duration, maneuver.weight)
+            for segment in segments for maneuver in segment.next_maneuvers.values()]
+
+
+@pytest.mark.parametrize("decoded_share", [0, 0.5, 1])
+def test_table_of_next_maneuvers(rp, decoded_share):
+    segments = rp.segments
+    assert all(segment.next_maneuvers_json is not None for segment in segments)
+
+    # Decode the maneuvers of some segments before the table
+    decoded_number = int(len(segments) * decoded_share)
+    for segment in segments[:decoded_number]:
+        _ = segment.next_maneuvers
+    table = decode_maneuver_table(segments)
+
+    # Parsed segments stay parsed
+    assert all(segment.next_maneuvers_json is not None for segment in segments[decoded_number:])
+    assert len(table) > 0
+    assert get_table_rows(table) == get_maneuver_rows(copy.deepcopy(segments))
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_table_of_partial_segments(rp):
+    segments = rp.segments[:len(rp.segments) // 2]
+    table = decode_maneuver_table(segments)
+
+    assert -1 in table.to_indices.tolist()
+    assert get_table_rows(table) == get_maneuver_rows(segments)
+    assert len(decode_maneuver_table([])) == 0
@@ -0,0 +1,58 @@
+import queue
+
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.config.config import OPTIMIZATION_HISTORY_DELTA
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.monitor import RoutingMonitor
+
+
+def test_records_of_full_ring_buffer(monkeypatch):
+    monkeypatch.setattr("src.optimizer.monitor.MONITOR_BUFFER_SIZE", 4)
+    monitor = RoutingMonitor(None)
+    assert not monitor.get_records()
+
+    for i in range(3):
+        monitor.solution_count = i + 1
+        monitor.record(float(i), 100 - i)
+    assert monitor.get_records() == [(0.0, 100, 1), (1.0, 99, 2), (2.0, 98, 3)]
+
+    # The oldest records are overwritten, but the first record is kept
+    for i in range(3, 10):
+        monitor.solution_count = i + 1
+        monitor.record(float(i), 100 - i)
+    assert monitor.get_records() == [(0.0, 100, 1)] + [(float(i), 100 - i, i + 1) for i in range(6, 10)]
+
+
+def test_streamed_progress(tmp_path):
+    progress_queue = queue.Queue()
+    progress_file = tmp_path / "progress.csv"
+    monitor = RoutingMonitor(None, progress_queue=progress_queue, progress_file=str(progress_file))
+
+    # The file is only opened by the first record
+    assert not progress_file.exists()
+    monitor.solution_count = 1
+    monitor.record(0.5, 100)
+    monitor.solution_count = 3
+    monitor.record(1.5, 90)
+    assert progress_file.read_text() == "0.5,100,1\n1.5,90,3\n"
+
+    monitor.close()
+    assert monitor.progress_writer is None
+    assert [progress_queue.get_nowait() for _ in range(progress_queue.qsize())] == [(0.5, 100, 1), (1.5, 90, 3)]
+
+
+def test_optimization_history_readings(matrix, ebg_nodes):
+    optimizer = EBGOptimizer(ebg_nodes, matrix, LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                             FirstSolutionStrategy.PATH_CHEAPEST_ARC, 3, False, precompute_costs=True)
+    _, history = optimizer.optimize()
+    monitor = optimizer.monitor
+
+    # Readings are taken on solutions, at most every OPTIMIZATION_HISTORY_DELTA seconds, the last one is the best
+    # objective at the time of the last solution
+    times = [elapsed for elapsed, _ in monitor.readings]
+    assert all(later - earlier > OPTIMIZATION_HISTORY_DELTA for earlier, later in zip(times, times[1:]))
+    assert list(history)[-1] == str(round(monitor.last_solution_time, 1))
+    assert list(history.values())[-1] == monitor.best_objective == monitor.get_records()[-1][1]
+    assert list(history.values()) == sorted(history.values(), reverse=True)
+    assert set(history.values()) <= {objective for _, objective, _ in monitor.get_records()}
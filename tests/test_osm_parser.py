@@ -0,0 +1,41 @@
+import xml.etree.ElementTree as xml
+
+import pytest
+
+from src.geo.geo import EMPTY_ATTRIBUTES
+from src.osmio.parser import find_osm_nodes_and_ways, iterate_osm_ways
+from tests.helpers import get_data_path
+
+
+def test_streamed_ways_match_parsed_ways(name):
+    path = get_data_path(f"{name}.osm")
+    with open(path) as f:
+        _, ways = find_osm_nodes_and_ways(f.read(), parse_nodes=False)
+
+    streamed_ways = {way.pop("id"): way for way in iterate_osm_ways(path)}
+    assert streamed_ways == ways
+
+
+@pytest.mark.parametrize("content", ["", "<?xml version='1.0'?>\n<osm version='0.6'>\n <way id='1'>\n  <nd ref='2'/>\n"])
+def test_empty_and_truncated_files(tmp_path, content):
+    path = tmp_path / "map.osm"
+    path.write_text(content)
+    with pytest.raises(Exception, match="Invalid OSM file") as error:
+        list(iterate_osm_ways(str(path)))
+    assert isinstance(error.value.__cause__, xml.ParseError)
+
+
+def test_read_only_node_attributes():
+    nodes, _ = find_osm_nodes_and_ways("<osm><node id='1' lat='48.1' lon='11.5'><tag k='highway' v='stop'/></node>"
+                                       "<node id='2' lat='48.2' lon='11.6'/><node id='3' lat='48.3' lon='11.7'/></osm>")
+
+    # Nodes without attributes share the empty mapping, which can't be changed in place
+    assert nodes[2].attributes is EMPTY_ATTRIBUTES and nodes[3].attributes is EMPTY_ATTRIBUTES
+    with pytest.raises(TypeError):
+        nodes[2].attributes["highway"] = "stop"
+    assert len(nodes[3].attributes) == 0
+
+    # Replacing attributes leaves other nodes unchanged
+    nodes[2].attributes = {"highway": "stop"}
+    assert nodes[1].to_json()["attributes"] == nodes[2].to_json()["attributes"] == {"highway": "stop"}
+    assert nodes[3].to_json()["attributes"] == {}
@@ -0,0 +1,105 @@
+import io
+import shutil
+import threading
+
+import numpy as np
+import pytest
+import requests
+
+from src.osrm import interface
+from src.osrm.duration_matrix import create_table_matrix, open_duration_matrix
+from src.osrm.interface import OSRMInterface
+from src.osrm.server import start_table_server, TableServer, TableRequestHandler
+from tests.helpers import get_data_path
+
+
+@pytest.fixture
+def json_path(tmp_path, name) -> str:
+    # The server converts the JSON matrix to a binary file next to it
+    path = str(tmp_path / f"{name}_matrix.json")
+    shutil.copy(get_data_path(f"{name}_matrix.json"), path)
+    return path
+
+
+@pytest.fixture
+def server(json_path):
+    table_server = start_table_server(json_path)
+    yield table_server
+    table_server.shutdown()
+    table_server.server_close()
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(interface, "OSRM_TABLE_BACKOFF", 0)
+
+
+@pytest.mark.parametrize("tile_size", [37, 100, 5000])
+def test_tiles_are_stitched(server, matrix, tile_size):
+    segment_ids = [int(segment_id) for segment_id in matrix]
+    durations = OSRMInterface.request_table_tiles(segment_ids, segment_ids, "map.osrm", tile_size=tile_size,
+                                                  workers=4, address=server.get_address())
+    assert durations.shape == (len(segment_ids), len(segment_ids))
+    assert create_table_matrix(segment_ids, segment_ids, durations).to_json() == matrix
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_non_square_tiles_are_stitched(server, matrix):
+    sources = [int(segment_id) for segment_id in list(matrix)[:70]]
+    destinations = [int(segment_id) for segment_id in list(matrix)[50:]]
+    durations = OSRMInterface.request_table_tiles(sources, destinations, "map.osrm", tile_size=32,
+                                                  address=server.get_address())
+    np.testing.assert_array_equal(durations, [[matrix[str(source)][str(destination)] for destination in destinations]
+                                              for source in sources])
+
+
+@pytest.mark.parametrize("name", ["urban"])
+@pytest.mark.usefixtures("no_backoff")
+def test_failed_tiles_are_requested_again(json_path, matrix):
+    tile_requests = []
+    lock = threading.Lock()
+
+    class FlakyTableRequestHandler(TableRequestHandler):
+        def do_GET(self):
+            # The first request of every tile fails
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            with lock:
+                failed = body not in tile_requests
+                tile_requests.append(body)
+            if failed:
+                self.send_error(503)
+                return
+            self.rfile = io.BytesIO(body)
+            super().do_GET()
+
+    table_server = TableServer(open_duration_matrix(json_path))
+    table_server.RequestHandlerClass = FlakyTableRequestHandler
+    threading.Thread(target=table_server.serve_forever, daemon=True).start()
+    try:
+        segment_ids = [int(segment_id) for segment_id in matrix]
+        durations = OSRMInterface.request_table_tiles(segment_ids, segment_ids, "map.osrm", tile_size=50,
+                                                      address=table_server.get_address())
+    finally:
+        table_server.shutdown()
+        table_server.server_close()
+
+    tiles_number = (-(-len(segment_ids) // 50)) ** 2
+    assert len(tile_requests) == 2 * tiles_number
+    assert create_table_matrix(segment_ids, segment_ids, durations).to_json() == matrix
+
+
+@pytest.mark.parametrize("name", ["urban"])
+@pytest.mark.usefixtures("no_backoff")
+def test_rejected_tiles_raise_chained_error(server):
+    # Unknown segments are rejected and not requested again
+    with pytest.raises(Exception, match="Couldn't get the durations table tile at") as error:
+        OSRMInterface.request_table_tiles([1, 2], [3], "map.osrm", address=server.get_address())
+    assert isinstance(error.value.__cause__, requests.HTTPError)
+    assert error.value.__cause__.response.status_code == 400
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_invalid_json_body_is_rejected(server):
+    response = requests.get(f"{server.get_address()}/table", data=b"{\"origins\": [1,", timeout=10)
+    assert response.status_code == 400
+    assert "Invalid JSON body" in response.reason
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+import pytest
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.cost_engine import EBGCostEngine
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.partitioning import partition_segments, create_cells_order
+from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.x_graph import build_x_graph
+from tests.helpers import get_route, get_route_cost, assert_visits_every_node, create_x_graph_arguments, \
+    assert_x_graph_result
+
+MAX_CELL_SIZE = 60
+
+
+def create_ebg_arguments(nodes, matrix, duration: float):
+    return dict(nodes=nodes, matrix=matrix, local_search_metaheuristic=LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                first_solution_strategy=FirstSolutionStrategy.PATH_CHEAPEST_ARC, max_optimisation_duration=duration,
+                check_topology=False, precompute_costs=True)
+
+
+def test_partition_segments_covers_segments(rp):
+    cells = partition_segments(rp.segments, MAX_CELL_SIZE)
+    assert len(cells) > 1
+    assert all(0 < len(cell) <= MAX_CELL_SIZE for cell in cells)
+    assert sorted(segment.id for cell in cells for segment in cell) == sorted(segment.id for segment in rp.segments)
+
+
+def test_create_cells_order_visits_every_cell():
+    costs = np.array([[0, 1, 5, 9], [1, 0, 1, 5], [5, 1, 0, 1], [9, 5, 1, 0]])
+    assert create_cells_order(costs, 0.5) in ([0, 1, 2, 3], [3, 2, 1, 0])
+
+
+def test_partitioned_run_keeps_budget_and_true_cost(matrix, ebg_nodes):
+    start_time = time.monotonic()
+    order, history = EBGOptimizer.optimize_partitioned(max_cell_size=MAX_CELL_SIZE, cells_order_duration=0.5,
+                                                       refinement_duration=1,
+                                                       **create_ebg_arguments(ebg_nodes, matrix, 4))
+    elapsed = time.monotonic() - start_time
+    # Waves of cells share the time left by the cells order and the refinement
+    assert elapsed < 4 + 3
+
+    route = get_route(ebg_nodes, order)
+    assert_visits_every_node(ebg_nodes, route)
+    last_time, last_objective = list(history.items())[-1]
+    assert last_objective == get_route_cost(EBGCostEngine(ebg_nodes, matrix, None, False), route)
+    assert float(last_time) <= elapsed + 0.1
+
+
+def test_partitioned_x_graph_keeps_disjunctions_whole(rp, matrix):
+    x_graph = build_x_graph(rp)
+    order, history = XGraphOptimizer.optimize_partitioned(max_cell_size=MAX_CELL_SIZE, cells_order_duration=0.5,
+                                                          refinement_duration=1,
+                                                          **create_x_graph_arguments(x_graph, matrix, 4))
+    assert_x_graph_result(x_graph, matrix, order, history)
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_partitioned_run_of_short_duration(matrix, ebg_nodes):
+    # The default cells order and refinement durations are scaled down to a share of the duration
+    start_time = time.monotonic()
+    order, _ = EBGOptimizer.optimize_partitioned(max_cell_size=MAX_CELL_SIZE,
+                                                 **create_ebg_arguments(ebg_nodes, matrix, 2))
+    assert time.monotonic() - start_time < 2 + 3
+    assert_visits_every_node(ebg_nodes, get_route(ebg_nodes, order))
@@ -0,0 +1,108 @@
+import numpy as np
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.cost_engine import XGraphCostEngine
+from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.connections.complete import HigherOrderXGraphNode, FirstXGraphNode, LastXGraphNode
+from src.routing_problem.maneuver.maneuver_type import ManeuverType
+from src.routing_problem.maneuver.modifier import ManeuverModifier
+from src.routing_problem.maneuver.penalties import ManeuverPenalties, MANEUVER_CLASSES, NO_MANEUVER, \
+    get_maneuver_class
+from src.routing_problem.x_graph import build_x_graph, build_higher_order_x_graph
+from tests.helpers import get_route, assert_visits_every_passlet
+
+STRAIGHT = MANEUVER_CLASSES[(ManeuverType.Turn, ManeuverModifier.Straight)]
+LEFT = MANEUVER_CLASSES[(ManeuverType.Turn, ManeuverModifier.Left)]
+RIGHT = MANEUVER_CLASSES[(ManeuverType.Turn, ManeuverModifier.Right)]
+
+
+def create_third_order_penalties() -> ManeuverPenalties:
+    penalties = ManeuverPenalties.from_straight_penalties(100, 50)
+    penalties.set_third_order_penalty((None, ManeuverModifier.Straight), (None, ManeuverModifier.Straight),
+                                      (None, ManeuverModifier.Right), 500)
+    return penalties
+
+
+def get_reference_route_cost(order, matrix, penalties: ManeuverPenalties) -> int:
+    # Durations between maneuvers, penalties of consecutive maneuvers on the same segment and third-order penalties
+    # of three consecutive maneuvers
+    cost = 0
+    for i, (node_from, node_to) in enumerate(zip(order, order[1:])):
+        if isinstance(node_from, FirstXGraphNode) or isinstance(node_to, LastXGraphNode):
+            continue
+        if node_from.maneuver is None or node_from.lanelet_to.segment.id != node_to.lanelet_from.segment.id:
+            cost += matrix[node_from.lanelet_to.segment.id][node_to.lanelet_from.segment.id]
+            continue
+
+        cost += penalties.get_penalty(get_maneuver_class(node_from.maneuver), get_maneuver_class(node_to.maneuver))
+        node_before = order[i - 1]
+        if not isinstance(node_before, FirstXGraphNode) and node_before.maneuver is not None and \
+                node_before.lanelet_to.segment.id == node_from.lanelet_from.segment.id:
+            cost += penalties.get_third_order_penalty(get_maneuver_class(node_before.maneuver),
+                                                      get_maneuver_class(node_from.maneuver),
+                                                      get_maneuver_class(node_to.maneuver))
+    return cost
+
+
+def test_straight_penalties_table():
+    penalties = ManeuverPenalties.from_straight_penalties(100, 50)
+    assert penalties.get_penalty(STRAIGHT, LEFT) == 100
+    assert penalties.get_penalty(RIGHT, STRAIGHT) == 50
+    assert penalties.get_penalty(STRAIGHT, STRAIGHT) == 0
+    assert penalties.get_penalty(LEFT, RIGHT) == 0
+    assert penalties.get_penalty(NO_MANEUVER, LEFT) == 0
+    assert not penalties.has_third_order_penalties()
+
+
+def test_third_order_penalty_table():
+    penalties = create_third_order_penalties()
+    assert penalties.has_third_order_penalties()
+    assert penalties.get_third_order_penalty(STRAIGHT, STRAIGHT, RIGHT) == 500
+    assert penalties.get_third_order_penalty(STRAIGHT, STRAIGHT, LEFT) == 0
+    assert penalties.get_third_order_row(STRAIGHT, STRAIGHT)[RIGHT] == 500
+    assert penalties.get_prefixes_table()[STRAIGHT, STRAIGHT]
+    assert not penalties.get_prefixes_table()[STRAIGHT, RIGHT]
+
+
+def test_higher_order_x_graph_keeps_original_nodes(rp):
+    x_graph = build_x_graph(rp)
+    penalties = create_third_order_penalties()
+    nodes, disjunctions = build_higher_order_x_graph(x_graph.nodes, x_graph.disjunctions, penalties)
+
+    assert nodes[:len(x_graph.nodes) - 1] == x_graph.nodes[:-1] and nodes[-1] is x_graph.nodes[-1]
+    copies = nodes[len(x_graph.nodes) - 1:-1]
+    assert len(copies) > 0 and all(isinstance(node, HigherOrderXGraphNode) for node in copies)
+
+    # Copies join the disjunction of their original node
+    node_index = {id(node): i for i, node in enumerate(nodes)}
+    pack_of_node = {node: k for k, pack in enumerate(disjunctions) for node in pack}
+    for copy in copies:
+        assert pack_of_node[node_index[id(copy)]] == pack_of_node[node_index[id(copy.original_node)]]
+        assert (copy.previous_class, get_maneuver_class(copy.maneuver)) in penalties.third_order_prefixes
+
+
+def test_higher_order_engine_matches_get_cost_to(rp, matrix):
+    x_graph = build_x_graph(rp)
+    penalties = create_third_order_penalties()
+    nodes, _ = build_higher_order_x_graph(x_graph.nodes, x_graph.disjunctions, penalties)
+    cost_engine = XGraphCostEngine(nodes, matrix, penalties)
+
+    from_nodes = np.arange(0, len(nodes) - 1, 5)
+    reference_costs = [[nodes[from_node].get_cost_to(node_to, matrix, penalties) for node_to in nodes[1:]]
+                       for from_node in from_nodes]
+    np.testing.assert_array_equal(cost_engine.get_costs(from_nodes)[:, 1:], reference_costs)
+
+
+def test_third_order_route_cost(rp, matrix):
+    x_graph = build_x_graph(rp)
+    penalties = create_third_order_penalties()
+    order, history = XGraphOptimizer(x_graph.nodes, x_graph.disjunctions, matrix,
+                                     LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                                     FirstSolutionStrategy.PATH_CHEAPEST_ARC, 1, 100, 50, precompute_costs=True,
+                                     maneuver_penalties=penalties).optimize()
+
+    # Higher-order copies stand for their original nodes
+    original_order = [node.original_node if isinstance(node, HigherOrderXGraphNode) else node for node in order]
+    assert any(node is not original_node for node, original_node in zip(order, original_order))
+    assert_visits_every_passlet(x_graph, get_route(x_graph.nodes, original_order))
+    assert get_reference_route_cost(order, matrix, penalties) == list(history.values())[-1]
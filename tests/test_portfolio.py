@@ -0,0 +1,58 @@
+import time
+
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.cost_engine import EBGCostEngine
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.portfolio import SharedIncumbent
+from src.routing_problem.lanelet import FirstLanelet, LastLanelet
+from tests.helpers import get_route, get_route_cost, assert_visits_every_node
+
+STRATEGIES = [(LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH, FirstSolutionStrategy.PATH_CHEAPEST_ARC),
+              (LocalSearchMetaheuristic.SIMULATED_ANNEALING, FirstSolutionStrategy.SAVINGS)]
+
+
+def create_arguments(nodes, matrix, duration: float):
+    return dict(nodes=nodes, matrix=matrix, local_search_metaheuristic=LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                first_solution_strategy=FirstSolutionStrategy.PATH_CHEAPEST_ARC, max_optimisation_duration=duration,
+                check_topology=False, precompute_costs=True)
+
+
+def test_shared_incumbent_keeps_best_route():
+    incumbent = SharedIncumbent(5)
+    assert incumbent.get() == (2 ** 63 - 1, None)
+
+    assert incumbent.publish(10, [3, 1, 2])
+    assert not incumbent.publish(12, [1, 2, 3])
+    assert incumbent.publish(8, [2, 3, 1])
+    assert incumbent.get() == (8, [2, 3, 1])
+
+
+def test_portfolio_returns_best_order(matrix, ebg_nodes):
+    start_time = time.monotonic()
+    order, history = EBGOptimizer.optimize_portfolio(STRATEGIES, **create_arguments(ebg_nodes, matrix, 2))
+    assert time.monotonic() - start_time < 2 + 3
+
+    assert isinstance(order[0], FirstLanelet) and isinstance(order[-1], LastLanelet)
+    route = get_route(ebg_nodes, order)
+    assert_visits_every_node(ebg_nodes, route)
+    assert list(history.values())[-1] == get_route_cost(EBGCostEngine(ebg_nodes, matrix, None, False), route)
+
+
+def test_portfolio_stops_at_target_objective(matrix, ebg_nodes):
+    start_time = time.monotonic()
+    order, _ = EBGOptimizer.optimize_portfolio(STRATEGIES, target_objective=10 ** 9,
+                                               **create_arguments(ebg_nodes, matrix, 30))
+    assert time.monotonic() - start_time < 10
+    assert_visits_every_node(ebg_nodes, get_route(ebg_nodes, order))
+
+
+def test_stop_event_stops_search(matrix, ebg_nodes):
+    optimizer = EBGOptimizer(**create_arguments(ebg_nodes, matrix, 30))
+    incumbent = SharedIncumbent(len(ebg_nodes))
+    optimizer.set_incumbent(incumbent)
+    incumbent.stop_event.set()
+
+    start_time = time.monotonic()
+    optimizer.solve()
+    assert time.monotonic() - start_time < 5
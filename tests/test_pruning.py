@@ -0,0 +1,57 @@
+import pytest
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.pruning import is_allowed_route
+from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.x_graph import build_x_graph
+
+CANDIDATE_NEIGHBOURS = 10
+
+
+def create_ebg_optimizer(nodes, matrix, first_solution_strategy, duration, candidate_neighbours=None) -> EBGOptimizer:
+    return EBGOptimizer(nodes, matrix, LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH, first_solution_strategy,
+                        duration, False, precompute_costs=True, candidate_neighbours=candidate_neighbours)
+
+
+@pytest.mark.parametrize("first_solution_strategy", [FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+                                                     FirstSolutionStrategy.SAVINGS])
+def test_pruned_search_starts_from_first_solution(matrix, ebg_nodes, first_solution_strategy):
+    _, history = create_ebg_optimizer(ebg_nodes, matrix, first_solution_strategy, 1).optimize()
+
+    optimizer = create_ebg_optimizer(ebg_nodes, matrix, first_solution_strategy, 1, CANDIDATE_NEIGHBOURS)
+    assert optimizer.removed_arcs_number > 0
+    assert is_allowed_route(optimizer, optimizer.initial_route)
+    order, pruned_history = optimizer.optimize()
+
+    # Constructive strategies run on the unpruned model, see pruning.prune_arcs
+    assert list(pruned_history.values())[0] == list(history.values())[0]
+    assert list(pruned_history.values())[-1] <= list(pruned_history.values())[0]
+    assert sorted(map(id, order)) == sorted(map(id, ebg_nodes))
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_pruned_objective_is_close_to_unpruned(matrix, ebg_nodes):
+    # Pruning with a first solution of nearest neighbours ended about 20 % above the unpruned search
+    _, history = create_ebg_optimizer(ebg_nodes, matrix, FirstSolutionStrategy.SAVINGS, 2).optimize()
+    _, pruned_history = create_ebg_optimizer(ebg_nodes, matrix, FirstSolutionStrategy.SAVINGS, 2,
+                                             CANDIDATE_NEIGHBOURS).optimize()
+
+    assert list(pruned_history.values())[-1] <= 1.15 * list(history.values())[-1]
+
+
+def test_pruned_x_graph_visits_every_disjunction(rp, matrix):
+    x_graph = build_x_graph(rp)
+    optimizer = XGraphOptimizer(x_graph.nodes, x_graph.disjunctions, matrix,
+                                LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                                FirstSolutionStrategy.PARALLEL_CHEAPEST_INSERTION, 1, 120, 0,
+                                precompute_costs=True, candidate_neighbours=CANDIDATE_NEIGHBOURS)
+    assert optimizer.removed_arcs_number > 0
+    order, _ = optimizer.optimize()
+
+    # Every passlet is visited once, through one node of its disjunction or its SelfXGraphNode
+    node_index = {id(node): i for i, node in enumerate(x_graph.nodes)}
+    route = [node_index[id(node)] for node in order[1:-1]]
+    assert len(route) == len(set(route))
+    assert sorted(x_graph.packs[route][x_graph.packs[route] >= 0].tolist()) == list(range(len(x_graph.disjunctions)))
+    assert sorted(x_graph.lanelets_to[route].tolist()) == list(range(len(rp.lanelets)))
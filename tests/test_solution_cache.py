@@ -0,0 +1,109 @@
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.solution_cache import SolutionCache, repair_route
+from src.optimizer.x_graph_optimizer import XGraphOptimizer
+from src.routing_problem.x_graph import build_x_graph
+
+
+def create_ebg_optimizer(nodes, matrix, solution_cache=None) -> EBGOptimizer:
+    return EBGOptimizer(nodes, matrix, LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                        FirstSolutionStrategy.PATH_CHEAPEST_ARC, 1, False, precompute_costs=True,
+                        solution_cache=solution_cache)
+
+
+def test_solution_cache_round_trip(tmp_path):
+    solution_cache = SolutionCache(str(tmp_path))
+    assert solution_cache.get("ebg-missing") is None
+
+    solution_cache.put("ebg-order", "a", ["1/0", "2/1"], 10)
+    assert solution_cache.get("ebg-order") == {"fingerprint": "a", "order": ["1/0", "2/1"], "objective": 10}
+    assert list(tmp_path.iterdir()) == [tmp_path / "ebg-order.json"]
+
+
+def test_solution_cache_keeps_better_order(tmp_path):
+    solution_cache = SolutionCache(str(tmp_path))
+    solution_cache.put("ebg-order", "a", ["1/0", "2/1"], 10)
+
+    # Worse orders of the same routing problem are dropped, better ones and orders of a changed problem are stored
+    solution_cache.put("ebg-order", "a", ["2/1", "1/0"], 12)
+    assert solution_cache.get("ebg-order")["order"] == ["1/0", "2/1"]
+    solution_cache.put("ebg-order", "a", ["2/1", "1/0"], 8)
+    assert solution_cache.get("ebg-order")["order"] == ["2/1", "1/0"]
+    solution_cache.put("ebg-order", "b", ["1/0", "2/1"], 20)
+    assert solution_cache.get("ebg-order") == {"fingerprint": "b", "order": ["1/0", "2/1"], "objective": 20}
+
+
+def test_warm_start_continues_from_cached_order(tmp_path, matrix, ebg_nodes):
+    solution_cache = SolutionCache(str(tmp_path))
+    _, history = create_ebg_optimizer(ebg_nodes, matrix, solution_cache).optimize()
+
+    optimizer = create_ebg_optimizer(ebg_nodes, matrix, solution_cache)
+    assert optimizer.initial_route is not None
+    order, warm_history = optimizer.optimize()
+    assert list(warm_history.values())[0] <= list(history.values())[-1]
+    assert sorted(map(id, order)) == sorted(map(id, ebg_nodes))
+
+
+def change_matrix(matrix, ebg_nodes):
+    segment_id = ebg_nodes[1].segment.id
+    other_segment_id = next(other_id for other_id in matrix[segment_id] if other_id != segment_id)
+    matrix[segment_id][other_segment_id] += 1
+
+
+def test_fingerprint_changes_with_matrix(matrix, ebg_nodes):
+    identity, fingerprint = create_ebg_optimizer(ebg_nodes, matrix).create_fingerprint()
+    assert create_ebg_optimizer(ebg_nodes, matrix).create_fingerprint() == (identity, fingerprint)
+
+    # The identity only depends on the segments
+    change_matrix(matrix, ebg_nodes)
+    changed_identity, changed_fingerprint = create_ebg_optimizer(ebg_nodes, matrix).create_fingerprint()
+    assert changed_identity == identity
+    assert changed_fingerprint != fingerprint
+
+
+def test_warm_start_repairs_order_of_changed_routing_problem(tmp_path, monkeypatch, matrix, ebg_nodes):
+    repaired_orders = []
+
+    def record_repair_route(optimizer, order):
+        repaired_orders.append(order)
+        return repair_route(optimizer, order)
+
+    monkeypatch.setattr("src.optimizer.solution_cache.repair_route", record_repair_route)
+    solution_cache = SolutionCache(str(tmp_path))
+    create_ebg_optimizer(ebg_nodes, matrix, solution_cache).optimize()
+
+    # The same routing problem starts from the cached order directly
+    optimizer = create_ebg_optimizer(ebg_nodes, matrix, solution_cache)
+    assert len(repaired_orders) == 0
+    assert optimizer.initial_route is not None
+
+    # A changed routing problem has the same entry, its order is repaired
+    change_matrix(matrix, ebg_nodes)
+    optimizer = create_ebg_optimizer(ebg_nodes, matrix, solution_cache)
+    assert repaired_orders == [solution_cache.get(optimizer.identity)["order"]]
+    assert sorted(optimizer.initial_route) == list(range(1, len(ebg_nodes) - 1))
+    order, _ = optimizer.optimize()
+    assert solution_cache.get(optimizer.identity)["fingerprint"] == optimizer.fingerprint
+    assert sorted(map(id, order)) == sorted(map(id, ebg_nodes))
+
+
+def test_repair_route_of_changed_routing_problem(matrix, ebg_nodes):
+    optimizer = create_ebg_optimizer(ebg_nodes, matrix)
+    keys = [node.get_key() for node in ebg_nodes[1:-1]]
+
+    # Removed nodes are dropped, new nodes are inserted and cached nodes keep their order
+    route = repair_route(optimizer, keys[10:] + ["removed/0"] + keys[:3])
+    assert sorted(route) == list(range(1, len(ebg_nodes) - 1))
+    assert [node for node in route if node > 10 or node <= 3] == list(range(11, len(ebg_nodes) - 1)) + [1, 2, 3]
+
+
+def test_repair_route_visits_every_disjunction_once(rp, matrix):
+    x_graph = build_x_graph(rp)
+    optimizer = XGraphOptimizer(x_graph.nodes, x_graph.disjunctions, matrix,
+                                LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH, FirstSolutionStrategy.PATH_CHEAPEST_ARC,
+                                1, 120, 0, precompute_costs=True)
+
+    # Only the first of all alternatives of a disjunction is kept, passlets of the first nodes are inserted
+    route = repair_route(optimizer, [node.get_key() for node in x_graph.nodes[1:-1]][5:])
+    assert sorted(x_graph.lanelets_to[route].tolist()) == list(range(len(rp.lanelets)))
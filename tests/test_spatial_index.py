@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import shapely
+
+from src.geo.geo import LatLon
+from src.routing_problem.spatial_index import SpatialIndex
+
+RADIUS = 50  # meters
+
+
+def get_distances(index: SpatialIndex, lat: float, lon: float) -> np.ndarray:
+    # Brute-force distances in meters from a point to every figure of the index
+    point = shapely.points(index.project([lat, lon])[0])
+    return np.array([shapely.distance(point, shapely.linestrings(index.project(figure.coordinates.get_latlons())))
+                     for figure in index.figures])
+
+
+def get_query_points(rp) -> np.ndarray:
+    # Vertices of some segments moved off the road, so that queries do not only hit the segments themselves
+    latlons = np.concatenate([segment.coordinates.get_latlons() for segment in rp.segments[::7]])
+    return latlons + np.array([2e-4, -1e-4])
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_nearest(rp):
+    index = rp.get_segments_index()
+    points = get_query_points(rp)
+
+    nearest = index.nearest_many(points)
+    for (lat, lon), figure in zip(points.tolist(), nearest):
+        distances = get_distances(index, lat, lon)
+        assert index.nearest(lat, lon) is figure
+        assert distances[index.figures.index(figure)] == pytest.approx(distances.min())
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_query_radius(rp):
+    index = rp.get_segments_index()
+    for lat, lon in get_query_points(rp).tolist():
+        distances = get_distances(index, lat, lon)
+        figures = index.query_radius(lat, lon, RADIUS)
+
+        assert {id(figure) for figure in figures} == \
+               {id(figure) for figure, distance in zip(index.figures, distances) if distance <= RADIUS}
+        figures_distances = [distances[index.figures.index(figure)] for figure in figures]
+        assert figures_distances == sorted(figures_distances)
+
+
+@pytest.mark.parametrize("name", ["urban"])
+def test_query_bbox(rp):
+    index = rp.get_segments_index()
+    latlons = np.concatenate([segment.coordinates.get_latlons() for segment in index.figures])
+    (south, west), (north, east) = latlons.min(axis=0), latlons.max(axis=0)
+    center_lat, center_lon = (south + north) / 2, (west + east) / 2
+
+    figures = index.query_bbox(south, west, center_lat, center_lon)
+    box = shapely.polygons(index.project([[south, west], [south, center_lon], [center_lat, center_lon],
+                                          [center_lat, west]]))
+    expected = [figure for figure in index.figures
+                if shapely.intersects(box, shapely.linestrings(index.project(figure.coordinates.get_latlons())))]
+    assert 0 < len(figures) < len(index.figures)
+    assert figures == expected
+
+    # The whole map contains every figure
+    assert index.query_bbox(south, west, north, east) == index.figures
+
+
+def test_empty_index():
+    index = SpatialIndex([], LatLon(lat=48.0, lon=11.0))
+    assert index.nearest(48.0, 11.0) is None
+    assert index.nearest_many(np.array([[48.0, 11.0], [48.1, 11.1]])) == [None, None]
+    assert not index.query_radius(48.0, 11.0, RADIUS)
+    assert not index.query_bbox(47.0, 10.0, 49.0, 12.0)
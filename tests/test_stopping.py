@@ -0,0 +1,80 @@
+import time
+
+from ortools.constraint_solver.routing_enums_pb2 import LocalSearchMetaheuristic, FirstSolutionStrategy
+
+from src.optimizer.ebg_optimizer import EBGOptimizer
+from src.optimizer.stopping import TargetObjectiveStoppingPolicy, StallStoppingPolicy, NodesTimeStoppingPolicy
+
+
+def test_target_objective_policy():
+    policy = TargetObjectiveStoppingPolicy(100)
+    assert policy.get_time_limit(10) is None
+    assert not policy.should_stop(0.0)
+
+    policy.update(1.0, 150)
+    assert not policy.should_stop(1.0)
+    assert not policy.should_stop(100.0)
+
+    policy.update(2.0, 100)
+    assert policy.should_stop(2.0)
+
+
+def test_stall_policy():
+    policy = StallStoppingPolicy(0.1, 5)
+    assert policy.get_time_limit(10) is None
+    assert not policy.should_stop(10.0)
+
+    # Nothing to compare with before the observed period has passed
+    policy.update(0.0, 1000)
+    assert not policy.should_stop(4.0)
+
+    # 20% improvement during the last 5 seconds
+    policy.update(3.0, 800)
+    assert not policy.should_stop(5.0)
+
+    # 1000 was the objective 5 seconds ago, 790 is 21% better
+    policy.update(6.0, 790)
+    assert not policy.should_stop(7.0)
+
+    # 800 was the objective 5 seconds ago, 790 is less than 10% better
+    assert policy.should_stop(8.0)
+
+    # Improvements older than the reference are dropped
+    assert [elapsed for elapsed, _ in policy.improvements] == [3.0, 6.0]
+
+    # A long stall without any improvement stops as well
+    policy.update(20.0, 500)
+    assert not policy.should_stop(24.0)
+    assert policy.should_stop(25.0)
+
+
+def test_stall_policy_of_zero_objective():
+    policy = StallStoppingPolicy(0.1, 5)
+    policy.update(0.0, 0)
+    assert policy.should_stop(5.0)
+
+
+def test_nodes_time_policy():
+    policy = NodesTimeStoppingPolicy(0.5, 3)
+    assert not policy.should_stop(1000.0)
+
+    assert policy.get_time_limit(10) == 5
+    policy.update(1.0, 100)
+    assert not policy.should_stop(4.9)
+    assert policy.should_stop(5.0)
+
+    # Small problems get at least min_duration seconds
+    assert policy.get_time_limit(2) == 3
+    assert not policy.should_stop(2.9)
+    assert policy.should_stop(3.0)
+
+
+def test_policies_stop_search(matrix, ebg_nodes):
+    start_time = time.monotonic()
+    optimizer = EBGOptimizer(ebg_nodes, matrix, LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH,
+                             FirstSolutionStrategy.PATH_CHEAPEST_ARC, 60, False, precompute_costs=True,
+                             stopping_policies=[StallStoppingPolicy(0.5, 1), NodesTimeStoppingPolicy(0, 30)])
+    _, history = optimizer.optimize()
+
+    assert time.monotonic() - start_time < 30
+    assert len(history) > 0
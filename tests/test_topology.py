@@ -0,0 +1,93 @@
+import copy
+
+from src.routing_problem.connections.lanelet import LaneletConnection
+from src.routing_problem.connections.topology import create_lanelet_topology
+from src.routing_problem.maneuver.maneuver_type import ManeuverType
+from src.routing_problem.maneuver.modifier import ManeuverModifier
+
+
+def create_notebook_turn_connections(rp):
+    # First pass of check_topology in thesis.ipynb, LaneletConnection marks the connected lanelets
+    connections = []
+    for segment in rp.segments:
+        for previous_segment in segment.previous_segments:
+            maneuver = rp.maneuvers[(previous_segment.id, segment.id)]
+            left = maneuver.modifier in [ManeuverModifier.Left, ManeuverModifier.SlightLeft,
+                                         ManeuverModifier.SharpLeft, ManeuverModifier.UTurn]
+            right = maneuver.modifier in [ManeuverModifier.Right, ManeuverModifier.SlightRight,
+                                          ManeuverModifier.SharpRight]
+            merge = maneuver.type == ManeuverType.Merge
+            if left and not merge or right and merge:
+                for i, lanelet in enumerate(segment.lanelets):
+                    if i < len(previous_segment.lanelets):
+                        connections.append(LaneletConnection(previous_segment.lanelets[i], lanelet, maneuver))
+            elif right and not merge or left and merge:
+                for i, lanelet in enumerate(reversed(segment.lanelets)):
+                    if i < len(previous_segment.lanelets):
+                        connections.append(LaneletConnection(previous_segment.lanelets[-(i + 1)], lanelet, maneuver))
+
+    return connections
+
+
+def create_notebook_straight_connections(rp):
+    # Second pass of check_topology in thesis.ipynb. The notebook assumes that straight maneuvers leave a free lanelet
+    # of the previous segment, see below
+    connections = []
+    for segment in rp.segments:
+        for previous_segment in segment.previous_segments:
+            maneuver = rp.maneuvers[(previous_segment.id, segment.id)]
+            if maneuver.modifier != ManeuverModifier.Straight:
+                continue
+
+            lanelets_to = len(segment.lanelets)
+            lanelets_from = len(previous_segment.lanelets)
+            free_lanelets_to = [lanelet for lanelet in segment.lanelets if not lanelet.has_incoming_connection]
+            free_lanelets_from = [lanelet for lanelet in previous_segment.lanelets
+                                  if not lanelet.has_outgoing_connection]
+
+            if lanelets_to == lanelets_from:
+                pairs = [(previous_segment.lanelets[i], segment.lanelets[i]) for i in range(lanelets_to)]
+            elif len(free_lanelets_to) == lanelets_from:
+                pairs = [(previous_segment.lanelets[i], free_lanelets_to[i]) for i in range(len(free_lanelets_to))]
+            elif lanelets_to == len(free_lanelets_from):
+                pairs = [(free_lanelets_from[i], segment.lanelets[i]) for i in range(lanelets_to)]
+            elif len(free_lanelets_from) == 0:
+                # The notebook fails here with an IndexError, create_lanelet_topology connects lanelets by their lanes
+                pairs = [(previous_segment.lanelets[min(i, lanelets_from - 1)], segment.lanelets[i])
+                         for i in range(lanelets_to)]
+            elif lanelets_to > len(free_lanelets_from):
+                pairs = [(free_lanelets_from[min(i, len(free_lanelets_from) - 1)], segment.lanelets[i])
+                         for i in range(lanelets_to)]
+            else:
+                pairs = [(free_lanelets_from[i], segment.lanelets[min(i, lanelets_to - 1)])
+                         for i in range(len(free_lanelets_from))]
+            connections.extend(LaneletConnection(lanelet_from, lanelet_to, maneuver)
+                               for lanelet_from, lanelet_to in pairs)
+
+    return connections
+
+
+def get_connection_keys(connections):
+    # Maneuver of every connected lanelet pair, duplicates keep their first maneuver
+    keys = {}
+    for connection in connections:
+        keys.setdefault((connection.lanelet_from.get_key(), connection.lanelet_to.get_key()), connection.maneuver)
+    return keys
+
+
+def test_topology_of_notebook(rp):
+    notebook_rp = copy.deepcopy(rp)
+    notebook_connections = get_connection_keys(create_notebook_turn_connections(notebook_rp) +
+                                               create_notebook_straight_connections(notebook_rp))
+
+    topology = create_lanelet_topology(rp)
+    connections = get_connection_keys(topology.get_connections())
+    assert len(notebook_connections) > 0
+    assert connections.keys() == notebook_connections.keys()
+    assert all(connections[key].modifier == maneuver.modifier and connections[key].type == maneuver.type and
+               connections[key].duration == maneuver.duration for key, maneuver in notebook_connections.items())
+
+    # Both mark the same lanelets as connected
+    for lanelet, notebook_lanelet in zip(rp.lanelets, notebook_rp.lanelets):
+        assert lanelet.has_incoming_connection == notebook_lanelet.has_incoming_connection
+        assert lanelet.has_outgoing_connection == notebook_lanelet.has_outgoing_connection
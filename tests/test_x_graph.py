@@ -0,0 +1,49 @@
+from src.routing_problem.connections.complete import XGraphNode, FirstXGraphNode, SelfXGraphNode, LastXGraphNode
+from src.routing_problem.x_graph import build_x_graph
+
+
+def create_notebook_x_graph(rp):
+    # X-Graph nodes and disjunctions of thesis.ipynb, maneuvers are looked up for every pair of lanelets
+    nodes = [FirstXGraphNode()]
+    disjunctions = []
+    for lanelet_to in rp.lanelets:
+        disjunctions.append([])
+        for lanelet_from in rp.lanelets:
+            if (lanelet_from.segment.id, lanelet_to.segment.id) in rp.maneuvers:
+                nodes.append(XGraphNode(lanelet_from=lanelet_from,
+                                        lanelet_to=lanelet_to,
+                                        maneuver=rp.maneuvers[(lanelet_from.segment.id, lanelet_to.segment.id)]))
+                disjunctions[-1].append(len(nodes) - 1)
+
+        # Passlets without incoming maneuvers
+        if len(disjunctions[-1]) == 0:
+            disjunctions = disjunctions[:-1]
+            nodes.append(SelfXGraphNode(lanelet_to))
+
+    nodes.append(LastXGraphNode())
+    return nodes, disjunctions
+
+
+def get_node_key(node):
+    if isinstance(node, (FirstXGraphNode, LastXGraphNode)):
+        return type(node).__name__, None
+    return type(node).__name__, node.get_key()
+
+
+def test_x_graph_of_notebook(rp):
+    notebook_nodes, notebook_disjunctions = create_notebook_x_graph(rp)
+    x_graph = build_x_graph(rp)
+
+    assert [get_node_key(node) for node in x_graph.nodes] == [get_node_key(node) for node in notebook_nodes]
+    assert x_graph.disjunctions == notebook_disjunctions
+    assert all(node.maneuver is notebook_node.maneuver for node, notebook_node in
+               zip(x_graph.nodes[1:-1], notebook_nodes[1:-1]) if not isinstance(node, SelfXGraphNode))
+
+    # Columns of lanelet indices and disjunctions
+    lanelet_index = {id(lanelet): i for i, lanelet in enumerate(rp.lanelets)}
+    assert x_graph.lanelets_from.tolist() == \
+           [-1] + [lanelet_index[id(node.lanelet_from)] for node in notebook_nodes[1:-1]] + [-1]
+    assert x_graph.lanelets_to.tolist() == \
+           [-1] + [lanelet_index[id(node.lanelet_to)] for node in notebook_nodes[1:-1]] + [-1]
+    packs = {node: pack for pack, nodes in enumerate(notebook_disjunctions) for node in nodes}
+    assert x_graph.packs.tolist() == [packs.get(i, -1) for i in range(len(notebook_nodes))]